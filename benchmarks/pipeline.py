@@ -0,0 +1,358 @@
+# benchmarks/pipeline.py
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.server import MediaServer, PLUGIN_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cenário -> quantidade de itens (None: um vídeo só, sem playlist)
+SCENARIOS = {
+    "single": None,
+    "playlist-100": 100,
+    "playlist-1000": 1000,
+}
+
+# Métricas comparadas entre execuções e se valor maior é melhor
+METRICS = {
+    "items_per_min": True,
+    "bytes_per_s": True,
+    "normalize_s_per_track": False,
+    "peak_rss_mb": False,
+    "ffmpeg_peak_rss_mb": False,
+    "temp_disk_peak_mb": False,
+}
+
+# Pastas da saída que só guardam arquivos temporários
+TEMP_DIRS = (".cache", "temp_normalize")
+
+NORMALIZE_LOG_RE = re.compile(r"^\[NORMALIZE\] \((\d+)/\d+\) (Normalizando|Normalizado)")
+
+# Cada cenário roda num processo novo (memória de pico isolada); o script imprime um JSON
+CHILD_SCRIPT = """
+import json, sys
+from benchmarks.pipeline import run_scenario
+print(json.dumps(run_scenario(json.loads(sys.argv[1]))))
+"""
+
+
+# =========================
+# Medições (processo do cenário)
+# =========================
+class TempDiskSampler:
+    """
+    Amostra periodicamente o espaço ocupado na pasta de saída por tudo que ainda
+    não é arquivo final (.part, intermediários, pasta de normalização, lixeira do
+    cache) e guarda o maior valor.
+    """
+
+    def __init__(self, root, audio_format, interval=0.25):
+        self.root = root
+        self.final_ext = f".{audio_format.lower()}"
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-disk", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def finals(self):
+        """
+        Arquivos finais entregues (fora da pasta de normalização e do cache).
+        """
+        finals = []
+        for folder, dirs, files in os.walk(self.root):
+            dirs[:] = [name for name in dirs if name not in TEMP_DIRS]
+            finals += [os.path.join(folder, name) for name in files if name.lower().endswith(self.final_ext)]
+        return finals
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        self.peak = max(self.peak, self._size(self.root, temporary=False))
+
+    def _size(self, path, temporary):
+        total = 0
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Do cache só conta a lixeira (pastas temporárias aguardando remoção)
+                    if entry.name == ".cache":
+                        total += self._size(os.path.join(entry.path, "trash"), temporary=True)
+                    else:
+                        total += self._size(entry.path, temporary or entry.name in TEMP_DIRS)
+                elif temporary or not entry.name.lower().endswith(self.final_ext):
+                    total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+        return total
+
+
+def peak_rss_mb():
+    """
+    Memória de pico (RSS) deste processo e dos processos filhos já encerrados (ffmpeg).
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        # ru_maxrss: KB no Linux, bytes no macOS
+        unit = 1 if sys.platform == "darwin" else 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+        return round(own / 2 ** 20, 1), round(children / 2 ** 20, 1)
+
+    try:
+        import psutil
+    except ImportError:
+        return None, None
+
+    info = psutil.Process().memory_info()
+    peak = getattr(info, "peak_wset", None) or info.rss
+    return round(peak / 2 ** 20, 1), None
+
+
+def run_scenario(spec):
+    """
+    Executa um job completo contra o servidor local e retorna as métricas.
+    spec: url, allow_playlist, audio_format, quality, normalize, max_items,
+    adaptive, max_fragments.
+    """
+    # O plugin de extratores precisa estar no sys.path antes de o yt-dlp carregar
+    sys.path.insert(0, PLUGIN_DIR)
+
+    from core.downloader import Downloader, load_yt_dlp
+    from core.janitor import wait_all
+
+    load_yt_dlp()
+
+    output_path = tempfile.mkdtemp(prefix="yad-bench-out-")
+    sampler = TempDiskSampler(output_path, spec["audio_format"])
+    normalize_started = {}
+    normalize_times = []
+    errors = []
+    totals = {"bytes": 0}
+
+    def on_log(message):
+        match = NORMALIZE_LOG_RE.match(message)
+        if not match:
+            return
+        index, stage = match.groups()
+        if stage == "Normalizando":
+            normalize_started[index] = time.perf_counter()
+        elif index in normalize_started:
+            normalize_times.append(time.perf_counter() - normalize_started.pop(index))
+
+    def on_event(event):
+        totals["bytes"] = max(totals["bytes"], event.playlist.downloaded_bytes)
+
+    downloader = Downloader(
+        url=spec["url"],
+        output_path=output_path,
+        audio_format=spec["audio_format"],
+        quality=spec["quality"],
+        allow_playlist=spec["allow_playlist"],
+        keep_original_file=False,
+        normalize_enabled=spec["normalize"],
+        error_hook=errors.append,
+        log_hook=on_log,
+        progress_event_hook=on_event,
+        max_concurrent_items=spec["max_items"],
+        adaptive_concurrency=spec["adaptive"],
+        max_fragment_downloads=spec["max_fragments"],
+        quiet=True,
+    )
+
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        downloader.start()
+    finally:
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        items = len(sampler.finals())
+        wait_all(timeout=30)
+        shutil.rmtree(output_path, ignore_errors=True)
+
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "items": items,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "items_per_min": round(items / elapsed * 60, 2) if elapsed else None,
+        "bytes_per_s": round(totals["bytes"] / elapsed, 1) if elapsed else None,
+        "normalize_s_per_track": (
+            round(sum(normalize_times) / len(normalize_times), 3) if normalize_times else None
+        ),
+        "peak_rss_mb": own_rss,
+        "ffmpeg_peak_rss_mb": children_rss,
+        "temp_disk_peak_mb": round(sampler.peak / 2 ** 20, 2),
+        "concurrency": downloader.concurrency.snapshot(),
+    }
+
+
+# =========================
+# Orquestração
+# =========================
+def run_child(spec):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, json.dumps(spec)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falhou")
+
+    lines = proc.stdout.strip().splitlines()
+    return json.loads(lines[-1])
+
+
+def git_revision():
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return proc.stdout.strip() or None
+
+
+def compare(results, baseline_path, max_regression):
+    """
+    Compara com um relatório anterior (mesmo formato). Retorna as regressões
+    acima de max_regression (%), se informado.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result["scenario"]: result for result in json.load(f).get("results", [])}
+
+    failures = []
+    print(f"\nComparação com {baseline_path}:")
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if not previous or "skipped" in result or "skipped" in previous:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            print(f"  {result['scenario']:<15} {metric:<22} {old:>12} -> {new:<12} ({change:+.1f}%)")
+            if max_regression is not None and worse > max_regression:
+                failures.append(f"{result['scenario']} {metric} piorou {worse:.1f}%")
+    return failures
+
+
+def main(argv=None):
+    """
+    Mede o pipeline completo sem rede, contra um servidor local com mídias sintéticas:
+    python -m benchmarks.pipeline [--scenarios single playlist-100] [--json resultado.json]
+                                  [--compare anterior.json --max-regression 10]
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline", description="Benchmark offline do pipeline")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("-f", "--format", dest="audio_format", default="mp3", choices=["mp3", "m4a", "opus", "wav", "flac"])
+    parser.add_argument("-q", "--quality", default="192", choices=["128", "192", "256", "320"])
+    parser.add_argument("--no-normalize", dest="normalize", action="store_false", help="Não normaliza o volume")
+    parser.add_argument("--max-items", type=int, default=1, help="Itens baixados ao mesmo tempo")
+    parser.add_argument("--max-fragments", type=int, default=1, help="Fragmentos simultâneos por item")
+    parser.add_argument("--adaptive", action="store_true", help="Ajusta itens e fragmentos pela vazão medida")
+    parser.add_argument("--duration", type=int, default=30, help="Duração das mídias sintéticas (segundos)")
+    parser.add_argument("--json", dest="json_path", help="Grava o resultado neste arquivo")
+    parser.add_argument("--compare", help="Relatório anterior (--json) para comparar")
+    parser.add_argument(
+        "--max-regression", type=float, default=None,
+        help="Com --compare: falha se alguma métrica piorar mais que esta porcentagem"
+    )
+    args = parser.parse_args(argv)
+
+    config = {
+        "audio_format": args.audio_format,
+        "quality": args.quality,
+        "normalize": args.normalize,
+        "max_items": args.max_items,
+        "max_fragments": args.max_fragments,
+        "adaptive": args.adaptive,
+        "duration": args.duration,
+    }
+
+    results = []
+    with MediaServer(duration=args.duration) as server:
+        print(f"Servidor local em {server.base_url} (mídias: {server.sizes})")
+        for scenario in args.scenarios:
+            count = SCENARIOS[scenario]
+            spec = dict(
+                config,
+                url=server.video_url() if count is None else server.playlist_url(count),
+                allow_playlist=count is not None,
+            )
+            try:
+                result = dict(scenario=scenario, **run_child(spec))
+            except (RuntimeError, ValueError) as e:
+                result = {"scenario": scenario, "skipped": str(e)}
+            results.append(result)
+
+            if "skipped" in result:
+                print(f"{scenario:<15} pulado ({result['skipped']})")
+                continue
+            normalize = result["normalize_s_per_track"]
+            print(
+                f"{scenario:<15} {result['items']:>5} itens em {result['elapsed_s']:.1f}s"
+                f"  {result['items_per_min']:.1f} itens/min  {result['bytes_per_s'] / 2 ** 20:.2f} MB/s"
+                f"  normalização {normalize if normalize is not None else '-'} s/faixa"
+                f"  RSS {result['peak_rss_mb']} MB (ffmpeg {result['ffmpeg_peak_rss_mb']} MB)"
+                f"  temp {result['temp_disk_peak_mb']} MB  erros {result['errors']}"
+            )
+
+    failures = [f"{result['scenario']} teve {result['errors']} erro(s)" for result in results if result.get("errors")]
+    if args.compare:
+        failures += compare(results, args.compare, args.max_regression)
+
+    if args.json_path:
+        report = {
+            "benchmark": "pipeline",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": config,
+            "results": results,
+            "failures": failures,
+        }
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for failure in failures:
+        print(f"[REGRESSION] {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# benchmarks/server.py
+
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import get_ffmpeg_executable
+
+# Pasta com o plugin de extratores do benchmark (yt_dlp_plugins/extractor/bench.py)
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_media(directory, duration=30):
+    """
+    Gera as mídias sintéticas servidas pelo benchmark:
+    audio.m4a (senoide AAC) e video.mp4 (padrão de teste H.264 + o mesmo áudio).
+    """
+    ffmpeg = shutil.which(get_ffmpeg_executable())
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg não encontrado (pasta bin do projeto ou PATH)")
+
+    sine = f"sine=frequency=440:sample_rate=44100:duration={duration}"
+    commands = {
+        "audio.m4a": ["-f", "lavfi", "-i", sine, "-c:a", "aac", "-b:a", "128k"],
+        "video.mp4": [
+            "-f", "lavfi", "-i", f"testsrc=size=256x144:rate=15:duration={duration}",
+            "-f", "lavfi", "-i", sine,
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "128k", "-shortest",
+        ],
+    }
+
+    for filename, args in commands.items():
+        path = os.path.join(directory, filename)
+        subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", *args, path],
+            check=True,
+            capture_output=True,
+        )
+
+    return {name: os.path.getsize(os.path.join(directory, name)) for name in commands}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    # Sem uma linha de log por requisição (milhares numa playlist grande)
+    def log_message(self, format, *args):
+        pass
+
+
+class MediaServer:
+    """
+    Servidor HTTP local (127.0.0.1, porta livre) que serve as mídias sintéticas.
+    As URLs /bench/playlist/N e /bench/video/I são resolvidas pelo plugin de
+    extratores do benchmark; só /media/... é de fato baixado.
+    """
+
+    def __init__(self, duration=30):
+        self.duration = duration
+        self.directory = None
+        self.sizes = {}
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def playlist_url(self, count):
+        return f"{self.base_url}/bench/playlist/{count}"
+
+    def video_url(self, index=0):
+        return f"{self.base_url}/bench/video/{index}"
+
+    def start(self):
+        self.directory = tempfile.mkdtemp(prefix="yad-bench-media-")
+        media_dir = os.path.join(self.directory, "media")
+        os.makedirs(media_dir)
+        self.sizes = generate_media(media_dir, self.duration)
+
+        handler = functools.partial(QuietHandler, directory=self.directory)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,188 @@
+# benchmarks/startup.py
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que não podem ser carregados antes de a janela aparecer
+HEAVY_MODULES = ("yt_dlp", "pydub")
+
+# Cada medição roda num processo novo (import a frio); o script imprime um JSON
+IMPORT_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+WARM_UP_SCRIPT = """
+import json, time
+from core.downloader import load_yt_dlp
+t0 = time.perf_counter()
+load_yt_dlp()
+print(json.dumps({"seconds": time.perf_counter() - t0}))
+"""
+
+# Abre a janela de verdade, sem iniciar a fila nem responder "não" aos prompts
+# (o que apagaria o estado salvo), e mede até o primeiro desenho completo
+WINDOW_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import tkinter as tk
+from tkinter import messagebox
+
+try:
+    tk.Tk().destroy()
+except tk.TclError as e:
+    print(json.dumps({"seconds": None, "error": str(e)}))
+    raise SystemExit(0)
+
+from core.scheduler import JobScheduler
+from ui import main_window
+
+messagebox.askyesno = lambda *args, **kwargs: True
+JobScheduler.start = lambda self: None
+main_window.AppWindow._resume_from_state = lambda self, path: None
+main_window.AppWindow._warm_up = lambda self: None
+
+def mainloop(self, n=0):
+    self.update()
+    print(json.dumps({"seconds": time.perf_counter() - t0}))
+    self.destroy()
+
+tk.Tk.mainloop = mainloop
+main_window.AppWindow()
+"""
+
+MEASUREMENTS = {
+    "python_startup": "pass",
+    "import_core": IMPORT_SCRIPT.format(module="core", heavy=HEAVY_MODULES),
+    "import_downloader": IMPORT_SCRIPT.format(module="core.downloader", heavy=HEAVY_MODULES),
+    "import_main_window": IMPORT_SCRIPT.format(module="ui.main_window", heavy=HEAVY_MODULES),
+    "yt_dlp_warm_up": WARM_UP_SCRIPT,
+    "window_ready": WINDOW_SCRIPT,
+}
+
+
+def run_child(script):
+    """
+    Executa o script num interpretador novo a partir da raiz do projeto.
+    Retorna (tempo total do processo, JSON impresso pelo script ou None).
+    """
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falhou")
+
+    lines = proc.stdout.strip().splitlines()
+    return wall, json.loads(lines[-1]) if lines else None
+
+
+def measure(name, script, runs):
+    samples = []
+    heavy = set()
+    error = None
+
+    for _ in range(runs):
+        wall, result = run_child(script)
+        if result is None:
+            samples.append(wall)
+            continue
+        if result.get("seconds") is None:
+            error = result.get("error")
+            break
+        samples.append(result["seconds"])
+        heavy.update(result.get("heavy_modules", ()))
+
+    if not samples:
+        return {"name": name, "skipped": error or "sem amostras"}
+
+    return {
+        "name": name,
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+        "heavy_modules": sorted(heavy),
+    }
+
+
+def main(argv=None):
+    """
+    Mede o tempo de inicialização:
+    python -m benchmarks.startup [--runs 5] [--json resultado.json] [--budget-ms 500]
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description="Tempo de import e de abertura da janela")
+    parser.add_argument("--runs", type=int, default=5, help="Processos por medição (usa a mediana)")
+    parser.add_argument("--json", dest="json_path", help="Grava o resultado neste arquivo")
+    parser.add_argument(
+        "--budget-ms", type=float, default=None,
+        help="Falha se a mediana de import_main_window ou window_ready passar deste valor"
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, script in MEASUREMENTS.items():
+        try:
+            result = measure(name, script, max(1, args.runs))
+        except RuntimeError as e:
+            result = {"name": name, "skipped": str(e)}
+        results.append(result)
+
+        if "skipped" in result:
+            print(f"{name:<20} pulado ({result['skipped']})")
+        else:
+            heavy = f"  carregou: {', '.join(result['heavy_modules'])}" if result["heavy_modules"] else ""
+            print(
+                f"{name:<20} mediana {result['median_ms']:>9.2f} ms"
+                f"  (min {result['min_ms']:.2f} / max {result['max_ms']:.2f}){heavy}"
+            )
+
+    failures = []
+    for result in results:
+        if result["name"] in ("import_core", "import_main_window") and result.get("heavy_modules"):
+            failures.append(f"{result['name']} importou {', '.join(result['heavy_modules'])}")
+        if (
+            args.budget_ms is not None
+            and result["name"] in ("import_main_window", "window_ready")
+            and result.get("median_ms", 0) > args.budget_ms
+        ):
+            failures.append(f"{result['name']} acima do limite ({result['median_ms']} ms > {args.budget_ms} ms)")
+
+    if args.json_path:
+        report = {
+            "benchmark": "startup",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "results": results,
+            "failures": failures,
+        }
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for failure in failures:
+        print(f"[REGRESSION] {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
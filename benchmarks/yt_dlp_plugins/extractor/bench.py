@@ -0,0 +1,56 @@
+# benchmarks/yt_dlp_plugins/extractor/bench.py
+
+from yt_dlp.extractor.common import InfoExtractor
+
+# Extratores do benchmark (plugin do yt-dlp): respondem às URLs do servidor local
+# de benchmarks.server sem baixar página nenhuma.
+#   http://127.0.0.1:PORTA/bench/playlist/N  -> playlist com N vídeos
+#   http://127.0.0.1:PORTA/bench/video/I     -> vídeo com um formato de áudio e um de vídeo
+
+
+class BenchVideoIE(InfoExtractor):
+    IE_NAME = "bench:video"
+    _VALID_URL = r"(?P<base>http://127\.0\.0\.1:\d+)/bench/video/(?P<id>\d+)$"
+
+    def _real_extract(self, url):
+        base, index = self._match_valid_url(url).group("base", "id")
+        return {
+            "id": f"bench{index}",
+            "title": f"Bench Track {index}",
+            "formats": [
+                {
+                    "format_id": "audio",
+                    "url": f"{base}/media/audio.m4a?item={index}",
+                    "ext": "m4a",
+                    "acodec": "mp4a.40.2",
+                    "vcodec": "none",
+                    "abr": 128,
+                },
+                {
+                    "format_id": "video",
+                    "url": f"{base}/media/video.mp4?item={index}",
+                    "ext": "mp4",
+                    "acodec": "mp4a.40.2",
+                    "vcodec": "avc1.42001e",
+                    "abr": 128,
+                    "height": 144,
+                },
+            ],
+        }
+
+
+class BenchPlaylistIE(InfoExtractor):
+    IE_NAME = "bench:playlist"
+    _VALID_URL = r"(?P<base>http://127\.0\.0\.1:\d+)/bench/playlist/(?P<id>\d+)$"
+
+    def _real_extract(self, url):
+        base, count = self._match_valid_url(url).group("base", "id")
+        count = int(count)
+
+        def entries():
+            for index in range(count):
+                yield self.url_result(
+                    f"{base}/bench/video/{index}", BenchVideoIE, f"bench{index}", f"Bench Track {index}"
+                )
+
+        return self.playlist_result(entries(), f"bench-playlist-{count}", f"Bench Playlist {count}")
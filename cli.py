@@ -0,0 +1,230 @@
+# cli.py
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from core import Downloader
+from core.concurrency import ConnectionBudget
+from core.janitor import wait_all
+from core.metrics import registry
+from core.session import close_sessions
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Tempo máximo (s) esperando as remoções em segundo plano antes de sair;
+# o que sobrar fica pendente em disco para a próxima execução
+CLEANUP_WAIT = 10.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Baixa áudio do YouTube sem interface gráfica (uma URL por linha)."
+    )
+    parser.add_argument("urls", nargs="*", help="URLs a baixar")
+    parser.add_argument("-i", "--input", help="Arquivo com URLs (uma por linha); '-' lê da entrada padrão")
+    parser.add_argument("-o", "--output", default=os.getcwd(), help="Pasta de destino")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="Downloads (jobs) simultâneos")
+    parser.add_argument("-f", "--format", dest="audio_format", default="mp3", help="mp3, wav, flac, ...")
+    parser.add_argument("-q", "--quality", default="192", help="Bitrate em kbps")
+    parser.add_argument("--playlist", action="store_true", help="Baixar playlists inteiras")
+    parser.add_argument("--keep-original", action="store_true", help="Manter o arquivo original")
+    parser.add_argument("--normalize", action="store_true", help="Normalizar o áudio (loudnorm)")
+    parser.add_argument("--two-pass", action="store_true", help="Normalização em duas passadas")
+    parser.add_argument(
+        "--gain-only", action="store_true",
+        help="Normaliza só com ganho fixo, medido pelo analisador EBU R128 (requer NumPy)"
+    )
+    parser.add_argument("--target-lufs", type=float, default=-14.0)
+    parser.add_argument("--max-items", type=int, default=1, help="Itens de playlist simultâneos por job")
+    parser.add_argument("--max-fragments", type=int, default=1, help="Fragmentos simultâneos por item (DASH/HLS)")
+    parser.add_argument(
+        "--max-connections", type=int, default=None,
+        help="Limite de conexões somando todos os jobs, itens e fragmentos"
+    )
+    parser.add_argument(
+        "--adaptive", action="store_true",
+        help="Ajusta itens e fragmentos simultâneos pela vazão medida (até --max-items e --max-fragments)"
+    )
+    parser.add_argument("--normalize-workers", type=int, default=None)
+    parser.add_argument(
+        "--no-dedupe", dest="dedupe", action="store_false",
+        help="Baixa de novo itens que já existem em outra playlist (em vez de criar um link)"
+    )
+    parser.add_argument(
+        "--on-cancel", choices=("keep", "discard"), default="keep",
+        help="O que fazer com o item em andamento ao cancelar uma playlist"
+    )
+    parser.add_argument("--results", help="Arquivo JSON lines com o resultado de cada job (padrão: saída padrão)")
+    parser.add_argument("--metrics-dir", help="Pasta para o resumo de tempos de cada job (<job>.json)")
+    parser.add_argument("--metrics-file", help="Arquivo de métricas no formato Prometheus (atualizado a cada job)")
+    parser.add_argument("--metrics-port", type=int, help="Expõe as métricas Prometheus em http://127.0.0.1:PORTA/metrics")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostra o log dos jobs na saída de erro")
+    return parser.parse_args(argv)
+
+
+def read_urls(args):
+    urls = list(args.urls)
+
+    if args.input:
+        stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    return urls
+
+
+class BatchRunner:
+    """
+    Executa vários Downloader em paralelo e grava o resultado de cada um em JSON lines.
+    """
+
+    def __init__(self, args, results_stream):
+        self.args = args
+        self.results_stream = results_stream
+        self.interrupted = False
+        self.connection_budget = ConnectionBudget(args.max_connections) if args.max_connections else None
+        self._downloaders = []
+        self._lock = threading.Lock()
+
+    def run(self, urls):
+        with ThreadPoolExecutor(max_workers=max(1, self.args.jobs), thread_name_prefix="job") as pool:
+            results = list(pool.map(self.run_job, range(1, len(urls) + 1), urls))
+        return results
+
+    def cancel_all(self):
+        self.interrupted = True
+        with self._lock:
+            downloaders = list(self._downloaders)
+        for downloader in downloaders:
+            downloader.cancel()
+
+    def run_job(self, job_id, url):
+        if self.interrupted:
+            return self._write_result({"job": job_id, "url": url, "status": "cancelled", "errors": [], "files": []})
+
+        files = []
+        started = time.time()
+
+        def log(text):
+            if self.args.verbose:
+                print(f"[job {job_id}] {text}", file=sys.stderr, flush=True)
+
+        downloader = Downloader(
+            url=url,
+            output_path=self.args.output,
+            audio_format=self.args.audio_format,
+            quality=self.args.quality,
+            allow_playlist=self.args.playlist,
+            keep_original_file=self.args.keep_original,
+            normalize_enabled=self.args.normalize,
+            file_finished_hook=files.append,
+            log_hook=log,
+            state_file=os.path.join(self.args.output, f".download_state.job{job_id}.json"),
+            max_concurrent_items=self.args.max_items,
+            max_fragment_downloads=self.args.max_fragments,
+            connection_budget=self.connection_budget,
+            adaptive_concurrency=self.args.adaptive,
+            normalize_workers=self.args.normalize_workers,
+            two_pass_normalize=self.args.two_pass,
+            gain_only_normalize=self.args.gain_only,
+            target_lufs=self.args.target_lufs,
+            cancel_policy=self.args.on_cancel,
+            quiet=True,
+            metrics_dir=self.args.metrics_dir,
+            dedupe=self.args.dedupe,
+        )
+
+        with self._lock:
+            self._downloaders.append(downloader)
+        try:
+            downloader.start()
+        finally:
+            with self._lock:
+                self._downloaders.remove(downloader)
+
+        # Mesma precedência da fila (JobScheduler): cancelado, com falha, concluído
+        status = {"done": "ok"}.get(downloader.outcome, downloader.outcome)
+
+        if self.args.metrics_file:
+            with self._lock:
+                registry.write(self.args.metrics_file)
+
+        summary = downloader.metrics.summary(items=False)
+        return self._write_result({
+            "job": job_id,
+            "url": url,
+            "status": status,
+            "errors": downloader.errors,
+            # file_finished_hook também informa intermediários; só os que ficaram interessam
+            "files": sorted(path for path in set(files) if os.path.exists(path)),
+            "elapsed": round(time.time() - started, 3),
+            "concurrency": downloader.concurrency.snapshot(),
+            "stages": summary["stages"],
+            "counters": summary["counters"],
+        })
+
+    def _write_result(self, result):
+        with self._lock:
+            self.results_stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self.results_stream.flush()
+        return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    urls = read_urls(args)
+
+    if not urls:
+        print("Nenhuma URL informada", file=sys.stderr)
+        return EXIT_USAGE
+
+    os.makedirs(args.output, exist_ok=True)
+    results_stream = open(args.results, "a", encoding="utf-8") if args.results else sys.stdout
+
+    runner = BatchRunner(args, results_stream)
+    if args.metrics_port:
+        registry.serve(args.metrics_port)
+
+    def on_interrupt(signum, frame):
+        if runner.interrupted:
+            # Segundo Ctrl+C: encerra sem esperar
+            os._exit(EXIT_INTERRUPTED)
+        print("Cancelando jobs... (Ctrl+C de novo para sair imediatamente)", file=sys.stderr)
+        runner.cancel_all()
+
+    signal.signal(signal.SIGINT, on_interrupt)
+
+    try:
+        results = runner.run(urls)
+    finally:
+        if results_stream is not sys.stdout:
+            results_stream.close()
+        close_sessions()
+        wait_all(CLEANUP_WAIT)
+
+    if runner.interrupted or any(result["status"] == "cancelled" for result in results):
+        return EXIT_INTERRUPTED
+    if any(result["status"] != "ok" for result in results):
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
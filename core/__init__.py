@@ -1,4 +1,21 @@
 # core/__init__.py
 
-from .downloader import Downloader
-from .audio import Audio
+import importlib
+
+# Carregados sob demanda: importar "core" não deve atrasar a abertura da janela
+_LAZY_ATTRS = {
+    "Downloader": ".downloader",
+    "Audio": ".audio",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,181 @@
+# core/archive.py
+
+import argparse
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+
+ARCHIVE_FILENAME = ".download_archive.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    video_id      TEXT NOT NULL,
+    audio_format  TEXT NOT NULL,
+    quality       TEXT NOT NULL,
+    normalization TEXT NOT NULL,
+    directory     TEXT NOT NULL,
+    final_path    TEXT NOT NULL,
+    size          INTEGER,
+    mtime         REAL,
+    updated_at    REAL,
+    PRIMARY KEY (video_id, audio_format, quality, normalization, directory)
+)
+"""
+
+COLUMNS = ("video_id", "audio_format", "quality", "normalization", "directory", "final_path", "size", "mtime")
+
+# ioctl do Linux que clona um arquivo (reflink) em btrfs/xfs: cópia instantânea sem dividir o conteúdo
+FICLONE = 0x40049409
+
+
+def _reflink(source, destination):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflink indisponível nesta plataforma")
+
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def link_or_copy(source, destination):
+    """
+    Coloca source em destination sem baixar de novo: hardlink (mesmo disco),
+    reflink (sistemas de arquivos com cópia sob demanda) ou cópia comum.
+    O arquivo só aparece no destino quando completo. Retorna o método usado.
+    """
+    tmp_path = destination + ".link"
+    attempts = (
+        ("hardlink", os.link),
+        ("reflink", _reflink),
+        ("copy", shutil.copy2),
+    )
+
+    for method, function in attempts:
+        try:
+            function(source, tmp_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if method == "copy":
+                raise
+            continue
+        os.replace(tmp_path, destination)
+        return method
+
+
+class DownloadArchive:
+    """
+    Índice (SQLite) dos arquivos finais já gerados na pasta de saída.
+    Chave: ID do vídeo + formato + qualidade + normalização + pasta de destino.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def lookup(self, video_id, audio_format, quality, normalization, directory):
+        """
+        Retorna o registro (dict) do item ou None. Consulta pela chave primária.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM items "
+                "WHERE video_id = ? AND audio_format = ? AND quality = ? AND normalization = ? AND directory = ?",
+                (video_id, audio_format, str(quality), normalization, os.path.abspath(directory))
+            ).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def copies(self, video_id, audio_format, quality, normalization):
+        """
+        Registros do mesmo item com as mesmas configurações em qualquer pasta
+        (mais recentes primeiro): o arquivo pode ser reaproveitado em outra playlist.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM items "
+                "WHERE video_id = ? AND audio_format = ? AND quality = ? AND normalization = ? "
+                "ORDER BY updated_at DESC",
+                (video_id, audio_format, str(quality), normalization)
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def record(self, video_id, audio_format, quality, normalization, final_path):
+        final_path = os.path.abspath(final_path)
+        stat = os.stat(final_path)
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO items "
+                f"({', '.join(COLUMNS)}, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    video_id, audio_format, str(quality), normalization,
+                    os.path.dirname(final_path), final_path,
+                    stat.st_size, stat.st_mtime, time.time()
+                )
+            )
+            conn.commit()
+
+    def remove(self, video_id, audio_format, quality, normalization, directory):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM items "
+                "WHERE video_id = ? AND audio_format = ? AND quality = ? AND normalization = ? AND directory = ?",
+                (video_id, audio_format, str(quality), normalization, os.path.abspath(directory))
+            )
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main(argv=None):
+    """
+    Reconstrói o índice de uma biblioteca existente:
+    python -m core.archive URL PASTA --format mp3 --quality 192 [--playlist] [--normalize]
+    """
+    parser = argparse.ArgumentParser(prog="python -m core.archive", description="Indexa arquivos já baixados")
+    parser.add_argument("url")
+    parser.add_argument("output_path")
+    parser.add_argument("--format", dest="audio_format", default="mp3")
+    parser.add_argument("--quality", default="192")
+    parser.add_argument("--playlist", action="store_true")
+    parser.add_argument("--normalize", action="store_true")
+    args = parser.parse_args(argv)
+
+    from core.downloader import Downloader
+
+    downloader = Downloader(
+        url=args.url,
+        output_path=args.output_path,
+        audio_format=args.audio_format,
+        quality=args.quality,
+        allow_playlist=args.playlist,
+        keep_original_file=False,
+        normalize_enabled=args.normalize,
+        log_hook=print,
+    )
+    indexed = downloader.rebuild_archive()
+    print(f"[ARCHIVE] {indexed} arquivo(s) indexado(s)")
+
+
+if __name__ == "__main__":
+    main()
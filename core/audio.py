@@ -1,11 +1,227 @@
 # core/audio.py
 
+import math
 import os
 import subprocess
+import threading
 
-from pydub import AudioSegment
-from pydub.effects import normalize
-from pydub.exceptions import CouldntDecodeError
+from concurrent.futures import ThreadPoolExecutor
+
+from core.cache import file_hash
+from core.ffmpeg import (
+    EncodePlan,
+    gain_for_target,
+    loudness_on_target,
+    loudnorm_filter,
+    parse_ffmpeg_info,
+    parse_loudnorm_stats,
+    parse_probe,
+    plan_encode,
+    probe_command,
+    transcode_command,
+    volume_filter,
+)
+from utils import get_ffmpeg_executable
+
+# Análise de loudness EBU R128 (ITU-R BS.1770-4) em NumPy, sobre PCM decodificado pelo ffmpeg
+ANALYSIS_SAMPLE_RATE = 48000
+SEGMENT_FRAMES = ANALYSIS_SAMPLE_RATE // 10  # passo de 100 ms dos blocos
+ANALYSIS_CHUNK_FRAMES = SEGMENT_FRAMES * 24  # quadros lidos do ffmpeg por vez (cabe numa FFT de 2^17)
+MOMENTARY_SEGMENTS = 4                       # blocos de 400 ms (loudness integrado)
+SHORT_TERM_SEGMENTS = 30                     # blocos de 3 s (faixa de loudness)
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+LRA_RELATIVE_GATE = -20.0
+LRA_PERCENTILES = (10, 95)
+
+# Filtro K (pré-filtro shelving + passa-altas RLB) a 48 kHz: (b, a) de cada biquad
+K_WEIGHTING = (
+    ((1.53512485958697, -2.69169618940638, 1.19839281085285), (1.0, -1.69065929318241, 0.73248077421585)),
+    ((1.0, -2.0, 1.0), (1.0, -1.99004745483398, 0.99007225036621)),
+)
+# Resposta ao impulso truncada do filtro K (a cauda abaixo disso é < 1e-17)
+K_WEIGHTING_TAPS = 1 << 13
+
+# Peso de cada canal na soma (5.1: L, R, C, LFE, Ls, Rs); outros layouts viram estéreo
+CHANNEL_WEIGHTS = {1: (1.0,), 2: (1.0, 1.0), 6: (1.0, 1.0, 1.0, 0.0, 1.41, 1.41)}
+
+# Pico real: interpolação 4x com filtros de atraso fracionário (sinc janelado)
+TRUE_PEAK_OVERSAMPLING = 4
+TRUE_PEAK_TAPS = 12
+
+# NumPy só é importado na primeira análise
+np = None
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def load_numpy():
+    """Importa o NumPy sob demanda e devolve o módulo."""
+    global np
+    if np is None:
+        try:
+            import numpy as module
+        except ImportError:
+            raise RuntimeError("NumPy não está instalado (necessário para a análise de loudness)")
+        np = module
+    return np
+
+
+def _k_weighting_response():
+    """
+    Resposta ao impulso do filtro K, usada na filtragem por blocos (FFT overlap-add):
+    a recursão do IIR é feita uma única vez aqui, não a cada amostra do áudio.
+    """
+    with _filters_lock:
+        if "k" not in _filters:
+            response = [1.0] + [0.0] * (K_WEIGHTING_TAPS - 1)
+            for b, a in K_WEIGHTING:
+                x1 = x2 = y1 = y2 = 0.0
+                filtered = []
+                for x in response:
+                    y = b[0] * x + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+                    x2, x1, y2, y1 = x1, x, y1, y
+                    filtered.append(y)
+                response = filtered
+            _filters["k"] = np.array(response)
+        return _filters["k"]
+
+
+def _k_weighting_spectrum(size):
+    with _filters_lock:
+        spectrum = _filters.get(size)
+    if spectrum is None:
+        spectrum = np.fft.rfft(_k_weighting_response(), size)
+        with _filters_lock:
+            _filters[size] = spectrum
+    return spectrum
+
+
+def _true_peak_filters():
+    """
+    Coeficientes (TRUE_PEAK_TAPS x fases) que interpolam as amostras intermediárias
+    x[n + p/4] a partir de x[n-5] ... x[n+6].
+    """
+    with _filters_lock:
+        if "tp" not in _filters:
+            half = TRUE_PEAK_TAPS // 2
+            offsets = np.arange(-half + 1, half + 1)
+            phases = []
+            for phase in range(1, TRUE_PEAK_OVERSAMPLING):
+                t = phase / TRUE_PEAK_OVERSAMPLING - offsets
+                window = np.i0(5.0 * np.sqrt(np.clip(1 - (t / half) ** 2, 0, None))) / np.i0(5.0)
+                coefficients = np.sinc(t) * window
+                phases.append(coefficients / coefficients.sum())
+            _filters["tp"] = np.stack(phases, axis=1).astype(np.float32)
+        return _filters["tp"]
+
+
+def _gated_mean(energies, relative_gate):
+    """
+    Energia média dos blocos acima do gate absoluto e do gate relativo
+    (relative_gate LU abaixo da média dos que passaram no absoluto).
+    Retorna (energias que passaram nos dois gates, limiar relativo em LUFS).
+    """
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(energies)
+    absolute = energies[loudness > ABSOLUTE_GATE]
+    if not absolute.size:
+        return absolute, ABSOLUTE_GATE
+
+    threshold = -0.691 + 10 * math.log10(absolute.mean()) + relative_gate
+    return energies[(loudness > ABSOLUTE_GATE) & (loudness > threshold)], threshold
+
+
+def _block_energies(segments, length):
+    """Energia média dos blocos de length segmentos de 100 ms (passo de um segmento)."""
+    if len(segments) < length:
+        return segments[:0]
+    cumulative = np.concatenate(([0.0], np.cumsum(segments)))
+    return (cumulative[length:] - cumulative[:-length]) / length
+
+
+class LoudnessAnalyzer:
+    """
+    Loudness integrado, faixa de loudness (LRA) e pico real (EBU R128) de PCM
+    float a 48 kHz recebido em blocos (quadros x canais). O filtro K é aplicado
+    por convolução FFT com a resposta ao impulso, os blocos de 400 ms e de 3 s
+    saem das energias de segmentos de 100 ms e o pico real, de uma
+    interpolação 4x vetorizada.
+    """
+
+    def __init__(self, channels: int):
+        load_numpy()
+        self.channels = channels
+        self.weights = np.array(CHANNEL_WEIGHTS.get(channels, (1.0,) * channels))
+        self._filter_tail = np.zeros((K_WEIGHTING_TAPS - 1, channels))
+        self._peak_tail = np.zeros((TRUE_PEAK_TAPS - 1, channels), dtype=np.float32)
+        self._pending = np.zeros((0, channels))
+        self._segments = []
+        self._peak = 0.0
+
+    def feed(self, samples):
+        if not len(samples):
+            return
+        self._true_peak(samples)
+        samples = samples.astype(np.float64, copy=False)
+
+        # Filtro K por overlap-add: a cauda da convolução passa para o bloco seguinte
+        frames = len(samples)
+        size = 1 << (frames + K_WEIGHTING_TAPS - 2).bit_length()
+        spectrum = np.fft.rfft(samples, size, axis=0) * _k_weighting_spectrum(size)[:, None]
+        filtered = np.fft.irfft(spectrum, size, axis=0)[:frames + K_WEIGHTING_TAPS - 1]
+        filtered[:K_WEIGHTING_TAPS - 1] += self._filter_tail
+        self._filter_tail = filtered[frames:].copy()
+        filtered = np.concatenate((self._pending, filtered[:frames]))
+
+        # Energia de cada segmento de 100 ms completo, ponderada pelos canais
+        complete = len(filtered) // SEGMENT_FRAMES * SEGMENT_FRAMES
+        self._pending = filtered[complete:]
+        if complete:
+            squares = filtered[:complete].reshape(-1, SEGMENT_FRAMES, self.channels) ** 2
+            self._segments.append(squares.mean(axis=1) @ self.weights)
+
+    def _true_peak(self, samples):
+        samples = samples.astype(np.float32, copy=False)
+        self._peak = max(self._peak, float(np.abs(samples).max()))
+        extended = np.concatenate((self._peak_tail, samples))
+        self._peak_tail = extended[-(TRUE_PEAK_TAPS - 1):]
+
+        # Cada fase é uma soma de fatias deslocadas (mais rápido que janelas deslizantes)
+        frames = len(samples)
+        filters = _true_peak_filters()
+        for phase in range(filters.shape[1]):
+            interpolated = extended[:frames] * filters[0, phase]
+            for tap in range(1, TRUE_PEAK_TAPS):
+                interpolated += extended[tap:tap + frames] * filters[tap, phase]
+            self._peak = max(self._peak, float(np.abs(interpolated).max()))
+
+    def result(self) -> dict:
+        """
+        Medições no formato do loudnorm (input_i, input_tp, input_lra, input_thresh),
+        intercambiáveis com Audio.measure_loudness.
+        """
+        # Amostras finais ainda não interpoladas
+        self._true_peak(np.zeros((TRUE_PEAK_TAPS // 2, self.channels)))
+
+        segments = np.concatenate(self._segments) if self._segments else np.zeros(0)
+        gated, threshold = _gated_mean(_block_energies(segments, MOMENTARY_SEGMENTS), RELATIVE_GATE)
+        integrated = -0.691 + 10 * math.log10(gated.mean()) if gated.size else -math.inf
+
+        short_term, _ = _gated_mean(_block_energies(segments, SHORT_TERM_SEGMENTS), LRA_RELATIVE_GATE)
+        loudness_range = 0.0
+        if short_term.size:
+            low, high = np.percentile(-0.691 + 10 * np.log10(short_term), LRA_PERCENTILES)
+            loudness_range = float(high - low)
+
+        true_peak = 20 * math.log10(self._peak) if self._peak > 0 else -math.inf
+        return {
+            "input_i": round(integrated, 2),
+            "input_tp": round(true_peak, 2),
+            "input_lra": round(loudness_range, 2),
+            "input_thresh": round(threshold, 2),
+            "target_offset": 0.0,
+        }
 
 
 class Audio:
@@ -15,30 +231,196 @@ class Audio:
             raise ValueError(f"Arquivo inválido: {file_path}")
 
         self.file_path = file_path
+        self._probe = None
+
+    def probe(self) -> dict:
+        """
+        Codec, bitrate (kbps), taxa de amostragem e canais do áudio (ffprobe;
+        sem ele, a saída de "ffmpeg -i").
+        """
+        if self._probe is None:
+            try:
+                result = subprocess.run(
+                    probe_command(self.file_path), check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                )
+                self._probe = parse_probe(result.stdout.decode(errors="replace"))
+
+            except FileNotFoundError:
+                # "ffmpeg -i" sem saída sempre termina com erro; só a descrição da entrada interessa
+                result = subprocess.run(
+                    [get_ffmpeg_executable(), "-hide_banner", "-nostdin", "-i", self.file_path],
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                )
+                self._probe = parse_ffmpeg_info(result.stderr.decode(errors="replace"))
+
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"Erro ao analisar áudio: {e.stderr.decode() if e.stderr else str(e)}")
+
+            except ValueError as e:
+                raise RuntimeError(f"Erro ao ler a saída do ffprobe: {e}")
+
+        return self._probe
+
+    def plan(self, audio_format: str, quality: str = None, target_lufs: float = None, measured: dict = None) -> EncodePlan:
+        """
+        Planeja a conversão para audio_format: cópia do stream quando a fonte já está
+        no codec e na faixa de bitrate pedidos e, com normalização, quando as medições
+        (measured) já estão no alvo; caso contrário, recodificação.
+        """
+        if target_lufs is not None:
+            if measured is None:
+                return EncodePlan("encode", "normalização em uma passada")
+            if not loudness_on_target(measured, target_lufs):
+                return EncodePlan("encode", f"loudness {measured['input_i']:.1f} LUFS")
+
+        try:
+            return plan_encode(self.probe(), audio_format, quality)
+        except RuntimeError as e:
+            return EncodePlan("encode", str(e))
+
+    def analyze_loudness(self, target_lufs: float = -14.0, cache=None, threads: int = 1) -> dict:
+        """
+        Mede loudness integrado, LRA e pico real com o LoudnessAnalyzer (NumPy):
+        o ffmpeg só decodifica para PCM float, em blocos por um pipe.
+        Retorna o mesmo dicionário de measure_loudness.
+        cache: LoudnessCache opcional (mesmas chaves de measure_loudness).
+        """
+        content_hash = None
+        if cache is not None:
+            content_hash = file_hash(self.file_path)
+            measured = cache.get(content_hash, target_lufs)
+            if measured:
+                return measured
+
+        channels = self.probe().get("channels") or 2
+        if channels not in CHANNEL_WEIGHTS:
+            channels = 2
+        analyzer = LoudnessAnalyzer(channels)
+
+        cmd = [
+            get_ffmpeg_executable(),
+            "-hide_banner",
+            "-nostdin",
+            "-v", "error",
+            "-threads", str(threads),
+            "-i", self.file_path,
+            "-map", "0:a:0",
+            "-ac", str(channels),
+            "-ar", str(ANALYSIS_SAMPLE_RATE),
+            "-f", "f32le",
+            "-c:a", "pcm_f32le",
+            "-"
+        ]
+
+        chunk_bytes = ANALYSIS_CHUNK_FRAMES * channels * 4
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # stderr lido em paralelo: o ffmpeg não pode travar com o pipe de erro cheio
+        errors = []
+        reader = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+        reader.start()
+        try:
+            while True:
+                data = process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                usable = len(data) - len(data) % (channels * 4)
+                analyzer.feed(np.frombuffer(data[:usable], dtype="<f4").reshape(-1, channels))
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+            reader.join()
+
+        if returncode != 0:
+            raise RuntimeError(f"Erro ao decodificar áudio: {b''.join(errors).decode(errors='replace')}")
 
-    def normalize(self, target_lufs: float = -14.0):
+        measured = analyzer.result()
+        if cache is not None:
+            cache.put(content_hash, target_lufs, measured)
+
+        return measured
+
+    def measure_loudness(self, target_lufs: float = -14.0, cache=None) -> dict:
+        """
+        Primeira passada do loudnorm: mede input_i, input_tp, input_lra e input_thresh.
+        cache: LoudnessCache opcional; evita decodificar de novo o mesmo conteúdo.
+        """
+        content_hash = None
+        if cache is not None:
+            content_hash = file_hash(self.file_path)
+            measured = cache.get(content_hash, target_lufs)
+            if measured:
+                return measured
+
+        cmd = [
+            get_ffmpeg_executable(),
+            "-hide_banner",
+            "-nostdin",
+            "-i", self.file_path,
+            "-af", loudnorm_filter(target_lufs, print_stats=True),
+            "-f", "null", "-"
+        ]
+
+        try:
+            result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            measured = parse_loudnorm_stats(result.stderr.decode(errors="replace"))
+
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Erro ao medir loudness: {e.stderr.decode() if e.stderr else str(e)}")
+
+        except ValueError as e:
+            raise RuntimeError(f"Erro ao ler medições do loudnorm: {e}")
+
+        if cache is not None:
+            cache.put(content_hash, target_lufs, measured)
+
+        return measured
+
+    def normalize(
+        self,
+        target_lufs: float = -14.0,
+        two_pass: bool = False,
+        cache=None,
+        quality: str = None,
+        threads: int = 1,
+        gain_only: bool = False
+    ) -> EncodePlan:
         """
         Normaliza o áudio para LUFS usando ffmpeg.
         target_lufs: valor desejado em LUFS (recomendado -14.0 para streaming)
+        two_pass: mede primeiro e aplica ganho linear (loudnorm em duas passadas)
+        cache: LoudnessCache opcional com as medições da primeira passada
+        quality: bitrate (kbps) usado ao recodificar no mesmo formato do arquivo
+        threads: threads do ffmpeg
+        gain_only: mede com analyze_loudness e aplica só um ganho fixo (sem loudnorm)
+        Retorna o plano usado; "copy" significa que o arquivo já estava no alvo e não foi alterado.
         """
-        print("NORMALIZANDO AUDIO EXECUTADO............................")
         try:
-            # arquivo temporário para saída
-            tmp_file = self.file_path + ".normalized.tmp.wav"
+            if gain_only:
+                measured = self.analyze_loudness(target_lufs, cache=cache, threads=threads)
+            else:
+                measured = self.measure_loudness(target_lufs, cache=cache) if two_pass else None
+            if measured and loudness_on_target(measured, target_lufs):
+                return EncodePlan("copy", f"loudness {measured['input_i']:.1f} LUFS")
+
+            # arquivo temporário para saída, no mesmo formato do original
+            base, ext = os.path.splitext(self.file_path)
+            tmp_file = base + ".normalized.tmp" + ext
 
             # Comando ffmpeg para normalização LUFS
-            cmd = [
-                "ffmpeg",
-                "-y",  # sobrescrever sem perguntar
-                "-i", self.file_path,
-                "-af", f"loudnorm=I={target_lufs}:TP=-1.5:LRA=11",
-                tmp_file
-            ]
+            cmd = transcode_command(
+                self.file_path,
+                tmp_file,
+                ext.lstrip("."),
+                quality,
+                audio_filter=self._normalize_filter(target_lufs, measured, gain_only),
+                threads=threads
+            )
 
             subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
             # Substitui o arquivo original pelo normalizado
             os.replace(tmp_file, self.file_path)
+            return EncodePlan("encode", "ganho" if gain_only else "loudnorm")
 
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Erro ao normalizar áudio: {e.stderr.decode() if e.stderr else str(e)}")
@@ -46,3 +428,76 @@ class Audio:
         except Exception as e:
             raise RuntimeError(f"Erro inesperado ao normalizar áudio: {e}")
 
+    def transcode(
+        self,
+        output_path: str,
+        audio_format: str,
+        quality: str = None,
+        target_lufs: float = None,
+        two_pass: bool = False,
+        cache=None,
+        threads: int = 1,
+        gain_only: bool = False
+    ) -> EncodePlan:
+        """
+        Extrai, normaliza (se target_lufs for informado) e codifica no formato final
+        em uma única execução do ffmpeg. Quando o plano permite, só copia o stream
+        de áudio para o novo contêiner. Retorna o plano usado.
+        gain_only: mede com analyze_loudness e aplica só um ganho fixo (sem loudnorm)
+        """
+        try:
+            measured = None
+            if target_lufs is not None and gain_only:
+                measured = self.analyze_loudness(target_lufs, cache=cache, threads=threads)
+            elif target_lufs is not None and two_pass:
+                measured = self.measure_loudness(target_lufs, cache=cache)
+
+            plan = self.plan(audio_format, quality, target_lufs, measured)
+            audio_filter = None
+            if target_lufs is not None and not plan.copy:
+                audio_filter = self._normalize_filter(target_lufs, measured, gain_only)
+
+            base, ext = os.path.splitext(output_path)
+            tmp_file = base + ".tmp" + ext
+
+            cmd = transcode_command(
+                self.file_path, tmp_file, audio_format, quality, audio_filter, copy=plan.copy, threads=threads
+            )
+            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+            os.replace(tmp_file, output_path)
+            return plan
+
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Erro ao converter áudio: {e.stderr.decode() if e.stderr else str(e)}")
+
+        except Exception as e:
+            raise RuntimeError(f"Erro inesperado ao converter áudio: {e}")
+
+    @staticmethod
+    def _normalize_filter(target_lufs, measured, gain_only):
+        if gain_only:
+            return volume_filter(gain_for_target(measured, target_lufs))
+        return loudnorm_filter(target_lufs, measured)
+
+
+def analyze_files(paths, workers: int = None, threads: int = 1, cache=None, target_lufs: float = -14.0) -> dict:
+    """
+    Analisa vários arquivos ao mesmo tempo (o NumPy libera o GIL nas FFTs e a
+    decodificação roda em processos ffmpeg separados).
+    cache: LoudnessCache opcional compartilhado pelas análises.
+    Retorna {caminho: medições ou RuntimeError}.
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+
+    def analyze(path):
+        try:
+            return Audio(path).analyze_loudness(target_lufs, cache=cache, threads=threads)
+        except (RuntimeError, ValueError) as e:
+            return e if isinstance(e, RuntimeError) else RuntimeError(str(e))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loudness") as pool:
+        return dict(zip(paths, pool.map(analyze, paths)))
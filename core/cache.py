@@ -0,0 +1,130 @@
+# core/cache.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+
+def file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula o hash do conteúdo do arquivo (blake2b), lendo em blocos.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LoudnessCache:
+    """
+    Cache em disco das medições de loudness (primeira passada), um arquivo JSON
+    por hash do conteúdo. As medições de entrada (input_i, input_tp, input_lra,
+    input_thresh) não dependem do alvo e valem para qualquer um; só o
+    target_offset do loudnorm é guardado por alvo (0.0 para um alvo ainda não medido).
+    Vários jobs podem gravar na mesma pasta: cada gravação usa um arquivo
+    temporário próprio, junta o que já está no disco e falhas de escrita são ignoradas.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"{content_hash}.json")
+
+    @staticmethod
+    def _target(target_lufs: float) -> str:
+        return str(float(target_lufs))
+
+    def _read(self, content_hash: str):
+        try:
+            with open(self._path(content_hash), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("measured"), dict):
+            return None
+        return entry
+
+    def get(self, content_hash: str, target_lufs: float):
+        entry = self._read(content_hash)
+        if entry is None:
+            return None
+        offsets = entry.get("target_offsets") or {}
+        return dict(entry["measured"], target_offset=offsets.get(self._target(target_lufs), 0.0))
+
+    def put(self, content_hash: str, target_lufs: float, measured: dict):
+        measured = dict(measured)
+        offset = measured.pop("target_offset", 0.0)
+
+        with self._lock:
+            entry = self._read(content_hash) or {}
+            offsets = dict(entry.get("target_offsets") or {})
+            offsets[self._target(target_lufs)] = offset
+
+            path = self._path(content_hash)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"measured": measured, "target_offsets": offsets}, f)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError):
+                # Sem cache a medição só é refeita da próxima vez; a normalização segue
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+class ExtractionCache:
+    """
+    Cache em disco dos metadados extraídos pelo yt-dlp, um arquivo JSON por ID de vídeo.
+    As URLs de mídia expiram, então cada entrada vale por ttl segundos.
+    """
+
+    def __init__(self, directory: str, ttl: float = 3 * 60 * 60):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, video_id: str) -> str:
+        safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", str(video_id))
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def get(self, video_id: str):
+        if not video_id or not self.ttl:
+            return None
+
+        path = self._path(video_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, video_id: str, info: dict):
+        if not video_id or not self.ttl:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(video_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def invalidate(self, video_id: str):
+        if not video_id:
+            return
+        try:
+            os.remove(self._path(video_id))
+        except OSError:
+            pass
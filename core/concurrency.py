@@ -0,0 +1,241 @@
+# core/concurrency.py
+
+import re
+import threading
+import time
+
+# Mensagens de erro que indicam limitação do lado do servidor
+THROTTLING_RE = re.compile(r"\b429\b|too many requests|rate.?limit|not a bot", re.IGNORECASE)
+
+
+def is_throttling_error(error) -> bool:
+    return bool(error) and bool(THROTTLING_RE.search(str(error)))
+
+
+class AdaptiveConcurrency:
+    """
+    Ajusta o número de conexões simultâneas de um job pela vazão medida.
+    O nível é o total de conexões: primeiro sobem os itens (até max_items) e,
+    com todos em uso, os fragmentos por item (até max_fragments), de um item
+    por vez; cada passo muda de fato itens × fragmentos. A cada intervalo a vazão agregada é comparada com a do
+    nível anterior: sobe um nível enquanto houver ganho, volta um nível quando
+    não houver (e espera alguns intervalos antes de testar de novo) e corta pela
+    metade quando o servidor limita (HTTP 429), sem subir durante o cooldown.
+    """
+
+    def __init__(
+        self,
+        max_items=1,
+        max_fragments=1,
+        initial=1,
+        interval=5.0,
+        gain=0.10,
+        hold_intervals=6,
+        cooldown=60.0,
+        on_change=None,
+    ):
+        self.max_items = max(1, int(max_items))
+        self.max_fragments = max(1, int(max_fragments))
+        self.maximum = self.max_items * self.max_fragments
+        # Níveis possíveis: 1..max_items itens com um fragmento, depois múltiplos de max_items
+        self.levels = list(range(1, self.max_items + 1)) + [
+            self.max_items * fragments for fragments in range(2, self.max_fragments + 1)
+        ]
+        self.interval = interval
+        self.gain = gain
+        self.hold_intervals = hold_intervals
+        self.cooldown = cooldown
+        self.on_change = on_change
+
+        self.level = self._valid_level(int(initial))
+        self.peak_level = self.level
+        self.throughput = 0.0
+        self.throttle_events = 0
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._saturated = False
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._previous_throughput = None
+        self._last_action = None
+        self._hold = 0
+        self._cooldown_until = 0.0
+        self._last_throttle = None
+
+    # =========================
+    # Divisão do nível
+    # =========================
+    @property
+    def item_limit(self) -> int:
+        return min(self.level, self.max_items)
+
+    @property
+    def fragment_limit(self) -> int:
+        return max(1, min(self.level // self.item_limit, self.max_fragments))
+
+    def _valid_level(self, level) -> int:
+        # Maior nível possível que não passa de level
+        return max([candidate for candidate in self.levels if candidate <= level] or [1])
+
+    def _next_level(self, level) -> int:
+        return min([candidate for candidate in self.levels if candidate > level] or [self.maximum])
+
+    def _previous_level(self, level) -> int:
+        return self._valid_level(level - 1)
+
+    # =========================
+    # Vagas de itens
+    # =========================
+    def acquire(self, timeout=None) -> bool:
+        """
+        Reserva a vaga de um item; bloqueia enquanto todas as vagas do nível atual
+        estão ocupadas. Retorna False se o prazo acabar.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._active < self.item_limit, timeout):
+                return False
+            self._active += 1
+            self._saturated = self._saturated or self._active >= self.item_limit
+            return True
+
+    def release(self):
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            self._cond.notify_all()
+
+    # =========================
+    # Medição e ajuste
+    # =========================
+    def record(self, nbytes: int):
+        """
+        Soma bytes recebidos (de qualquer thread) e reavalia o nível a cada intervalo.
+        """
+        if nbytes <= 0:
+            return
+
+        with self._cond:
+            self._window_bytes += nbytes
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < self.interval:
+                return
+
+            throughput = self._window_bytes / elapsed
+            saturated = self._saturated or self._active >= self.item_limit
+            self._window_start = now
+            self._window_bytes = 0
+            self._saturated = self._active >= self.item_limit
+            change = self._decide(throughput, saturated, now)
+
+        if change and self.on_change:
+            self.on_change(*change)
+
+    def _decide(self, throughput, saturated, now):
+        # Chamado com self._cond adquirido; retorna (anterior, novo, motivo) quando o nível muda
+        previous = self._previous_throughput
+        self._previous_throughput = throughput
+        self.throughput = throughput
+        level = self.level
+
+        if now < self._cooldown_until:
+            return None
+
+        if self._last_action == "increase" and previous is not None:
+            if throughput >= previous * (1 + self.gain):
+                reason = "vazão subiu"
+                new_level = self._next_level(level)
+            else:
+                # Sem ganho: volta ao nível anterior e espera antes de testar de novo
+                self._hold = self.hold_intervals
+                self._last_action = "hold"
+                return self._set_level(self._previous_level(level), "sem ganho de vazão")
+        elif self._hold > 0:
+            self._hold -= 1
+            return None
+        else:
+            reason = "testando mais conexões"
+            new_level = self._next_level(level)
+
+        # Só vale subir se as vagas atuais estão todas em uso
+        if not saturated and self.level <= self.max_items:
+            self._last_action = None
+            return None
+
+        self._last_action = "increase"
+        return self._set_level(new_level, reason)
+
+    def throttled(self):
+        """
+        Servidor limitou (HTTP 429): corta o nível pela metade e não sobe durante o cooldown.
+        """
+        with self._cond:
+            now = time.monotonic()
+            self.throttle_events += 1
+            if self._last_throttle is not None and now - self._last_throttle < self.interval:
+                # Vários erros da mesma rajada contam como um só corte
+                return
+            self._last_throttle = now
+            self._cooldown_until = now + self.cooldown
+            self._last_action = None
+            self._previous_throughput = None
+            change = self._set_level(self.level // 2, "servidor limitou (429)")
+
+        if change and self.on_change:
+            self.on_change(*change)
+
+    def _set_level(self, level, reason):
+        level = self._valid_level(min(level, self.maximum))
+        if level == self.level:
+            self._last_action = None
+            return None
+        previous, self.level = self.level, level
+        self.peak_level = max(self.peak_level, level)
+        self._cond.notify_all()
+        return previous, level, reason
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "level": self.level,
+                "items": self.item_limit,
+                "fragments": self.fragment_limit,
+                "peak_level": self.peak_level,
+                "throughput": round(self.throughput, 1),
+                "throttle_events": self.throttle_events,
+            }
+
+
+class ConnectionBudget:
+    """
+    Limite global de conexões simultâneas, compartilhado por todos os jobs.
+    Cada item reserva as conexões que vai usar (1, ou uma por fragmento em
+    downloads DASH/HLS); se não houver todas livres, recebe as que houver.
+    """
+
+    def __init__(self, total):
+        self.total = max(1, int(total))
+        self._cond = threading.Condition()
+        self._in_use = 0
+
+    def acquire(self, wanted, timeout=None) -> int:
+        """
+        Bloqueia até haver ao menos uma conexão livre e reserva até wanted.
+        Retorna quantas foram reservadas (0 se o prazo acabar).
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_use < self.total, timeout):
+                return 0
+            granted = min(max(1, int(wanted)), self.total - self._in_use)
+            self._in_use += granted
+            return granted
+
+    def release(self, count):
+        with self._cond:
+            self._in_use = max(0, self._in_use - count)
+            self._cond.notify_all()
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._in_use
@@ -1,22 +1,79 @@
 # core/downloader.py
+import contextlib
+import hashlib
 import time
 import os
-import yt_dlp
 import re
 import shutil
 import threading
 import json
+import sqlite3
 import unicodedata
 
-from tkinter import messagebox
-from utils import get_ffmpeg_path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from utils import get_ffmpeg_executable
+from core.archive import ARCHIVE_FILENAME, DownloadArchive, link_or_copy
 from core.audio import Audio
+from core.cache import ExtractionCache, LoudnessCache
+from core.concurrency import AdaptiveConcurrency, is_throttling_error
+from core.ffmpeg import default_threads
+from core.formats import has_fragmented_formats, select_format, urls_expired
+from core.janitor import janitor_for
+from core.journal import CheckpointJournal
+from core.metrics import JobMetrics
+from core.progress import ProgressTracker
+from core.registry import FileRegistry
+from core.session import session_pool
+
+# Arquivos de mídia baixados que o pipeline unificado converte
+SOURCE_MEDIA_EXTS = {".m4a", ".webm", ".opus", ".ogg", ".mp4", ".mkv", ".mp3", ".aac", ".flac", ".wav"}
 
 YTDLP_INTERMEDIATE_RE = re.compile(
     r"\.f\d+\.(webm|mp4|mkv|m4a|aac|opus)(\.part)?$",
     re.IGNORECASE
 )
 
+# Pós-processadores do yt-dlp que executam ffmpeg (contam no limite global de ffmpeg)
+FFMPEG_POSTPROCESSORS = {"ExtractAudio", "Merger"}
+
+# Campos da playlist repassados ao yt-dlp ao baixar cada item
+PLAYLIST_FIELDS = ("playlist_title", "playlist_id", "playlist_index", "playlist_count")
+
+# Campos do item guardados no diário (suficientes para retomar sem enumerar a playlist)
+JOURNAL_ENTRY_FIELDS = ("_type", "ie_key", "id", "url", "webpage_url", "title") + PLAYLIST_FIELDS
+
+# Intervalo mínimo (s) entre registros de progresso do mesmo item no diário
+JOURNAL_PROGRESS_INTERVAL = 5.0
+
+# Espera (s) antes de apagar arquivos cancelados, para o ffmpeg/yt-dlp liberá-los
+CANCELLED_FILES_DELAY = 2.0
+
+# O yt-dlp (e seu registro de extratores) é pesado: só é importado no primeiro
+# download ou pelo aquecimento em segundo plano da interface
+yt_dlp = None
+DownloadPaused = None
+
+
+def load_yt_dlp():
+    """
+    Importa o yt-dlp sob demanda e devolve o módulo.
+    Pode ser chamado de qualquer thread; o import do Python já é serializado.
+    """
+    global yt_dlp, DownloadPaused
+    if yt_dlp is None:
+        from yt_dlp.extractor import youtube  # noqa: F401 (usado via yt_dlp.extractor.youtube)
+        import yt_dlp as module
+
+        class DownloadPaused(module.utils.DownloadCancelled):
+            """
+            Levantada no hook de progresso ao pausar: interrompe a transferência
+            (o .part fica) e fecha a conexão; o item continua de onde parou.
+            """
+            msg = "Download pausado"
+
+        yt_dlp = module
+    return yt_dlp
+
 
 def sanitize_filename(name: str) -> str:
     if not name:
@@ -44,6 +101,25 @@ class Downloader:
         error_hook=None,
         log_hook=None,
         state_file=None,
+        max_concurrent_items=1,
+        normalize_workers=None,
+        two_pass_normalize=False,
+        gain_only_normalize=False,
+        target_lufs=-14.0,
+        extraction_cache_ttl=3 * 60 * 60,
+        fused_pipeline=True,
+        lazy_playlist=True,
+        progress_event_hook=None,
+        progress_rate_hz=10.0,
+        cancel_policy="keep",
+        quiet=False,
+        ffmpeg_slots=None,
+        rate_limiter=None,
+        connection_budget=None,
+        adaptive_concurrency=False,
+        max_fragment_downloads=1,
+        metrics_dir=None,
+        dedupe=True,
     ):
         self.url = url
         self.output_path = output_path
@@ -52,68 +128,150 @@ class Downloader:
         self.allow_playlist = allow_playlist
         self.keep_original_file = keep_original_file
         self.normalize_enabled = normalize_enabled
+        self.max_concurrent_items = max(1, int(max_concurrent_items or 1))
+        # Itens e fragmentos simultâneos: fixos nos máximos ou ajustados pela vazão medida
+        self.adaptive_concurrency = adaptive_concurrency
+        max_fragment_downloads = max(1, int(max_fragment_downloads or 1))
+        self.concurrency = AdaptiveConcurrency(
+            max_items=self.max_concurrent_items,
+            max_fragments=max_fragment_downloads,
+            initial=1 if adaptive_concurrency else self.max_concurrent_items * max_fragment_downloads,
+            on_change=self._on_concurrency_change,
+        )
+        self.normalize_workers = max(1, int(normalize_workers or os.cpu_count() or 1))
+        # Threads de cada processo ffmpeg, divididas entre os que rodam em paralelo
+        self.ffmpeg_threads = default_threads(max(self.normalize_workers, self.max_concurrent_items))
+        self.two_pass_normalize = two_pass_normalize
+        # Mede com o analisador EBU R128 em NumPy e aplica só um ganho fixo (sem loudnorm)
+        self.gain_only_normalize = gain_only_normalize
+        self.target_lufs = target_lufs
+        # Extração + normalização + codificação em uma única execução do ffmpeg
+        self.fused_pipeline = fused_pipeline
+        # Baixa os itens conforme a playlist é enumerada, sem esperar a lista completa
+        self.lazy_playlist = lazy_playlist
 
         self.progress_hook = progress_hook
         self.status_hook = status_hook
         self.file_finished_hook = file_finished_hook
         self.error_hook = error_hook
         self.log_hook = log_hook
-
-        self.ffmpeg_path = get_ffmpeg_path()
-        self.generated_files = set()
+        self.progress_event_hook = progress_event_hook
+        self.progress_rate_hz = progress_rate_hz
+        self.progress_tracker = ProgressTracker(progress_rate_hz)
+
+        # Ao cancelar uma playlist: "keep", "discard" ou função(arquivo) -> bool
+        if not callable(cancel_policy) and cancel_policy not in ("keep", "discard"):
+            raise ValueError(f"cancel_policy inválida: {cancel_policy}")
+        self.cancel_policy = cancel_policy
+        self.quiet = quiet
+        self.errors = []
+
+        # Limites compartilhados entre jobs (ver core.scheduler)
+        self.ffmpeg_slots = ffmpeg_slots
+        self.rate_limiter = rate_limiter
+        self.connection_budget = connection_budget
+        # Fragmentos simultâneos concedidos a cada item em andamento (ID do vídeo)
+        self._fragment_grants = {}
+        self._bytes_seen = {}
+        self._held_slots = threading.local()
+
+        # Pasta do ffmpeg empacotado (ou do PATH); None deixa o yt-dlp procurar
+        self.ffmpeg_path = os.path.dirname(get_ffmpeg_executable()) or None
+        # Arquivos de cada item (.part, intermediários, produzido), informados pelos hooks
+        self.files = FileRegistry()
         self.cancelled_files = set()
         self.files_to_normalize = []
         self.collected_files = []
         self.tmp_dir = None
+        # Identificador estável do job (mesma URL e opções => mesma chave, inclusive após reinício)
+        self.job_key = hashlib.sha1(
+            f"{url}|{audio_format}|{quality}|{allow_playlist}|{normalize_enabled}".encode("utf-8")
+        ).hexdigest()[:12]
         self.playlist_index = None
         self.playlist_count = None
         self.cancelled = False
         self.keep_after_cancel = False
         self.cancel_requested = False
         self.cancel_after_current = False
-        self.blocked_files = set()
-        self.cancelled_titles = set()
+        self.cache_dir = os.path.join(self.output_path, ".cache")
+        self.loudness_cache = LoudnessCache(os.path.join(self.cache_dir, "loudness"))
+        self.archive = DownloadArchive(os.path.join(self.output_path, ARCHIVE_FILENAME))
+        # Item já baixado em outra pasta (outra playlist): link em vez de novo download
+        self.dedupe = dedupe
+        self.extraction_cache = ExtractionCache(os.path.join(self.cache_dir, "extract"), ttl=extraction_cache_ttl)
+        # Diário de checkpoints por item: permite retomar cada item da etapa em que parou
+        self.journal = CheckpointJournal(os.path.join(self.cache_dir, "journal", f"{self.job_key}.jsonl"))
+        self._download_checkpoints = {}
+        self._journal_times = {}
+        # Remoções em segundo plano (compartilhado pelos jobs da mesma pasta de saída)
+        self.janitor = janitor_for(self.cache_dir)
+        # Tempo por etapa de cada item e contadores; o resumo vai para metrics_dir (se informado)
+        self.metrics = JobMetrics(self.job_key, url)
+        self.metrics_dir = metrics_dir
         self.STATE_FILE = state_file or os.path.join(self.output_path, ".download_state.json")
         self.paused = False
         self.pause_event = threading.Event()
         self.pause_event.set()  # desbloqueado
+        # start() retornou com o job pausado (ex.: pausa durante a normalização);
+        # restart_hook é chamado ao retomar ou cancelar para que o job rode de novo
+        self.suspended = False
+        self.restart_hook = None
 
         self._download_active = False  # indica se download está ativo
 
+        # Protege o estado compartilhado quando vários itens baixam em paralelo
+        self._lock = threading.RLock()
+
     def start(self):
         self._download_active = True
+        self.suspended = False
+        load_yt_dlp()
         try:
             os.makedirs(self.output_path, exist_ok=True)
             self.files_to_normalize.clear()
+            self.progress_tracker = ProgressTracker(self.progress_rate_hz)
+            self.metrics = JobMetrics(self.job_key, self.url)
             self._build_ydl_opts()
+            self._load_journal()
+
+            if self.cancel_requested or self.cancel_after_current:
+                # Cancelado enquanto estava suspenso: só a limpeza. Não há item atual
+                # para perguntar; apenas a política "discard" descarta os pendentes
+                self.cancel_requested = True
+                self.keep_after_cancel = self.cancel_policy != "discard"
+                raise yt_dlp.utils.DownloadCancelled("Download cancelado pelo usuário")
 
             if self.status_hook:
                 self.status_hook("Iniciando download...")
             if self.log_hook:
                 self.log_hook("[START] Iniciando download...")
 
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-
-            if self.allow_playlist and "entries" in info:
-                filtered = []
-                for entry in info["entries"]:
-                    if self._is_cached_final(entry):
-                        if self.log_hook:
-                            self.log_hook(f"[CACHE] Pulando (arquivo final já existe): {entry.get('title')}")
+            # Uma única instância (emprestada do pool do processo) extrai os metadados e baixa os itens
+            with session_pool().session(self.ydl_opts) as ydl:
+                info = self._journal_playlist()
+                if info is None:
+                    with self.metrics.span("extract"):
+                        info = self._extract_info(ydl)
+
+                if self.allow_playlist and "entries" in info:
+                    # Itens pendentes são gerados conforme a playlist é enumerada
+                    entries = self._pending_entries(info)
+                    if not self.lazy_playlist:
+                        entries = list(entries)
+
+                    if self.max_concurrent_items > 1:
+                        self._download_entries_concurrently(entries)
                     else:
-                        filtered.append(entry)
-                info["entries"] = filtered
-
-                with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                    ydl.process_ie_result(info, download=True)
-            else:
-                if not self._is_cached_final(info):
-                    with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                        ydl.process_ie_result(info, download=True)
-                else:
+                        for entry in entries:
+                            if self.cancel_requested:
+                                break
+                            self._process_entry_in_slot(ydl, entry)
+                elif self._is_cached_final(info):
+                    self.metrics.count("cache_hits", kind="final")
                     if self.log_hook:
                         self.log_hook("[CACHE] Arquivo final já existe, pulando download")
+                elif not self._checkpoint_entry(info):
+                    self._process_entry_in_slot(ydl, info)
 
             if self.normalize_enabled:
                 self._normalize_files()
@@ -123,21 +281,434 @@ class Downloader:
             if self.log_hook:
                 self.log_hook("[DONE] Download concluído")
 
+        except yt_dlp.utils.DownloadCancelled:
+            self.cancelled = True
+            if self.status_hook:
+                self.status_hook("Cancelado")
+            if self.log_hook:
+                self.log_hook("[CANCEL] Download cancelado")
+
         except Exception as e:
-            if self.error_hook:
-                self.error_hook(str(e))
+            if is_throttling_error(e):
+                self.concurrency.throttled()
+            self._report_error(str(e))
             if self.log_hook:
                 self.log_hook(f"[ERROR] {e}")
 
         finally:
             if not self.paused:
-                self._cleanup_files()
-                if self.cancel_requested and self.normalize_enabled and self.keep_after_cancel:
-                    self._move_playlist_from_tmp()
-                self.blocked_files.clear()
-                self._cleanup_tmp_normalize()
+                with self.metrics.span("cleanup"):
+                    self._cleanup_files()
+                    if self.cancel_requested and self.normalize_enabled and self.keep_after_cancel:
+                        self._move_playlist_from_tmp()
+                    self._cleanup_tmp_normalize()
                 self._clear_state()
+                self._finish_journal()
                 self._download_active = False
+            else:
+                self.journal.close()
+                self.suspended = True
+            self._finish_metrics()
+
+    def _process_entry_in_slot(self, ydl, entry):
+        """
+        Vídeo único e playlist sequencial também ocupam uma vaga de item: sem ela o
+        ajuste adaptativo nunca vê as vagas em uso e não aumenta os fragmentos.
+        """
+        self.concurrency.acquire()
+        try:
+            self._process_entry(ydl, entry)
+        finally:
+            self.concurrency.release()
+
+    def _download_entries_concurrently(self, entries):
+        """
+        Distribui os itens da playlist entre um pool de workers.
+        Cada worker usa sua própria instância de YoutubeDL (emprestada do pool). Os itens são enviados
+        ao pool aos poucos, então a enumeração da playlist pode continuar em paralelo.
+        """
+        workers = self.max_concurrent_items
+
+        if self.log_hook:
+            mode = f"ajuste automático, começando com {self.concurrency.item_limit}" if self.adaptive_concurrency else "fixo"
+            self.log_hook(f"[START] Até {workers} download(s) simultâneo(s) ({mode})")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+            pending = {}
+
+            for entry in entries:
+                if not self._acquire_item_slot(pending):
+                    break
+                pending[pool.submit(self._download_entry, entry)] = entry
+                self._report_finished(pending)
+
+            for future in as_completed(list(pending)):
+                self._report_entry_result(future, pending.pop(future))
+
+    def _acquire_item_slot(self, pending):
+        """
+        Espera uma vaga no nível atual de concorrência, reportando os itens que
+        terminarem enquanto isso. Retorna False se a playlist foi cancelada.
+        """
+        while not self.concurrency.acquire(timeout=0.5):
+            self._report_finished(pending)
+            if self.cancel_requested:
+                return False
+
+        if self.cancel_requested:
+            self.concurrency.release()
+            return False
+        return True
+
+    def _report_finished(self, pending):
+        done, _ = wait(list(pending), timeout=0, return_when=FIRST_COMPLETED)
+        for future in done:
+            self._report_entry_result(future, pending.pop(future))
+
+    def _report_entry_result(self, future, entry):
+        try:
+            future.result()
+        except Exception as e:
+            if is_throttling_error(e):
+                self.concurrency.throttled()
+
+            # Falha em um item não interrompe os demais
+            self._report_error(f"[DOWNLOAD][ERROR] Falha ao baixar {entry.get('title')}: {e}")
+            if self.log_hook:
+                self.log_hook(f"[ERROR] {entry.get('title')}: {e}")
+
+    def _download_entry(self, entry):
+        try:
+            # Cancelamento de playlist: não inicia novos itens
+            if self.cancel_requested:
+                return
+
+            # Cada worker usa uma instância do pool; as opções do job valem só durante o empréstimo
+            with session_pool().session(self.ydl_opts) as ydl:
+                self._process_entry(ydl, entry)
+        finally:
+            self.concurrency.release()
+
+    def _extract_info(self, ydl):
+        """
+        Extrai os metadados da URL sem resolver formatos nem itens da playlist.
+        Para vídeo único, usa o cache de extração quando disponível.
+        """
+        if not self.allow_playlist:
+            youtube_ie = yt_dlp.extractor.youtube.YoutubeIE
+            video_id = youtube_ie.get_temp_id(self.url) if youtube_ie.suitable(self.url) else None
+            cached = self.extraction_cache.get(video_id) if video_id else None
+            if cached:
+                self.metrics.count("cache_hits", kind="metadata")
+                if self.log_hook:
+                    self.log_hook(f"[CACHE] Metadados reaproveitados: {cached.get('title')}")
+                return cached
+
+        info = ydl.extract_info(self.url, download=False, process=False)
+
+        # Segue redirecionamentos (ex.: link de vídeo que aponta para a playlist)
+        while self.allow_playlist and info.get("_type") == "url":
+            info = ydl.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+
+        return info
+
+    def _playlist_entries(self, info):
+        """
+        Gera os itens (ainda não resolvidos) da playlist com os campos de playlist
+        usados no outtmpl e no caminho final. Com lazy_playlist, a lista não é
+        materializada e o total vem do extrator (quando informado).
+        """
+        entries = (entry for entry in info.get("entries") or [] if entry)
+        total = info.get("playlist_count")
+
+        if not self.lazy_playlist:
+            entries = list(entries)
+            total = len(entries)
+
+        self.progress_tracker.set_total(total)
+
+        count = 0
+        for index, entry in enumerate(entries, start=1):
+            entry.setdefault("playlist_title", info.get("title"))
+            entry.setdefault("playlist_id", info.get("id"))
+            entry.setdefault("playlist_index", index)
+            if total:
+                entry.setdefault("playlist_count", total)
+            count = index
+            yield entry
+
+        # Enumeração completa: uma retomada pode usar a lista do diário
+        if not (self.journal.playlist or {}).get("complete"):
+            self.journal.record_playlist(id=info.get("id"), title=info.get("title"), count=count, complete=True)
+
+    def _pending_entries(self, info):
+        """
+        Itens da playlist que ainda precisam ser baixados (o cache é consultado
+        antes de resolver os formatos de cada item).
+        """
+        for entry in self._playlist_entries(info):
+            if self._is_cached_final(entry):
+                self.metrics.count("cache_hits", kind="final")
+                self.progress_tracker.mark_skipped()
+                if self.log_hook:
+                    self.log_hook(f"[CACHE] Pulando (arquivo final já existe): {entry.get('title')}")
+                continue
+            if self._checkpoint_entry(entry):
+                self.metrics.count("cache_hits", kind="journal")
+                self.progress_tracker.mark_skipped()
+                continue
+            yield entry
+
+    def _load_journal(self):
+        """
+        Carrega o diário de uma execução anterior do mesmo job (pausa, queda ou
+        fechamento do app) e restaura os arquivos que aguardam normalização.
+        """
+        if not self.journal.load():
+            return
+
+        for video_id, item in list(self.journal.items.items()):
+            path = item.get("path")
+            if item.get("state") in ("downloaded", "normalized") and path and os.path.exists(path):
+                self.files.set_product(video_id, path)
+
+        if self.log_hook:
+            self.log_hook(f"[RESUME] Diário encontrado: {len(self.journal.items)} item(ns) registrados")
+
+    def _journal_playlist(self):
+        """
+        Retomada de playlist: usa a lista gravada no diário em vez de enumerar
+        a playlist de novo (apenas se a enumeração terminou e ainda é recente).
+        """
+        playlist = self.journal.playlist
+        if not self.allow_playlist or not playlist or not playlist.get("complete"):
+            return None
+        if time.time() - (playlist.get("time") or 0) > self.extraction_cache.ttl:
+            return None
+
+        entries = self.journal.entries()
+        if self.log_hook:
+            self.log_hook(f"[RESUME] Playlist retomada do diário ({len(entries)} item(ns)), sem nova extração")
+
+        return {
+            "_type": "playlist",
+            "id": playlist.get("id"),
+            "title": playlist.get("title"),
+            "playlist_count": playlist.get("count"),
+            "entries": entries,
+        }
+
+    def _checkpoint_entry(self, entry):
+        """
+        Consulta o diário antes de baixar o item. Retorna True se o download já foi
+        feito (arquivo final pronto ou fonte aguardando normalização).
+        Itens ainda não registrados entram no diário como "resolved".
+        """
+        video_id = entry.get("id")
+        if not video_id:
+            return False
+
+        record = self.journal.get(video_id)
+        if record is None:
+            fields = {key: entry[key] for key in JOURNAL_ENTRY_FIELDS if entry.get(key) is not None}
+            self.journal.record(video_id, "resolved", entry=fields)
+            return False
+
+        title = entry.get("title") or video_id
+        state = record.get("state")
+        path = record.get("path")
+
+        if state in ("downloaded", "normalized", "moved") and path and os.path.exists(path):
+            if self.log_hook:
+                self.log_hook(f"[RESUME] Download já concluído ({state}), pulando: {title}")
+            return True
+
+        part = record.get("part")
+        if state == "downloading" and part and os.path.exists(part) and self.log_hook:
+            done_mb = os.path.getsize(part) / (1024 * 1024)
+            self.log_hook(f"[RESUME] Continuando download de {title} a partir de {done_mb:.2f} MB")
+
+        return False
+
+    def _journal_download(self, d, info):
+        # Progresso do item no diário (.part e bytes), no máximo a cada JOURNAL_PROGRESS_INTERVAL
+        video_id = info.get("id")
+        part = d.get("tmpfilename") or d.get("filename")
+        if not video_id or not part:
+            return
+
+        checkpoint = {
+            "part": os.path.abspath(part),
+            "bytes": d.get("downloaded_bytes") or 0,
+            "total_bytes": d.get("total_bytes") or d.get("total_bytes_estimate"),
+        }
+        now = time.monotonic()
+        with self._lock:
+            self._download_checkpoints[video_id] = checkpoint
+            last = self._journal_times.get(video_id)
+            if d.get("status") == "downloading" and last is not None and now - last < JOURNAL_PROGRESS_INTERVAL:
+                return
+            self._journal_times[video_id] = now
+
+        self.journal.record(video_id, "downloading", **checkpoint)
+
+    def _flush_download_checkpoints(self):
+        # Pausa: grava o último progresso conhecido de cada item em andamento
+        with self._lock:
+            checkpoints = dict(self._download_checkpoints)
+        for video_id, checkpoint in checkpoints.items():
+            self.journal.record(video_id, "downloading", **checkpoint)
+
+    def _keeps_journal(self):
+        # Com falhas o diário fica: a próxima execução retoma apenas o que faltou
+        return bool(self.errors) and not (self.cancelled or self.cancel_requested)
+
+    def _finish_journal(self):
+        if self._keeps_journal():
+            self.journal.close()
+        else:
+            self.journal.discard()
+
+    def _resolve_entry(self, ydl, entry, use_cache=True):
+        """
+        Retorna (info, veio_do_cache) com os metadados completos do item.
+        A extração é feita uma única vez e guardada no cache por ID do vídeo.
+        """
+        video_id = entry.get("id")
+
+        if use_cache and video_id:
+            cached = self.extraction_cache.get(video_id)
+            if cached:
+                self.metrics.count("cache_hits", kind="metadata")
+                if self.log_hook:
+                    self.log_hook(f"[CACHE] Metadados reaproveitados: {cached.get('title') or video_id}")
+                return cached, True
+
+        if use_cache and entry.get("_type", "video") == "video" and entry.get("formats"):
+            # Já extraído (vídeo único)
+            info = entry
+        else:
+            with self.metrics.span("extract", video_id):
+                info = ydl.extract_info(
+                    entry.get("webpage_url") or entry.get("url"),
+                    download=False,
+                    process=False,
+                    ie_key=entry.get("ie_key") or entry.get("extractor_key")
+                )
+
+        if info.get("_type", "video") == "video" and info.get("id"):
+            self.extraction_cache.put(info["id"], ydl.sanitize_info(info, remove_private_keys=True))
+
+        return info, False
+
+    def _process_entry(self, ydl, entry):
+        """
+        Seleciona o formato e baixa um item a partir dos metadados já extraídos.
+        """
+        # Pausado: não começa (nem resolve) novos itens até retomar
+        self.pause_event.wait()
+
+        extra_info = {key: entry[key] for key in PLAYLIST_FIELDS if entry.get(key) is not None}
+        info, from_cache = self._resolve_entry(ydl, entry)
+        video_id = info.get("id")
+
+        # O item será baixado de novo: descarta remoções pendentes do mesmo arquivo
+        self.janitor.discard(self._get_final_path(dict(info, **extra_info)))
+
+        try:
+            while True:
+                try:
+                    self._download_info(ydl, info, from_cache, extra_info)
+                    return
+                except DownloadPaused:
+                    pass
+
+                # Espera fora do except: o traceback (que ainda referencia a resposta HTTP)
+                # já foi liberado e a conexão fecha; o .part fica no disco
+                self._wait_for_resume(info)
+                info = self._refresh_expired(ydl, info)
+                # Metadados antigos: uma falha ao retomar extrai de novo
+                from_cache = True
+
+        finally:
+            # Pós-processador que falhou não chega a informar "finished"
+            self._release_ffmpeg_slots()
+            self.metrics.drop(video_id)
+
+    def _download_info(self, ydl, info, from_cache, extra_info):
+        """
+        Baixa o item (retomando o .part com Range, se existir). Com metadados do
+        cache, uma falha de download extrai o item de novo uma vez.
+        """
+        video_id = info.get("id")
+        connections = self._reserve_connections(info)
+
+        try:
+            # Seleção de formato: até o primeiro callback de progresso do item
+            self.metrics.begin("format", video_id)
+            ydl.params["concurrent_fragment_downloads"] = connections
+            ydl.process_ie_result(info, download=True, extra_info=extra_info)
+
+        except yt_dlp.utils.DownloadError:
+            if not from_cache:
+                raise
+
+            # URLs de mídia do cache podem ter expirado: extrai novamente uma vez
+            if self.log_hook:
+                self.log_hook(f"[CACHE] Metadados expirados, extraindo novamente: {info.get('title')}")
+            self.metrics.count("retries", reason="expired_metadata")
+            self.metrics.drop(video_id)
+            self.extraction_cache.invalidate(video_id)
+            info, _ = self._resolve_entry(ydl, info, use_cache=False)
+            self.metrics.begin("format", video_id)
+            ydl.process_ie_result(info, download=True, extra_info=extra_info)
+
+        finally:
+            self._release_connections(video_id, connections)
+
+    def _reserve_connections(self, info):
+        """
+        Conexões do item: uma por fragmento simultâneo (nível atual de concorrência)
+        em downloads DASH/HLS, ou uma só. Com limite global, espera conexões livres
+        e usa as que receber.
+        """
+        wanted = self.concurrency.fragment_limit if has_fragmented_formats(info) else 1
+        granted = self.connection_budget.acquire(wanted) if self.connection_budget is not None else wanted
+        with self._lock:
+            self._fragment_grants[info.get("id")] = granted
+        return granted
+
+    def _release_connections(self, video_id, connections):
+        with self._lock:
+            self._fragment_grants.pop(video_id, None)
+        if self.connection_budget is not None:
+            self.connection_budget.release(connections)
+
+    def _wait_for_resume(self, info):
+        self.metrics.drop(info.get("id"))
+        if self.log_hook:
+            self.log_hook(f"[PAUSE] Transferência interrompida, .part mantido: {info.get('title')}")
+
+        self.pause_event.wait()
+
+        # Vídeo único cancelado durante a pausa
+        if self.cancel_requested and not self.allow_playlist:
+            self.files.cancel(info.get("id"))
+            raise yt_dlp.utils.DownloadCancelled("Download cancelado pelo usuário")
+
+    def _refresh_expired(self, ydl, info):
+        """
+        Na retomada, extrai o item de novo apenas se as URLs assinadas venceram
+        durante a pausa; caso contrário o download continua com as mesmas URLs.
+        """
+        if not urls_expired(info):
+            return info
+
+        if self.log_hook:
+            self.log_hook(f"[PAUSE] URLs expiraram durante a pausa, extraindo novamente: {info.get('title')}")
+        self.extraction_cache.invalidate(info.get("id"))
+        info, _ = self._resolve_entry(ydl, info, use_cache=False)
+        return info
 
     def _get_final_path(self, info_dict):
         title = sanitize_filename(info_dict.get("title", "untitled"))
@@ -152,7 +723,10 @@ class Downloader:
     def _build_ydl_opts(self):
         base_output = self.output_path
         if self.normalize_enabled:
-            self.tmp_dir = os.path.join(base_output, "temp_normalize")
+            # Uma subpasta por job: jobs simultâneos na mesma pasta não se misturam
+            self.tmp_dir = os.path.join(base_output, "temp_normalize", self.job_key)
+            # Remoção pendente de uma execução anterior não pode apagar os arquivos deste job
+            self.janitor.discard(self.tmp_dir)
             os.makedirs(self.tmp_dir, exist_ok=True)
             output_dir = self.tmp_dir
         else:
@@ -163,123 +737,241 @@ class Downloader:
         else:
             outtmpl = os.path.join(output_dir, "%(title)s.%(ext)s")
 
+        # No pipeline unificado a conversão acontece junto com a normalização
+        postprocessors = []
+        if not self._uses_fused_pipeline():
+            postprocessors.append(
+                {"key": "FFmpegExtractAudio", "preferredcodec": self.audio_format, "preferredquality": self.quality}
+            )
+
         self.ydl_opts = {
-            "format": "bestvideo+bestaudio/best",
             "ffmpeg_location": self.ffmpeg_path,
+            # O ExtractAudio do yt-dlp já copia o stream quando o codec coincide
+            "postprocessor_args": {"extractaudio": ["-threads", str(self.ffmpeg_threads)]},
             "outtmpl": outtmpl,
             "noplaylist": not self.allow_playlist,
-            "merge_output_format": "mp4",
             "external_downloader_args": ["-nostdin"],
             "keepvideo": self.keep_original_file,
             "progress_hooks": [self._progress_hook],
             "postprocessor_hooks": [self._postprocessor_hook],
-            "postprocessors": [
-                {"key": "FFmpegExtractAudio", "preferredcodec": self.audio_format, "preferredquality": self.quality}
-            ],
+            "postprocessors": postprocessors,
             "restrictfilenames": True,
-            "quiet": False,
-            "no_warnings": False,
+            "quiet": self.quiet,
+            "noprogress": self.quiet,
+            "no_warnings": self.quiet,
             "continuedl": True,
-            "nopart": False
+            "nopart": False,
+            # Áudio primeiro: vídeo só quando keep_original_file exige o mp4
+            **select_format(self.audio_format, self.quality, self.keep_original_file)
         }
 
     def _progress_hook(self, d):
         if self.cancel_requested or self.cancel_after_current:
             self.pause_event.set()
-        self.pause_event.wait()
+        if not self.pause_event.is_set():
+            # Pausa: interrompe a transferência em vez de bloquear com a conexão aberta
+            raise DownloadPaused()
 
         status = d.get("status")
         info = d.get("info_dict") or {}
+        tmp_file = d.get("tmpfilename")
+        filename = d.get("filename")
+        key = info.get("id") or filename
+
+        # Vídeo único: o cancelamento interrompe o download imediatamente
+        if self.cancel_requested and not self.allow_playlist:
+            if tmp_file:
+                self.files.add(key, tmp_file, part=True)
+            self.files.cancel(key)
+            raise yt_dlp.utils.DownloadCancelled("Download cancelado pelo usuário")
+
+        if status in ("downloading", "finished"):
+            # Formato escolhido; um item pode baixar mais de um arquivo (vídeo + áudio)
+            self.metrics.end("format", info.get("id"))
+            if status == "downloading":
+                self.metrics.begin("download", info.get("id"))
+            else:
+                self.metrics.end("download", info.get("id"))
 
         if status == "downloading":
-            downloaded_bytes = d.get("downloaded_bytes", 0)
-            total_bytes = d.get("total_bytes") or d.get("total_bytes_estimate") or 1
-            percent = downloaded_bytes / total_bytes * 100
-            speed = d.get("speed") or 0
-            eta = d.get("eta") or 0
-            downloaded_mb = downloaded_bytes / (1024 * 1024)
-            total_mb = total_bytes / (1024 * 1024)
-            playlist_index = d.get("playlist_index")
-            playlist_count = d.get("playlist_count")
-
-            status_text = f"{percent:.1f}% — {downloaded_mb:.2f}/{total_mb:.2f} MB — {speed / 1024:.2f} KB/s — ETA {eta}s"
-            if playlist_index and playlist_count:
-                status_text = f"Item {playlist_index}/{playlist_count} — {status_text}"
-
-            # Adiciona arquivo temporário (.part ou intermediário) à lista de gerados
-            tmp_file = d.get("tmpfilename")
+            # Registra o .part e o arquivo de destino deste download
             if tmp_file:
-                self.generated_files.add(os.path.abspath(tmp_file))
+                self.files.add(key, tmp_file, part=True)
+            if filename:
+                self.files.add(key, filename)
 
-            if downloaded_bytes == 0 and self.log_hook:
+            if not d.get("downloaded_bytes") and self.log_hook:
                 self.log_hook(f"[DOWNLOAD] Iniciando download: {info.get('title', 'untitled')}")
 
+            received = self._received_bytes(d)
+            self.metrics.count("bytes_downloaded", received)
+            if self.rate_limiter is not None:
+                self.rate_limiter.throttle(received)
+            if self.adaptive_concurrency:
+                self.concurrency.record(received)
+
+        elif status == "finished" and filename:
+            # O .part foi renomeado para o arquivo de destino
+            if tmp_file and tmp_file != filename:
+                self.files.forget(tmp_file)
+            self.files.add(key, filename)
+
+        if status in ("downloading", "finished"):
+            self._journal_download(d, info)
+
+        # Eventos agregados e limitados a progress_rate_hz
+        with self._lock:
+            fragments = self._fragment_grants.get(info.get("id"), 1)
+        event = self.progress_tracker.update(d, fragment_concurrency=fragments)
+        if event is None:
+            return
+
+        event.playlist.concurrency = self.concurrency.item_limit
+        event.playlist.fragment_concurrency = self.concurrency.fragment_limit
+
+        if self.progress_event_hook:
+            self.progress_event_hook(event)
+
+        if status == "downloading":
+            item = event.item
+            status_text = self._format_progress(item)
+
             if self.log_hook:
                 self.log_hook(f"[DOWNLOAD] {status_text}")
 
             if self.progress_hook:
-                self.progress_hook(percent, playlist_index, playlist_count, status_text)
+                self.progress_hook(item.percent, item.playlist_index, item.playlist_count, status_text)
+
+    @staticmethod
+    def _format_progress(item):
+        downloaded_mb = item.downloaded_bytes / (1024 * 1024)
+        total_mb = (item.total_bytes or 0) / (1024 * 1024)
+        eta = int(item.eta) if item.eta is not None else 0
+
+        status_text = f"{item.percent:.1f}% — {downloaded_mb:.2f}/{total_mb:.2f} MB — {item.speed / 1024:.2f} KB/s — ETA {eta}s"
+        if item.playlist_index and item.playlist_count:
+            status_text = f"Item {item.playlist_index}/{item.playlist_count} — {status_text}"
+        return status_text
 
     def _postprocessor_hook(self, d):
-        if d.get("status") != "finished":
-            return
+        if d.get("postprocessor") in FFMPEG_POSTPROCESSORS and self.ffmpeg_slots is not None:
+            if d.get("status") == "started":
+                self.ffmpeg_slots.acquire()
+                self._held_slots.count = getattr(self._held_slots, "count", 0) + 1
+            elif d.get("status") == "finished":
+                self._release_ffmpeg_slots(1)
 
         info = d.get("info_dict") or {}
+        postprocessor = d.get("postprocessor")
+        stage = "move" if postprocessor == "MoveFiles" else "postprocess"
+        if d.get("status") == "started":
+            self.metrics.begin(stage, info.get("id"), postprocessor)
+        elif d.get("status") == "finished":
+            self.metrics.end(stage, info.get("id"), postprocessor)
 
-        # Caminho do arquivo final ou intermediário
-        paths_to_add = set()
+        if d.get("status") != "finished":
+            return
 
-        # Adiciona caminho principal (final ou intermediário)
-        main_file = d.get("filepath") or d.get("filename") or info.get("_filename")
+        # Arquivo de entrada deste pós-processador (ex.: o mp4 mesclado antes do ExtractAudio);
+        # .part e intermediários .fNNN já foram registrados pelo hook de progresso
+        main_file = info.get("filepath") or info.get("_filename")
         if main_file:
             main_file = os.path.abspath(main_file)
-            paths_to_add.add(main_file)
-
-            # Se keepvideo=True, garante mp4 original
-            base, _ = os.path.splitext(main_file)
-            mp4 = base + ".mp4"
-            if os.path.exists(mp4):
-                paths_to_add.add(mp4)
-
-        # Adiciona arquivos intermediários do yt-dlp se existirem
-        out_dir = os.path.dirname(main_file) if main_file else self.output_path
-        basename = os.path.splitext(os.path.basename(main_file or "temp"))[0]
-
-        for f in os.listdir(out_dir):
-            if f.startswith(basename) and YTDLP_INTERMEDIATE_RE.search(f):
-                paths_to_add.add(os.path.join(out_dir, f))
-
-        # Adiciona todos os encontrados em generated_files
-        for path in paths_to_add:
-            self.generated_files.add(path)
+            self.files.add(info.get("id") or main_file, main_file)
             if self.log_hook:
-                self.log_hook(f"[POSTPROCESS] Arquivo rastreado: {path}")
+                self.log_hook(f"[POSTPROCESS] Arquivo rastreado: {main_file}")
+
+        # Arquivo entregue na pasta de saída do yt-dlp
+        if d.get("postprocessor") == "MoveFiles":
+            self._on_file_moved(info)
 
         # Hook externo
         if main_file and self.file_finished_hook:
             self.file_finished_hook(main_file)
 
         # -------- CANCELAMENTO --------
-        if self.cancel_after_current:
-            self.cancel_requested = True
-            title = info.get("title", "")
-            keep = messagebox.askyesno(
-                "Cancelar playlist",
-                f"Deseja manter este arquivo?\n\n{os.path.basename(main_file)}"
+        # Com vários itens em andamento, apenas o primeiro a terminar pergunta;
+        # a política (que pode abrir um diálogo) roda fora do lock
+        with self._lock:
+            ask = self.cancel_after_current
+            if ask:
+                self.cancel_after_current = False
+                self.cancel_requested = True
+        if ask:
+            self._handle_cancel_after_current(info, main_file)
+
+    def _handle_cancel_after_current(self, info, main_file):
+        keep = self._keep_after_cancel(main_file)
+        self.keep_after_cancel = keep
+
+        # Arquivos do item são apagados ao final e ele não é normalizado
+        if not keep:
+            self.files.cancel(info.get("id") or main_file)
+
+        if self.log_hook:
+            self.log_hook(f"[CANCEL] Cancelamento solicitado — manter arquivo? {keep}")
+
+    def _release_ffmpeg_slots(self, count=None):
+        held = getattr(self._held_slots, "count", 0)
+        count = held if count is None else min(count, held)
+        for _ in range(count):
+            self.ffmpeg_slots.release()
+        self._held_slots.count = held - count
+
+    def _ffmpeg_slot(self):
+        return self.ffmpeg_slots if self.ffmpeg_slots is not None else contextlib.nullcontext()
+
+    def _received_bytes(self, d):
+        # Bytes recebidos desde o último callback do mesmo arquivo (limite de banda e vazão)
+        key = d.get("tmpfilename") or d.get("filename")
+        downloaded = d.get("downloaded_bytes") or 0
+        with self._lock:
+            previous = self._bytes_seen.get(key)
+            # Fragmentos simultâneos: o total agregado pode oscilar entre callbacks
+            self._bytes_seen[key] = max(downloaded, previous or 0)
+        return max(0, downloaded - previous) if previous is not None else 0
+
+    def _on_concurrency_change(self, previous, level, reason):
+        if self.log_hook:
+            snapshot = self.concurrency.snapshot()
+            self.log_hook(
+                f"[CONCURRENCY] Conexões {previous} → {level} "
+                f"({snapshot['items']} item(ns) × {snapshot['fragments']} fragmento(s)) — {reason}, "
+                f"vazão {snapshot['throughput'] / (1024 * 1024):.2f} MB/s"
             )
-            self.keep_after_cancel = keep
 
-            if not keep and title:
-                self.cancelled_titles.add(title)
+    def _finish_metrics(self):
+        if self.paused:
+            status = "paused"
+        elif self.cancelled or self.cancel_requested:
+            status = "cancelled"
+        else:
+            status = "failed" if self.errors else "done"
+        self.metrics.finish(status)
 
-            if self.log_hook:
-                self.log_hook(f"[CANCEL] Cancelamento solicitado — manter arquivo? {keep}")
+        if self.metrics_dir:
+            try:
+                self.metrics.write_summary(self.metrics_dir)
+            except OSError as e:
+                if self.log_hook:
+                    self.log_hook(f"[METRICS] Falha ao gravar o resumo: {e}")
+
+    def _keep_after_cancel(self, file_path):
+        if callable(self.cancel_policy):
+            return bool(self.cancel_policy(file_path))
+        return self.cancel_policy == "keep"
 
-            self.cancel_after_current = False
+    def _report_error(self, message):
+        with self._lock:
+            self.errors.append(message)
+        self.metrics.count("failures")
+        if self.error_hook:
+            self.error_hook(message)
 
     def _normalize_files(self):
         """
-        Normaliza arquivos de áudio para target LUFS (-14 dB) usando tmp_normalize.
+        Normaliza arquivos de áudio para target_lufs (padrão -14 LUFS) usando tmp_normalize.
+        Os arquivos são processados em paralelo por até normalize_workers processos ffmpeg.
         """
 
         files_to_process = self._collect_files_for_normalize()
@@ -290,105 +982,179 @@ class Downloader:
                 self.log_hook("[NORMALIZE] Nenhum arquivo para normalizar.")
             return
 
+        workers = min(self.normalize_workers, total_files)
+
         if self.log_hook:
-            self.log_hook(f"[NORMALIZE] {total_files} arquivo(s) serão normalizados")
+            self.log_hook(f"[NORMALIZE] {total_files} arquivo(s) serão normalizados ({workers} em paralelo)")
 
-        for index, (tmp_file, final_file) in enumerate(files_to_process, start=1):
-            if final_file in self.blocked_files:
-                if self.log_hook:
-                    self.log_hook(f"[NORMALIZE] Arquivo cancelado, ignorando: {final_file}")
-                if os.path.exists(tmp_file):
-                    os.remove(tmp_file)
-                continue
+        # Cada tarefa apenas espera um subprocesso ffmpeg, então threads bastam
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="normalize") as pool:
+            futures = [
+                pool.submit(self._normalize_file, index, total_files, tmp_file, final_file)
+                for index, (tmp_file, final_file) in enumerate(files_to_process, start=1)
+            ]
+            for future in as_completed(futures):
+                future.result()
 
-            # Log do arquivo atual
-            if self.log_hook:
-                self.log_hook(f"[NORMALIZE] ({index}/{total_files}) Normalizando: {tmp_file}")
+        if self.log_hook:
+            self.log_hook(f"[NORMALIZE] Todos os {total_files} arquivos processados")
 
-            try:
+    def _normalize_file(self, index, total_files, tmp_file, final_file):
+        video_id = self.files.owner(tmp_file)
+
+        # Log do arquivo atual
+        if self.log_hook:
+            self.log_hook(f"[NORMALIZE] ({index}/{total_files}) Normalizando: {tmp_file}")
+
+        try:
+            # Garante que a pasta final exista
+            os.makedirs(os.path.dirname(final_file), exist_ok=True)
+
+            if self._uses_fused_pipeline():
+                # Converte a fonte baixada direto para o arquivo final normalizado
+                with self._ffmpeg_slot(), self.metrics.span("normalize", video_id):
+                    plan = Audio(tmp_file).transcode(
+                        final_file,
+                        self.audio_format,
+                        self.quality,
+                        target_lufs=self.target_lufs,
+                        two_pass=self.two_pass_normalize,
+                        cache=self.loudness_cache,
+                        threads=self.ffmpeg_threads,
+                        gain_only=self.gain_only_normalize
+                    )
+                self._count_plan(plan, tmp_file)
+                with self.metrics.span("move", video_id):
+                    self._finish_source_file(tmp_file, final_file)
+            else:
                 # Normaliza apenas o arquivo no formato de áudio escolhido
-                if tmp_file.lower().endswith(f".{self.audio_format.lower()}"):
-                    Audio(tmp_file).normalize(target_lufs=-14.0)
+                # (na retomada, um arquivo já normalizado só é movido)
+                if tmp_file.lower().endswith(f".{self.audio_format.lower()}") and not self._is_normalized(video_id, tmp_file):
+                    with self._ffmpeg_slot(), self.metrics.span("normalize", video_id):
+                        plan = Audio(tmp_file).normalize(
+                            target_lufs=self.target_lufs,
+                            two_pass=self.two_pass_normalize,
+                            cache=self.loudness_cache,
+                            quality=self.quality,
+                            threads=self.ffmpeg_threads,
+                            gain_only=self.gain_only_normalize
+                        )
+                    self._count_plan(plan, tmp_file)
+                    self.journal.record(video_id, "normalized", path=os.path.abspath(tmp_file))
+
+                # Move o arquivo para a pasta final
+                with self.metrics.span("move", video_id):
+                    shutil.move(tmp_file, final_file)
+            self.files.forget(tmp_file)
+
+            # Log sucesso
+            if self.log_hook:
+                self.log_hook(f"[NORMALIZE] ({index}/{total_files}) Normalizado e movido para: {final_file}")
 
-                # Garante que a pasta final exista e move o arquivo
-                os.makedirs(os.path.dirname(final_file), exist_ok=True)
-                shutil.move(tmp_file, final_file)
+            self._record_archive(video_id, final_file)
+            self.journal.record(video_id, "moved", path=os.path.abspath(final_file))
 
-                # Log sucesso
-                if self.log_hook:
-                    self.log_hook(f"[NORMALIZE] ({index}/{total_files}) Normalizado e movido para: {final_file}")
+            # Hook de arquivo finalizado
+            if self.file_finished_hook:
+                self.file_finished_hook(final_file)
 
-                # Hook de arquivo finalizado
-                if self.file_finished_hook:
-                    self.file_finished_hook(final_file)
+        except Exception as e:
+            self._report_error(f"[NORMALIZE][ERROR] Falha ao normalizar {tmp_file}: {e}")
 
-            except Exception as e:
-                if self.error_hook:
-                    self.error_hook(f"[NORMALIZE][ERROR] Falha ao normalizar {tmp_file}: {e}")
+    def _count_plan(self, plan, tmp_file):
+        self.metrics.count("encodes", action=plan.action)
+        if plan.copy and self.log_hook:
+            self.log_hook(f"[NORMALIZE] Sem recodificar ({plan.reason}): {tmp_file}")
 
-        if self.log_hook:
-            self.log_hook(f"[NORMALIZE] Todos os {total_files} arquivos processados")
+    def _is_normalized(self, video_id, tmp_file):
+        record = self.journal.get(video_id) if video_id else None
+        return bool(record) and record.get("state") == "normalized" and record.get("path") == os.path.abspath(tmp_file)
+
+    def _uses_fused_pipeline(self):
+        return self.fused_pipeline and self.normalize_enabled
+
+    def _finish_source_file(self, source_file, final_file):
+        """
+        Depois da conversão unificada: mantém o original ao lado do arquivo final
+        (keep_original_file) ou remove a fonte baixada.
+        """
+        if self.keep_original_file:
+            kept = os.path.join(os.path.dirname(final_file), os.path.basename(source_file))
+            if os.path.abspath(kept) != os.path.abspath(final_file):
+                shutil.move(source_file, kept)
+                self.files.forget(source_file)
+                return
+
+        if os.path.exists(source_file):
+            os.remove(source_file)
+        self.files.forget(source_file)
 
     def _cleanup_files(self):
+        """
+        Agenda no janitor a remoção dos intermediários e dos arquivos cancelados;
+        o job não espera arquivos em uso serem liberados.
+        """
         allowed_exts = {f".{self.audio_format.lower()}"}
         if self.keep_original_file:
             allowed_exts.add(".mp4")
 
-        for file_path in list(self.generated_files):
-            if file_path in self.blocked_files or not os.path.exists(file_path):
+        tmp_root = os.path.abspath(self.tmp_dir) + os.sep if self.tmp_dir else None
+        intermediates = []
+        not_allowed = []
+
+        # Apenas os arquivos registrados pelos hooks; a pasta temporária é removida inteira
+        for file_path in self.files.paths():
+            if tmp_root and file_path.startswith(tmp_root):
                 continue
 
             filename = os.path.basename(file_path)
             ext = os.path.splitext(filename)[1].lower()
 
             if YTDLP_INTERMEDIATE_RE.search(filename):
-                try:
-                    os.remove(file_path)
-                    if self.log_hook:
-                        self.log_hook(f"[CLEANUP] Arquivo intermediário removido: {file_path}")
-                except OSError as e:
-                    if self.log_hook:
-                        self.log_hook(f"[ERROR] Falha ao remover arquivo intermediário: {file_path} — {e}")
+                intermediates.append(file_path)
+            elif ext not in allowed_exts:
+                not_allowed.append(file_path)
+            else:
                 continue
+            self.files.forget(file_path)
 
-            if ext not in allowed_exts:
-                try:
-                    os.remove(file_path)
-                    if self.log_hook:
-                        self.log_hook(f"[CLEANUP] Arquivo removido (ext não permitido): {file_path}")
-                except OSError as e:
-                    if self.log_hook:
-                        self.log_hook(f"[ERROR] Falha ao remover arquivo: {file_path} — {e}")
+        self.janitor.delete(intermediates, message="[CLEANUP] Arquivo intermediário removido", log_hook=self.log_hook)
+        self.janitor.delete(not_allowed, message="[CLEANUP] Arquivo removido (ext não permitido)", log_hook=self.log_hook)
 
         self._delete_cancelled_files()
 
     def _delete_cancelled_files(self):
-        for file_path in list(self.cancelled_files):
-            time.sleep(2)
-            for attempt in range(5):
-                if not os.path.exists(file_path):
-                    break
-                try:
-                    os.remove(file_path)
-                    if self.log_hook:
-                        self.log_hook(f"[CANCEL] Arquivo deletado: {file_path}")
-                    break
-                except PermissionError:
-                    time.sleep(0.5)
-            else:
-                if self.log_hook:
-                    self.log_hook(f"[CANCEL] Arquivo NÃO pôde ser deletado (em uso): {file_path}")
-            self.cancelled_files.remove(file_path)
+        # Itens cancelados: todos os arquivos que o registro conhece
+        self.cancelled_files.update(self.files.cancelled_paths())
+        if not self.cancelled_files:
+            return
+
+        self.janitor.delete(
+            sorted(self.cancelled_files),
+            delay=CANCELLED_FILES_DELAY,
+            message="[CANCEL] Arquivo deletado",
+            log_hook=self.log_hook
+        )
+        self.cancelled_files.clear()
 
     def _cleanup_tmp_normalize(self):
-        if self.tmp_dir and os.path.exists(self.tmp_dir):
-            try:
-                shutil.rmtree(self.tmp_dir)
-                if self.log_hook:
-                    self.log_hook(f"[CLEANUP] temp_normalize removida: {self.tmp_dir}")
-            except Exception as e:
-                if self.log_hook:
-                    self.log_hook(f"[ERROR] Falha ao remover temp_normalize: {e}")
+        if not self.tmp_dir:
+            return
+
+        if self._keeps_journal():
+            # Fontes baixadas e ainda não normalizadas ficam para a retomada não baixá-las de novo
+            if self.log_hook:
+                self.log_hook(f"[CLEANUP] Pasta temporária mantida para a retomada: {self.tmp_dir}")
+            return
+
+        # A pasta do job sai do caminho na hora; a remoção fica com o janitor
+        self.janitor.remove_tree(self.tmp_dir, log_hook=self.log_hook)
+
+        # Remove a pasta temp_normalize se nenhum outro job a estiver usando
+        try:
+            os.rmdir(os.path.dirname(self.tmp_dir))
+        except OSError:
+            pass
 
     def _move_playlist_from_tmp(self):
         if not self.tmp_dir or not os.path.exists(self.tmp_dir):
@@ -402,8 +1168,150 @@ class Downloader:
                     self.log_hook(f"[CLEANUP] Playlist movida: {src} → {dst}")
 
     def _is_cached_final(self, info_dict) -> bool:
+        """
+        Decide se o item pode ser pulado. Consulta primeiro o índice por ID do vídeo
+        (independe do título); sem registro, verifica o caminho calculado pelo título
+        e, por fim, se o item já existe em outra pasta com as mesmas configurações.
+        """
         final_path = self._get_final_path(info_dict)
-        return bool(final_path and os.path.exists(final_path))
+        video_id = info_dict.get("id")
+        directory = os.path.dirname(final_path)
+
+        if video_id:
+            record = self.archive.lookup(video_id, *self._archive_settings(), directory)
+            if record:
+                if os.path.exists(record["final_path"]):
+                    return True
+                # Arquivo removido ou movido: descarta o registro
+                self.archive.remove(video_id, *self._archive_settings(), directory)
+
+        # Biblioteca anterior ao índice (ver rebuild_archive)
+        if final_path and os.path.exists(final_path):
+            return True
+
+        return self.dedupe and bool(video_id) and self._link_existing_copy(video_id, final_path)
+
+    def _link_existing_copy(self, video_id, final_path) -> bool:
+        """
+        Reaproveita o arquivo final do mesmo vídeo gerado em outra pasta (hardlink,
+        reflink ou cópia) e o registra no índice desta pasta.
+        """
+        for record in self.archive.copies(video_id, *self._archive_settings()):
+            source = record["final_path"]
+            try:
+                # Tamanho diferente do registrado: arquivo trocado ou editado depois
+                if os.path.getsize(source) != record["size"]:
+                    continue
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                method = link_or_copy(source, final_path)
+            except OSError:
+                continue
+
+            self._record_archive(video_id, final_path)
+            self.metrics.count("deduplicated", method=method)
+            if self.log_hook:
+                self.log_hook(f"[DEDUPE] Reaproveitado ({method}) de {source}: {final_path}")
+            if self.file_finished_hook:
+                self.file_finished_hook(final_path)
+            return True
+
+        return False
+
+    def _archive_settings(self):
+        method = "gain" if self.gain_only_normalize else "loudnorm"
+        normalization = f"{method}:{float(self.target_lufs)}" if self.normalize_enabled else "off"
+        return self.audio_format.lower(), str(self.quality), normalization
+
+    def _record_archive(self, video_id, final_path):
+        if not video_id or not final_path or not os.path.exists(final_path):
+            return
+        try:
+            self.archive.record(video_id, *self._archive_settings(), final_path)
+        except (sqlite3.Error, OSError) as e:
+            if self.log_hook:
+                self.log_hook(f"[ERROR] Falha ao registrar no índice: {final_path} — {e}")
+
+    def _on_file_moved(self, info):
+        filepath = info.get("filepath")
+        video_id = info.get("id")
+        if not filepath or not video_id:
+            return
+
+        filepath = os.path.abspath(filepath)
+        self.files.set_product(video_id, filepath)
+        with self._lock:
+            self._download_checkpoints.pop(video_id, None)
+
+        if self.normalize_enabled:
+            self.journal.record(video_id, "downloaded", path=filepath)
+
+        # Sem normalização o arquivo convertido já está no caminho final
+        elif filepath.lower().endswith(f".{self.audio_format.lower()}"):
+            self._record_archive(video_id, filepath)
+            self.journal.record(video_id, "moved", path=filepath)
+
+    def rebuild_archive(self):
+        """
+        Indexa uma biblioteca existente: lista os itens da URL (sem resolver formatos)
+        e registra os arquivos finais que já estão na pasta de saída.
+        Retorna a quantidade de arquivos indexados.
+        """
+        opts = {
+            "quiet": True,
+            "noplaylist": not self.allow_playlist,
+            "extract_flat": "in_playlist",
+        }
+        with session_pool().session(opts) as ydl:
+            info = self._extract_info(ydl)
+
+        if self.allow_playlist and "entries" in info:
+            entries = self._playlist_entries(info)
+        else:
+            entries = [info]
+
+        indexed = 0
+        for entry in entries:
+            final_path = self._get_final_path(entry)
+            if entry.get("id") and os.path.exists(final_path):
+                self._record_archive(entry["id"], final_path)
+                indexed += 1
+                if self.log_hook:
+                    self.log_hook(f"[ARCHIVE] Indexado: {final_path}")
+
+        return indexed
+
+    @property
+    def outcome(self) -> str:
+        """
+        Resultado da execução: "cancelled", "failed" ou "done", nesta precedência.
+        Um cancelamento de playlist pedido durante a normalização (nenhum item
+        terminou depois dele) também conta como cancelado.
+        """
+        if self.cancelled or self.cancel_requested or self.cancel_after_current:
+            return "cancelled"
+        if self.errors:
+            return "failed"
+        return "done"
+
+    def cancel(self):
+        """
+        Playlist: cancela depois que o item atual terminar.
+        Vídeo único: interrompe o download imediatamente.
+        """
+        if self.allow_playlist:
+            self.cancel_after_current = True
+        else:
+            self.cancel_requested = True
+
+        # Cancelar um job pausado encerra o job (não volta para a fila)
+        self.paused = False
+
+        if self.log_hook:
+            self.log_hook("[CANCEL] Cancelamento solicitado")
+
+        # Libera um download pausado para que o cancelamento seja processado
+        self.pause_event.set()
+        self._restart()
 
     def pause(self):
         if not self._download_active:
@@ -412,6 +1320,7 @@ class Downloader:
         self.paused = True
         if self._download_active:
             self._save_state(paused=True)
+            self._flush_download_checkpoints()
         if self.status_hook:
             self.status_hook("⏸️ Pausado")
         if self.log_hook:
@@ -426,6 +1335,13 @@ class Downloader:
         if self.log_hook:
             self.log_hook("▶️ Download retomado")
         self.pause_event.set()
+        self._restart()
+
+    def _restart(self):
+        # Job suspenso (start() já retornou): quem o executa roda start() de novo
+        hook, self.restart_hook = self.restart_hook, None
+        if hook:
+            hook()
 
     def _save_state(self, paused=False):
         state = {
@@ -460,34 +1376,45 @@ class Downloader:
 
     def _collect_files_for_normalize(self):
         """
-        Coleta arquivos na pasta tmp_normalize que devem ser normalizados.
+        Arquivos da pasta tmp_normalize que devem ser normalizados, a partir do registro
+        (arquivo produzido de cada item e, com keep_original_file, os originais mantidos).
         Retorna uma lista de tuplas (tmp_file, final_file).
         """
-
-        if not os.path.exists(self.tmp_dir):
+        if not self.tmp_dir:
             return []
 
+        tmp_root = os.path.abspath(self.tmp_dir)
         files_to_process = []
+        seen = set()
 
-        for root, _, files in os.walk(self.tmp_dir):
-            for f in files:
-                print("OS ARQUIVOS SAO:", f)
-                ext = os.path.splitext(f)[1].lower()
+        for video_id, product in self.files.products():
+            candidates = [product]
+            if self.keep_original_file:
+                candidates += self.files.kept(video_id)
 
-                # Coleta apenas arquivos de áudio no formato escolhido
-                if ext not in [".mp3", ".mp4"]:
+            for tmp_file in candidates:
+                if tmp_file in seen or os.path.commonpath([tmp_root, tmp_file]) != tmp_root:
                     continue
+                seen.add(tmp_file)
+
+                f = os.path.basename(tmp_file)
+                stem, ext = os.path.splitext(f)
+                ext = ext.lower()
+                final_name = f
 
-                tmp_file = os.path.join(root, f)
+                if self._uses_fused_pipeline():
+                    # Coleta as fontes baixadas; o arquivo final recebe a extensão escolhida
+                    if ext not in SOURCE_MEDIA_EXTS or YTDLP_INTERMEDIATE_RE.search(f):
+                        continue
+                    final_name = f"{stem}.{self.audio_format.lower()}"
 
-                if self.allow_playlist:
-                    relative_path = os.path.relpath(tmp_file, self.tmp_dir)
-                    final_file = os.path.join(self.output_path, relative_path)
+                # Coleta apenas arquivos de áudio no formato escolhido
+                elif ext not in [".mp3", ".mp4"]:
+                    continue
 
-                else:
-                    final_file = os.path.join(self.output_path, f)
+                relative_dir = os.path.relpath(os.path.dirname(tmp_file), tmp_root)
+                final_file = os.path.normpath(os.path.join(self.output_path, relative_dir, final_name))
 
                 files_to_process.append((tmp_file, final_file))
 
-        print("ESSESS SAO OS PARA PROCESSAR:", files_to_process)
         return files_to_process
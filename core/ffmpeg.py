@@ -0,0 +1,280 @@
+# core/ffmpeg.py
+
+import json
+import math
+import os
+import re
+
+from dataclasses import dataclass
+from typing import Optional
+
+from utils import get_ffmpeg_executable
+
+# Parâmetros fixos do loudnorm (pico real e faixa de loudness)
+TRUE_PEAK = -1.5
+LOUDNESS_RANGE = 11
+
+LOUDNORM_JSON_RE = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}", re.DOTALL)
+
+# Linha do primeiro stream de áudio e bitrate do arquivo em "ffmpeg -i" (sem ffprobe)
+AUDIO_STREAM_RE = re.compile(r"Stream #\S+.*?: Audio: (\w+)([^\n]*)")
+STREAM_DETAILS_RE = re.compile(r"(\d+) Hz, ([^,]+)")
+BITRATE_RE = re.compile(r"(\d+) kb/s")
+FILE_BITRATE_RE = re.compile(r"Duration: .*?bitrate: (\d+) kb/s")
+
+# loudnorm trabalha internamente a 192 kHz; a saída volta para esta taxa
+OUTPUT_SAMPLE_RATE = 48000
+
+# Encoder do ffmpeg para cada formato de saída (None = sem bitrate)
+ENCODERS = {
+    "mp3": ("libmp3lame", True),
+    "m4a": ("aac", True),
+    "aac": ("aac", True),
+    "opus": ("libopus", True),
+    "vorbis": ("libvorbis", True),
+    "ogg": ("libvorbis", True),
+    "flac": ("flac", False),
+    "wav": ("pcm_s16le", False),
+}
+
+
+# Codec da fonte (nome do ffprobe) que pode ir para cada formato de saída sem recodificar
+COPYABLE_CODECS = {
+    "mp3": {"mp3"},
+    "m4a": {"aac"},
+    "aac": {"aac"},
+    "opus": {"opus"},
+    "vorbis": {"vorbis"},
+    "ogg": {"vorbis"},
+    "flac": {"flac"},
+    "wav": {"pcm_s16le"},
+}
+
+# Diferença relativa de bitrate aceita para copiar (mesma faixa de qualidade)
+BITRATE_TOLERANCE = 0.15
+
+# Diferença (LU) do loudness medido para o alvo aceita sem normalizar de novo
+LOUDNESS_TOLERANCE = 0.5
+
+
+@dataclass
+class EncodePlan:
+    """Decisão do planejador: "copy" (cópia do stream, só troca o contêiner) ou "encode"."""
+    action: str
+    reason: str = ""
+
+    @property
+    def copy(self) -> bool:
+        return self.action == "copy"
+
+
+def default_threads(workers: int = 1) -> int:
+    """
+    Threads por processo ffmpeg quando workers processos rodam ao mesmo tempo
+    (os encoders de áudio usam pouco mais de uma thread).
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def probe_command(src: str) -> list:
+    """Comando ffprobe com codec e bitrate do primeiro stream de áudio."""
+    return [
+        get_ffmpeg_executable("ffprobe"),
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,bit_rate,sample_rate,channels:format=bit_rate",
+        "-of", "json",
+        src,
+    ]
+
+
+def parse_probe(stdout: str) -> dict:
+    """
+    Lê a saída JSON do ffprobe: codec, bitrate (kbps; do stream ou, sem ele, do
+    arquivo), taxa de amostragem e canais. Sem stream de áudio, codec é None.
+    """
+    data = json.loads(stdout or "{}")
+    streams = data.get("streams") or [{}]
+    stream = streams[0]
+    bit_rate = stream.get("bit_rate") or (data.get("format") or {}).get("bit_rate")
+    return {
+        "codec": stream.get("codec_name"),
+        "bitrate": int(bit_rate) / 1000 if bit_rate and str(bit_rate).isdigit() else None,
+        "sample_rate": int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+        "channels": stream.get("channels"),
+    }
+
+
+def parse_ffmpeg_info(stderr: str) -> dict:
+    """
+    Alternativa ao parse_probe quando não há ffprobe: lê o primeiro stream de áudio
+    da saída de erro de "ffmpeg -i". Mesmo formato do parse_probe.
+    """
+    stderr = stderr or ""
+    match = AUDIO_STREAM_RE.search(stderr)
+    if not match:
+        return {"codec": None, "bitrate": None, "sample_rate": None, "channels": None}
+
+    details = STREAM_DETAILS_RE.search(match.group(2))
+    bitrate = BITRATE_RE.search(match.group(2)) or FILE_BITRATE_RE.search(stderr)
+    bitrate = bitrate.group(1) if bitrate else None
+
+    layout = details.group(2).strip() if details else None
+    return {
+        "codec": match.group(1),
+        "bitrate": float(bitrate) if bitrate else None,
+        "sample_rate": int(details.group(1)) if details else None,
+        "channels": {"mono": 1, "stereo": 2}.get(layout),
+    }
+
+
+def plan_encode(source: dict, audio_format: str, quality: str = None) -> EncodePlan:
+    """
+    Decide entre copiar o stream de áudio e recodificar.
+    source: resultado de parse_probe. Copia quando o codec da fonte já é o do
+    formato de saída e, em formatos com bitrate, a fonte está na mesma faixa
+    de quality (±BITRATE_TOLERANCE).
+    """
+    audio_format = audio_format.lower()
+    codec = source.get("codec")
+    if codec not in COPYABLE_CODECS.get(audio_format, ()):
+        return EncodePlan("encode", f"codec {codec} != {audio_format}")
+
+    _, uses_bitrate = ENCODERS.get(audio_format, (None, False))
+    if not uses_bitrate or not quality:
+        return EncodePlan("copy", f"codec {codec}")
+
+    bitrate = source.get("bitrate")
+    try:
+        target = float(quality)
+    except (TypeError, ValueError):
+        return EncodePlan("encode", f"quality inválida: {quality}")
+
+    if not bitrate:
+        return EncodePlan("encode", "bitrate da fonte desconhecido")
+    if abs(bitrate - target) > target * BITRATE_TOLERANCE:
+        return EncodePlan("encode", f"bitrate {bitrate:.0f}k fora da faixa de {quality}k")
+    return EncodePlan("copy", f"codec {codec} a {bitrate:.0f}k")
+
+
+def loudness_on_target(measured: dict, target_lufs: float) -> bool:
+    """
+    Medições da primeira passada já dentro do alvo: loudness a até LOUDNESS_TOLERANCE
+    e pico real abaixo do limite do loudnorm.
+    """
+    return abs(measured["input_i"] - target_lufs) <= LOUDNESS_TOLERANCE and measured["input_tp"] <= TRUE_PEAK
+
+
+def encoder_args(audio_format: str, quality: str = None) -> list:
+    """
+    Argumentos de codificação para o formato de saída escolhido.
+    quality: bitrate em kbps (ignorado em formatos sem perda).
+    """
+    codec, uses_bitrate = ENCODERS.get(audio_format.lower(), (None, False))
+    if not codec:
+        return []
+
+    args = ["-c:a", codec]
+    if uses_bitrate and quality:
+        args += ["-b:a", f"{quality}k"]
+    return args
+
+
+def transcode_command(
+    src: str,
+    dst: str,
+    audio_format: str,
+    quality: str = None,
+    audio_filter: str = None,
+    copy: bool = False,
+    threads: Optional[int] = 1,
+) -> list:
+    """
+    Monta um único comando ffmpeg que extrai o áudio, aplica o filtro
+    (ex.: loudnorm) e codifica no formato final.
+    copy: copia o stream de áudio para o contêiner de dst (sem filtro nem recodificação).
+    threads: threads do ffmpeg (decodificação e codificação); None deixa o padrão do ffmpeg.
+    """
+    cmd = [
+        get_ffmpeg_executable(),
+        "-hide_banner",
+        "-nostdin",
+        "-y",
+    ]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd += [
+        "-i", src,
+        "-vn",
+        "-map_metadata", "0",
+    ]
+
+    if copy:
+        cmd += ["-c:a", "copy"]
+    else:
+        if audio_filter:
+            cmd += ["-af", audio_filter, "-ar", str(OUTPUT_SAMPLE_RATE)]
+        cmd += encoder_args(audio_format, quality)
+
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd.append(dst)
+    return cmd
+
+
+def loudnorm_filter(target_lufs: float, measured: dict = None, print_stats: bool = False) -> str:
+    """
+    Monta o filtro loudnorm do ffmpeg.
+    measured: medições da primeira passada (input_i, input_tp, input_lra, input_thresh).
+    Quando informado, aplica ganho linear (segunda passada).
+    """
+    parts = [f"I={target_lufs}", f"TP={TRUE_PEAK}", f"LRA={LOUDNESS_RANGE}"]
+
+    if measured:
+        parts += [
+            f"measured_I={measured['input_i']}",
+            f"measured_TP={measured['input_tp']}",
+            f"measured_LRA={measured['input_lra']}",
+            f"measured_thresh={measured['input_thresh']}",
+            f"offset={measured.get('target_offset', 0.0)}",
+            "linear=true",
+        ]
+
+    if print_stats:
+        parts.append("print_format=json")
+
+    return "loudnorm=" + ":".join(parts)
+
+
+def gain_for_target(measured: dict, target_lufs: float) -> float:
+    """
+    Ganho (dB) que leva o loudness medido ao alvo sem passar do pico real
+    TRUE_PEAK: sem limitador, músicas com pico alto ficam abaixo do alvo.
+    """
+    gain = target_lufs - measured["input_i"]
+    headroom = TRUE_PEAK - measured["input_tp"]
+    gain = min(gain, headroom)
+    return round(gain, 2) if math.isfinite(gain) else 0.0
+
+
+def volume_filter(gain_db: float) -> str:
+    """Filtro de ganho fixo (normalização só com ganho, sem compressão do loudnorm)."""
+    return f"volume={gain_db}dB"
+
+
+def parse_loudnorm_stats(stderr: str) -> dict:
+    """
+    Extrai o bloco JSON impresso pelo loudnorm (print_format=json) na saída de erro do ffmpeg.
+    """
+    matches = LOUDNORM_JSON_RE.findall(stderr or "")
+    if not matches:
+        raise ValueError("Saída do loudnorm não encontrada")
+
+    stats = json.loads(matches[-1])
+    return {
+        "input_i": float(stats["input_i"]),
+        "input_tp": float(stats["input_tp"]),
+        "input_lra": float(stats["input_lra"]),
+        "input_thresh": float(stats["input_thresh"]),
+        "target_offset": float(stats.get("target_offset", 0.0)),
+    }
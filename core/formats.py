@@ -0,0 +1,92 @@
+# core/formats.py
+
+import re
+import time
+
+# Prefixo do acodec (como informado pelo yt-dlp) de cada formato de saída
+TARGET_ACODECS = {
+    "mp3": "mp3",
+    "m4a": "mp4a",
+    "aac": "mp4a",
+    "opus": "opus",
+    "vorbis": "vorbis",
+    "flac": "flac",
+}
+
+# Formatos sem perda: sempre buscar a melhor fonte disponível
+LOSSLESS_FORMATS = {"flac", "wav"}
+
+# Protocolos baixados em fragmentos (DASH/HLS): aceitam fragmentos simultâneos
+FRAGMENTED_PROTOCOLS = {"http_dash_segments", "http_dash_segments_generator", "m3u8", "m3u8_native", "ism", "f4m"}
+
+# Validade das URLs assinadas: "expire=123" na query ou "/expire/123/" (manifestos DASH/HLS)
+EXPIRE_RE = re.compile(r"[?&/]expire[=/](\d+)")
+
+# Margem (s) antes da expiração em que a URL já não serve para retomar um download
+EXPIRY_MARGIN = 120
+
+
+def select_format(audio_format: str, quality: str, keep_original_file: bool) -> dict:
+    """
+    Política de seleção de formato priorizando streams somente de áudio.
+    Retorna as opções do yt-dlp (format e, se preciso, merge_output_format).
+    O vídeo só é baixado quando o arquivo original (mp4) deve ser mantido.
+    """
+    if keep_original_file:
+        return {"format": "bestvideo+bestaudio/best", "merge_output_format": "mp4"}
+
+    audio_format = audio_format.lower()
+    if audio_format in LOSSLESS_FORMATS:
+        return {"format": "bestaudio/best"}
+
+    try:
+        bitrate = int(quality)
+    except (TypeError, ValueError):
+        bitrate = None
+
+    selectors = []
+    acodec = TARGET_ACODECS.get(audio_format)
+
+    if bitrate:
+        # Mesmo codec com bitrate suficiente: o menor que atende ao alvo
+        if acodec:
+            selectors.append(f"worstaudio[acodec^={acodec}][abr>={bitrate}]")
+        # Qualquer codec com bitrate suficiente (menos bytes que o melhor áudio)
+        selectors.append(f"worstaudio[abr>={bitrate}]")
+    elif acodec:
+        selectors.append(f"bestaudio[acodec^={acodec}]")
+
+    selectors += ["bestaudio", "best"]
+    return {"format": "/".join(selectors)}
+
+
+def urls_expire_at(info: dict):
+    """
+    Instante (epoch) em que a primeira URL de mídia do item expira, ou None se
+    as URLs não informam validade.
+    """
+    expiries = []
+    for fmt in info.get("formats") or [info]:
+        for key in ("url", "manifest_url", "fragment_base_url"):
+            match = EXPIRE_RE.search(fmt.get(key) or "")
+            if match:
+                expiries.append(int(match.group(1)))
+    return min(expiries) if expiries else None
+
+
+def urls_expired(info: dict, margin: float = EXPIRY_MARGIN) -> bool:
+    expires_at = urls_expire_at(info)
+    return expires_at is not None and time.time() + margin >= expires_at
+
+
+def has_fragmented_formats(info: dict) -> bool:
+    """
+    Indica se o formato escolhido para o item pode ser fragmentado. Considera os
+    formatos somente de áudio (preferidos pela seleção) quando existem.
+    """
+    formats = info.get("formats") or [info]
+    audio_only = [fmt for fmt in formats if fmt.get("vcodec") == "none" and fmt.get("acodec") != "none"]
+    return any(
+        fmt.get("protocol") in FRAGMENTED_PROTOCOLS or fmt.get("fragments")
+        for fmt in audio_only or formats
+    )
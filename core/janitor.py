@@ -0,0 +1,252 @@
+# core/janitor.py
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+PENDING_FILENAME = "pending_deletions.json"
+TRASH_DIRNAME = "trash"
+
+# Um janitor por pasta de cache (compartilhado pelos jobs da mesma pasta de saída)
+_janitors = {}
+_janitors_lock = threading.Lock()
+
+
+def janitor_for(cache_dir):
+    """
+    Retorna o janitor da pasta de cache, criando-o (e retomando as remoções
+    pendentes de execuções anteriores) na primeira chamada.
+    """
+    key = os.path.abspath(cache_dir)
+    with _janitors_lock:
+        janitor = _janitors.get(key)
+        if janitor is None:
+            janitor = _janitors[key] = Janitor(key)
+        return janitor
+
+
+def wait_all(timeout=None):
+    """
+    Espera os janitors do processo esvaziarem suas filas (ex.: antes de a CLI sair).
+    Retorna False se ainda houver remoções pendentes ao fim do prazo.
+    """
+    with _janitors_lock:
+        janitors = list(_janitors.values())
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    idle = True
+    for janitor in janitors:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        idle = janitor.wait(remaining) and idle
+    return idle
+
+
+class Janitor:
+    """
+    Remove arquivos e pastas em segundo plano. Arquivos em uso são tentados de novo
+    com espera exponencial; a lista pendente fica em disco e é retomada na próxima
+    execução. Assim o job termina na hora, mesmo com arquivos ainda bloqueados.
+    """
+
+    def __init__(self, cache_dir, base_delay=0.5, max_delay=60.0, max_attempts=10):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, PENDING_FILENAME)
+        self.trash_dir = os.path.join(cache_dir, TRASH_DIRNAME)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+
+        self._cond = threading.Condition()
+        self._tasks = {}
+        self._log_hooks = {}
+        self._busy = 0
+        self._load()
+
+        self._thread = threading.Thread(target=self._run, name="janitor", daemon=True)
+        self._thread.start()
+
+    # =========================
+    # Agendamento
+    # =========================
+    def delete(self, paths, delay=0.0, message="[CLEANUP] Arquivo removido", log_hook=None):
+        """
+        Agenda a remoção de arquivos. delay: espera antes da primeira tentativa
+        (ex.: dar tempo para o ffmpeg liberar um arquivo cancelado).
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        self._schedule([(path, "file", path) for path in paths], delay, message, log_hook)
+
+    def remove_tree(self, path, log_hook=None):
+        """
+        Remove uma pasta inteira. A pasta é primeiro renomeada para a lixeira do
+        cache, liberando o nome na hora para um novo job; a remoção acontece depois.
+        """
+        target = path
+        try:
+            trash = os.path.join(self.trash_dir, uuid.uuid4().hex)
+            os.makedirs(self.trash_dir, exist_ok=True)
+            os.rename(path, trash)
+            target = trash
+        except FileNotFoundError:
+            return
+        except OSError:
+            # Algum arquivo em uso impede a renomeação: remove no lugar
+            pass
+
+        self._schedule([(target, "tree", path)], 0.0, "[CLEANUP] Pasta removida", log_hook)
+
+    def discard(self, path):
+        """
+        Cancela remoções pendentes que atingiriam path: o próprio arquivo, o conteúdo
+        da pasta ou arquivos com o mesmo nome-base (usado antes de um job reescrevê-los).
+        """
+        path = os.path.abspath(path)
+        stem = os.path.splitext(path)[0] + "."
+        with self._cond:
+            dropped = [
+                task_path for task_path in self._tasks
+                if task_path == path or task_path.startswith(path + os.sep) or task_path.startswith(stem)
+            ]
+            for task_path in dropped:
+                self._tasks.pop(task_path)
+                self._log_hooks.pop(task_path, None)
+            if dropped:
+                self._save()
+
+    def pending(self):
+        with self._cond:
+            return sorted(self._tasks)
+
+    def wait(self, timeout=None):
+        """
+        Bloqueia até a fila esvaziar. Retorna False se o prazo acabar antes.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._tasks and not self._busy, timeout)
+
+    def _schedule(self, items, delay, message, log_hook):
+        due = time.time() + delay
+        with self._cond:
+            for path, kind, label in items:
+                path = os.path.abspath(path)
+                self._tasks[path] = {
+                    "path": path, "kind": kind, "label": label, "attempts": 0, "due": due, "message": message
+                }
+                if log_hook:
+                    self._log_hooks[path] = log_hook
+            if items:
+                self._save()
+                self._cond.notify_all()
+
+    # =========================
+    # Execução
+    # =========================
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.time()
+                due = [task for task in self._tasks.values() if task["due"] <= now]
+                if not due:
+                    next_due = min((task["due"] for task in self._tasks.values()), default=None)
+                    self._cond.wait(None if next_due is None else next_due - now)
+                    continue
+                for task in due:
+                    self._tasks.pop(task["path"])
+                self._busy += 1
+
+            try:
+                retries = [task for task in due if not self._attempt(task)]
+            finally:
+                with self._cond:
+                    for task in retries:
+                        # Agendada de novo por outro job enquanto era processada: mantém a nova
+                        self._tasks.setdefault(task["path"], task)
+                    self._busy -= 1
+                    self._save()
+                    self._cond.notify_all()
+
+    def _attempt(self, task):
+        """
+        Tenta remover. Retorna True quando a tarefa terminou (removido, já inexistente
+        ou tentativas esgotadas) e False quando deve ser tentada de novo.
+        """
+        path = task["path"]
+        label = task.get("label") or path
+        with self._cond:
+            log_hook = self._log_hooks.get(path)
+
+        try:
+            if task["kind"] == "tree":
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            task["attempts"] += 1
+            if task["attempts"] >= self.max_attempts:
+                if log_hook:
+                    log_hook(f"[CLEANUP] Não foi possível remover após {task['attempts']} tentativas: {label} — {e}")
+                self._forget_hook(path)
+                return True
+
+            delay = min(self.base_delay * 2 ** (task["attempts"] - 1), self.max_delay)
+            task["due"] = time.time() + delay
+            if log_hook:
+                log_hook(f"[CLEANUP] Arquivo em uso, nova tentativa em {delay:.1f}s: {label}")
+            return False
+        else:
+            if log_hook:
+                log_hook(f"{task.get('message') or '[CLEANUP] Removido'}: {label}")
+
+        self._forget_hook(path)
+        return True
+
+    def _forget_hook(self, path):
+        with self._cond:
+            if path not in self._tasks:
+                self._log_hooks.pop(path, None)
+
+    # =========================
+    # Persistência
+    # =========================
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                tasks = json.load(f)
+        except (OSError, ValueError):
+            tasks = []
+
+        for task in tasks:
+            if isinstance(task, dict) and task.get("path"):
+                task.setdefault("kind", "file")
+                task.setdefault("attempts", 0)
+                task["due"] = 0.0
+                self._tasks[task["path"]] = task
+
+        # Lixeira deixada por uma execução interrompida
+        try:
+            for name in os.listdir(self.trash_dir):
+                path = os.path.join(self.trash_dir, name)
+                self._tasks.setdefault(path, {"path": path, "kind": "tree", "attempts": 0, "due": 0.0})
+        except OSError:
+            pass
+
+    def _save(self):
+        # Chamado com self._cond adquirido
+        try:
+            if not self._tasks:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._tasks.values()), f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,131 @@
+# core/journal.py
+
+import json
+import os
+import threading
+import time
+
+# Etapas de um item, na ordem em que acontecem
+STAGES = ("resolved", "downloading", "downloaded", "normalized", "moved")
+
+# Acima desta proporção de linhas por item o diário é reescrito ao carregar
+COMPACT_RATIO = 4
+
+
+class CheckpointJournal:
+    """
+    Diário de checkpoints de um job (JSON lines, apenas acréscimos).
+    Cada linha registra a etapa de um item; ao carregar, as linhas do mesmo
+    item são combinadas e a última etapa vale. Uma linha incompleta (queda no
+    meio da escrita) é ignorada.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.items = {}
+        self.playlist = None
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        """
+        Lê o diário existente. Retorna a quantidade de itens registrados.
+        """
+        with self._lock:
+            self.items = {}
+            self.playlist = None
+            lines = 0
+
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        lines += 1
+                        self._apply(record)
+            except OSError:
+                return 0
+
+            if self.items and lines > COMPACT_RATIO * (len(self.items) + 1):
+                self._compact()
+
+            return len(self.items)
+
+    def _apply(self, record):
+        if "playlist" in record:
+            self.playlist = dict(record["playlist"], time=record.get("time"))
+            return
+
+        video_id = record.get("id")
+        if video_id:
+            self.items.setdefault(video_id, {}).update(record)
+
+    def get(self, video_id):
+        with self._lock:
+            item = self.items.get(video_id)
+            return dict(item) if item else None
+
+    def entries(self):
+        """
+        Itens da playlist registrados no diário, na ordem da playlist.
+        """
+        with self._lock:
+            entries = [dict(item["entry"]) for item in self.items.values() if item.get("entry")]
+        return sorted(entries, key=lambda entry: entry.get("playlist_index") or 0)
+
+    def record(self, video_id, stage, **fields):
+        if not video_id or stage not in STAGES:
+            return
+        self._append({"id": video_id, "state": stage, **fields})
+
+    def record_playlist(self, **fields):
+        self._append({"playlist": fields})
+
+    def _append(self, record):
+        record["time"] = time.time()
+        with self._lock:
+            self._apply(record)
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+            except (OSError, TypeError, ValueError):
+                # Sem diário o job continua; apenas não poderá ser retomado do ponto exato
+                pass
+
+    def _compact(self):
+        # Uma linha por item (e pela playlist), gravada de forma atômica
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                if self.playlist is not None:
+                    playlist = {k: v for k, v in self.playlist.items() if k != "time"}
+                    f.write(json.dumps({"playlist": playlist, "time": self.playlist.get("time")}, ensure_ascii=False) + "\n")
+                for item in self.items.values():
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """
+        Job concluído: o diário não é mais necessário.
+        """
+        self.close()
+        with self._lock:
+            self.items = {}
+            self.playlist = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,243 @@
+# core/metrics.py
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Etapas medidas de cada item (e do job, para a limpeza)
+STAGES = ("extract", "format", "download", "postprocess", "normalize", "move", "cleanup")
+
+# Limites (s) dos buckets do histograma de duração das etapas
+BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROMETHEUS_PREFIX = "yad"
+
+COUNTER_HELP = {
+    "bytes_downloaded": "Bytes recebidos nos downloads",
+    "retries": "Novas tentativas feitas pelo downloader",
+    "cache_hits": "Itens ou metadados reaproveitados do cache",
+    "failures": "Falhas reportadas pelos jobs",
+    "deduplicated": "Itens reaproveitados de outra pasta (hardlink, reflink ou cópia)",
+    "encodes": "Conversões feitas pelo downloader: cópia do stream ou recodificação",
+    "jobs": "Jobs encerrados por status",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+class MetricsRegistry:
+    """
+    Totais do processo (todos os jobs), no formato de texto do Prometheus:
+    histograma de duração por etapa e contadores com rótulos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.setdefault(stage, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+            for index, limit in enumerate(BUCKETS):
+                if seconds <= limit:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            counter[key] = counter.get(key, 0) + value
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            name = f"{PROMETHEUS_PREFIX}_stage_seconds"
+            lines.append(f"# HELP {name} Duração das etapas de cada item")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, histogram in sorted(self._histograms.items()):
+                for limit, count in zip(BUCKETS, histogram["buckets"]):
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{limit}"}} {count}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram["count"]}')
+
+            for counter_name, values in sorted(self._counters.items()):
+                name = f"{PROMETHEUS_PREFIX}_{counter_name}_total"
+                lines.append(f"# HELP {name} {COUNTER_HELP.get(counter_name, counter_name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Grava o texto de forma atômica (ex.: para o textfile collector do node_exporter).
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Expõe /metrics num servidor HTTP em segundo plano. Retorna o servidor
+        (shutdown() para parar).
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+# Registro do processo, compartilhado pelos jobs
+registry = MetricsRegistry()
+
+
+class JobMetrics:
+    """
+    Spans de tempo por etapa de cada item e contadores de um job. Cada span e
+    contador também é somado ao registro do processo (exportação Prometheus).
+    Etapas que começam e terminam em hooks diferentes usam begin/end; as demais,
+    span() como gerenciador de contexto.
+    """
+
+    def __init__(self, job_key, url=None, registry=registry):
+        self.job_key = job_key
+        self.url = url
+        self.registry = registry
+        self.status = None
+        self._lock = threading.Lock()
+        self._open = {}
+        self._stages = {}
+        self._items = {}
+        self._counters = {}
+        self._started = time.time()
+        self._started_clock = time.perf_counter()
+        self._wall = None
+
+    @contextlib.contextmanager
+    def span(self, stage, item=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(stage, item, time.perf_counter() - started)
+
+    def begin(self, stage, item=None, detail=None):
+        # Span já aberto (ex.: vários callbacks de progresso) continua valendo
+        with self._lock:
+            self._open.setdefault((stage, item, detail), time.perf_counter())
+
+    def end(self, stage, item=None, detail=None):
+        with self._lock:
+            started = self._open.pop((stage, item, detail), None)
+        if started is not None:
+            self._add(stage, item, time.perf_counter() - started)
+
+    def drop(self, item):
+        """
+        Descarta os spans abertos do item (falha ou cancelamento no meio da etapa).
+        """
+        with self._lock:
+            for key in [key for key in self._open if key[1] == item]:
+                self._open.pop(key)
+
+    def count(self, name, value=1, **labels):
+        if not value:
+            return
+        with self._lock:
+            key = name + _format_labels(_label_key(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+        self.registry.inc(name, value, **labels)
+
+    def _add(self, stage, item, seconds):
+        with self._lock:
+            total = self._stages.setdefault(stage, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] += seconds
+            total["max_seconds"] = max(total["max_seconds"], seconds)
+            if item is not None:
+                stages = self._items.setdefault(item, {})
+                stages[stage] = stages.get(stage, 0.0) + seconds
+        self.registry.observe(stage, seconds)
+
+    def finish(self, status):
+        self.status = status
+        self._wall = time.perf_counter() - self._started_clock
+        self.count("jobs", status=status)
+
+    def summary(self, items=True) -> dict:
+        """
+        Resumo do job: tempo total, tempo por etapa, contadores e (opcional) o
+        tempo de cada etapa por item.
+        """
+        wall = self._wall if self._wall is not None else time.perf_counter() - self._started_clock
+        with self._lock:
+            summary = {
+                "job": self.job_key,
+                "url": self.url,
+                "status": self.status,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self._started)),
+                "wall_seconds": round(wall, 3),
+                "stages": {
+                    stage: {
+                        "count": total["count"],
+                        "seconds": round(total["seconds"], 3),
+                        "max_seconds": round(total["max_seconds"], 3),
+                    }
+                    for stage, total in sorted(self._stages.items(), key=lambda pair: STAGES.index(pair[0]))
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+            if items:
+                summary["items"] = {
+                    item: {stage: round(seconds, 3) for stage, seconds in stages.items()}
+                    for item, stages in self._items.items()
+                }
+        return summary
+
+    def write_summary(self, directory):
+        """
+        Grava o resumo em <directory>/<job_key>.json. Retorna o caminho.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.job_key}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
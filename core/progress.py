@@ -0,0 +1,197 @@
+# core/progress.py
+
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class ItemProgress:
+    """Progresso de um item (vídeo) da fila."""
+    key: str
+    title: str = ""
+    status: str = "downloading"  # downloading / finished
+    playlist_index: Optional[int] = None
+    playlist_count: Optional[int] = None
+    downloaded_bytes: int = 0
+    total_bytes: Optional[int] = None
+    speed: float = 0.0
+    eta: Optional[float] = None
+    fragment_index: Optional[int] = None  # fragmentos concluídos (DASH/HLS)
+    fragment_count: Optional[int] = None
+
+    @property
+    def percent(self) -> float:
+        if self.status == "finished":
+            return 100.0
+        if not self.total_bytes:
+            return 0.0
+        return min(self.downloaded_bytes / self.total_bytes * 100, 100.0)
+
+
+@dataclass
+class PlaylistProgress:
+    """Totais agregados de todos os itens do job."""
+    items_total: Optional[int] = None
+    items_finished: int = 0
+    items_skipped: int = 0
+    items_active: int = 0
+    downloaded_bytes: int = 0
+    total_bytes: Optional[int] = None
+    speed: float = 0.0
+    eta: Optional[float] = None
+    concurrency: int = 1           # itens baixando ao mesmo tempo (nível atual)
+    fragment_concurrency: int = 1  # fragmentos simultâneos por item
+
+    @property
+    def percent(self) -> float:
+        if not self.total_bytes:
+            return 0.0
+        return min(self.downloaded_bytes / self.total_bytes * 100, 100.0)
+
+
+@dataclass
+class ProgressEvent:
+    """Evento emitido para os consumidores (GUI, CLI, métricas)."""
+    item: ItemProgress
+    playlist: PlaylistProgress
+    timestamp: float = field(default_factory=time.time)
+
+
+class ProgressTracker:
+    """
+    Recebe os callbacks de progresso do yt-dlp (de qualquer thread), mantém o
+    estado por item e agrega os totais da playlist. Os eventos são limitados a
+    rate_hz por segundo; início e fim de item sempre são emitidos.
+    """
+
+    def __init__(self, rate_hz: float = 10.0):
+        self.min_interval = 1.0 / rate_hz if rate_hz else 0.0
+        self.items_total = None
+        self._items = {}
+        self._files = {}
+        self._skipped = 0
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def set_total(self, items_total):
+        with self._lock:
+            self.items_total = items_total
+
+    def mark_skipped(self):
+        with self._lock:
+            self._skipped += 1
+
+    def update(self, d, fragment_concurrency=1) -> Optional[ProgressEvent]:
+        """
+        Atualiza o estado com o dicionário do progress_hook do yt-dlp.
+        Retorna um ProgressEvent ou None quando o evento foi agregado ao próximo.
+        fragment_concurrency: fragmentos baixados ao mesmo tempo neste item.
+        """
+        status = d.get("status")
+        if status not in ("downloading", "finished"):
+            return None
+
+        info = d.get("info_dict") or {}
+        key = str(info.get("id") or d.get("filename") or d.get("tmpfilename"))
+
+        with self._lock:
+            item = self._items.get(key)
+            is_new = item is None
+            if is_new:
+                item = self._items[key] = ItemProgress(key=key)
+
+            item.title = info.get("title") or item.title
+            item.playlist_index = info.get("playlist_index") or item.playlist_index
+            item.playlist_count = info.get("playlist_count") or item.playlist_count
+            item.fragment_index = d.get("fragment_index")
+            item.fragment_count = d.get("fragment_count")
+
+            # Um item pode baixar mais de um arquivo (vídeo + áudio): soma os arquivos
+            files = self._files.setdefault(key, {})
+            filename = d.get("filename") or d.get("tmpfilename") or key
+            downloaded, total = files.get(filename, (0, None))
+            downloaded = d.get("downloaded_bytes") or downloaded
+            total = d.get("total_bytes") or self._fragment_estimate(d, fragment_concurrency) or d.get("total_bytes_estimate") or total
+            if status == "finished":
+                total = total or downloaded
+                downloaded = total
+            files[filename] = (downloaded, total)
+
+            item.downloaded_bytes = sum(done for done, _ in files.values())
+            totals = [size for _, size in files.values()]
+            item.total_bytes = sum(totals) if all(totals) else item.total_bytes
+            item.speed = d.get("speed") or 0.0
+            remaining = (item.total_bytes or 0) - item.downloaded_bytes
+            item.eta = remaining / item.speed if item.total_bytes and item.speed else d.get("eta")
+
+            if status == "finished":
+                item.status = "finished"
+                item.speed = 0.0
+                item.eta = 0
+            else:
+                # Arquivo seguinte do mesmo item (ex.: áudio depois do vídeo)
+                item.status = "downloading"
+
+            if self.items_total is None and item.playlist_count:
+                self.items_total = item.playlist_count
+
+            now = time.monotonic()
+            if not is_new and status != "finished" and now - self._last_emit < self.min_interval:
+                return None
+            self._last_emit = now
+
+            return ProgressEvent(item=self._copy_item(item), playlist=self._aggregate())
+
+    @staticmethod
+    def _fragment_estimate(d, fragment_concurrency):
+        """
+        Tamanho total estimado de um download fragmentado com fragmentos simultâneos.
+        A estimativa do yt-dlp divide os bytes de todos os fragmentos em andamento
+        pelos concluídos (+1) e superestima o total no início; aqui os fragmentos em
+        andamento contam como meio concluídos.
+        """
+        count = d.get("fragment_count")
+        downloaded = d.get("downloaded_bytes")
+        if fragment_concurrency <= 1 or not count or not downloaded or d.get("status") != "downloading":
+            return None
+
+        done = min(d.get("fragment_index") or 0, count)
+        in_flight = min(fragment_concurrency, count - done)
+        fraction = (done + in_flight / 2) / count
+        return int(downloaded / fraction) if fraction > 0 else None
+
+    def _aggregate(self) -> PlaylistProgress:
+        items = list(self._items.values())
+        finished = [item for item in items if item.status == "finished"]
+        active = [item for item in items if item.status != "finished"]
+
+        downloaded = sum(item.downloaded_bytes for item in items)
+        known_totals = [item.total_bytes for item in items if item.total_bytes]
+        total = sum(known_totals) if known_totals else None
+
+        # Itens ainda não iniciados: estimados pelo tamanho médio dos conhecidos
+        if total and self.items_total:
+            not_started = self.items_total - self._skipped - len(items)
+            if not_started > 0:
+                total += int(total / len(known_totals) * not_started)
+
+        speed = sum(item.speed for item in active)
+        eta = (total - downloaded) / speed if total and speed else None
+
+        return PlaylistProgress(
+            items_total=self.items_total,
+            items_finished=len(finished),
+            items_skipped=self._skipped,
+            items_active=len(active),
+            downloaded_bytes=downloaded,
+            total_bytes=total,
+            speed=speed,
+            eta=eta,
+        )
+
+    @staticmethod
+    def _copy_item(item: ItemProgress) -> ItemProgress:
+        return ItemProgress(**item.__dict__)
@@ -0,0 +1,104 @@
+# core/registry.py
+
+import os
+import threading
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class ItemFiles:
+    parts: set = field(default_factory=set)       # .part em andamento
+    files: set = field(default_factory=set)       # downloads e intermediários (.fNNN, fonte antes do pós-processamento)
+    product: Optional[str] = None                 # arquivo entregue pelo yt-dlp depois do pós-processamento
+    cancelled: bool = False
+
+
+class FileRegistry:
+    """
+    Registro em memória dos arquivos de cada item (chave: ID do vídeo), alimentado
+    pelos hooks de progresso e de pós-processamento. Limpeza, coleta para
+    normalização e cancelamento consultam o registro em vez de varrer as pastas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self._owners = {}
+
+    def add(self, key, path, part=False):
+        path = os.path.abspath(path)
+        with self._lock:
+            item = self._items.setdefault(key, ItemFiles())
+            (item.parts if part else item.files).add(path)
+            self._owners[path] = key
+
+    def set_product(self, key, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            item = self._items.setdefault(key, ItemFiles())
+            item.product = path
+            item.files.discard(path)
+            self._owners[path] = key
+
+    def owner(self, path):
+        with self._lock:
+            return self._owners.get(os.path.abspath(path))
+
+    def products(self):
+        """
+        (chave, arquivo produzido) dos itens não cancelados.
+        """
+        with self._lock:
+            return [(key, item.product) for key, item in self._items.items() if item.product and not item.cancelled]
+
+    def kept(self, key):
+        """
+        Arquivos baixados do item além do produzido (mantidos com keep_original_file).
+        """
+        with self._lock:
+            item = self._items.get(key)
+            return sorted(item.files) if item else []
+
+    def paths(self, key=None):
+        with self._lock:
+            if key is None:
+                items = list(self._items.values())
+            else:
+                items = [self._items[key]] if key in self._items else []
+            result = set()
+            for item in items:
+                result |= item.parts | item.files
+                if item.product:
+                    result.add(item.product)
+            return sorted(result)
+
+    def cancel(self, key):
+        with self._lock:
+            self._items.setdefault(key, ItemFiles()).cancelled = True
+
+    def is_cancelled(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            return bool(item and item.cancelled)
+
+    def cancelled_paths(self):
+        with self._lock:
+            keys = [key for key, item in self._items.items() if item.cancelled]
+        return [path for key in keys for path in self.paths(key)]
+
+    def forget(self, path):
+        """
+        Arquivo removido ou movido pelo próprio job: deixa de ser rastreado.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            key = self._owners.pop(path, None)
+            item = self._items.get(key)
+            if item is None:
+                return
+            item.parts.discard(path)
+            item.files.discard(path)
+            if item.product == path:
+                item.product = None
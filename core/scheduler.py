@@ -0,0 +1,305 @@
+# core/scheduler.py
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from core.concurrency import ConnectionBudget
+
+
+@dataclass
+class Job:
+    """Um download na fila: URL + opções do Downloader (somente valores serializáveis)."""
+    url: str
+    options: dict
+    priority: int = 0
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    created_at: float = field(default_factory=time.time)
+    status: str = "queued"  # queued / running / done / failed / cancelled
+    error: Optional[str] = None  # motivo da falha quando o Downloader não pôde ser criado
+
+
+class BandwidthLimiter:
+    """
+    Limite global de banda (bytes/s) compartilhado por todos os downloads.
+    Cada chamada de throttle() reserva tempo em um relógio virtual e dorme
+    até a sua vez; burst segundos de folga evitam pausas em blocos pequenos.
+    """
+
+    def __init__(self, rate: float, burst: float = 0.5):
+        self.rate = rate
+        self.burst = burst
+        self._next_free = time.monotonic()
+        self._lock = threading.Lock()
+
+    def throttle(self, nbytes: int):
+        if not self.rate or nbytes <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._next_free = max(self._next_free, now - self.burst) + nbytes / self.rate
+            delay = self._next_free - now - self.burst
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class JobScheduler:
+    """
+    Fila de downloads com prioridade (maior primeiro), limite global de jobs
+    simultâneos, limite de processos ffmpeg e limite agregado de banda.
+    O limite de conexões (max_connections) vale para a soma de itens e
+    fragmentos de todos os jobs. A fila é gravada em state_path e sobrevive a reinícios: jobs que estavam
+    em execução voltam para a fila. Um job pausado quando start() já retornou (ex.: durante a
+    normalização) fica suspenso e volta para a fila ao ser retomado ou cancelado.
+    """
+
+    def __init__(
+        self,
+        state_path,
+        max_concurrent_jobs=2,
+        max_ffmpeg_jobs=None,
+        bandwidth_limit=None,
+        max_connections=None,
+        downloader_factory=None,
+        job_hooks=None,
+        on_job_started=None,
+        on_job_finished=None,
+    ):
+        self.state_path = state_path
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.ffmpeg_slots = threading.BoundedSemaphore(max_ffmpeg_jobs or os.cpu_count() or 1)
+        self.rate_limiter = BandwidthLimiter(bandwidth_limit) if bandwidth_limit else None
+        self.connection_budget = ConnectionBudget(max_connections) if max_connections else None
+
+        self.downloader_factory = downloader_factory
+        self.job_hooks = job_hooks
+        self.on_job_started = on_job_started
+        self.on_job_finished = on_job_finished
+
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._running = {}
+        # Jobs suspensos (pausados depois que start() retornou), à espera de resume()
+        self._parked = {}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._stopping = False
+
+        self._load()
+
+    # =========================
+    # Fila
+    # =========================
+    def submit(self, url, priority=0, **options) -> Job:
+        job = Job(url=url, options=options, priority=priority)
+        with self._cond:
+            self._enqueue(job)
+            self._save()
+            self._cond.notify_all()
+        return job
+
+    def pending(self):
+        with self._cond:
+            return [job for job in self._jobs.values() if job.status == "queued"]
+
+    def running(self):
+        with self._cond:
+            return list(self._running.values())
+
+    def active(self):
+        """Jobs em andamento e suspensos (pausados depois que start() retornou), com seus Downloaders."""
+        with self._cond:
+            parked = [(self._jobs[job_id], downloader) for job_id, downloader in self._parked.items() if job_id in self._jobs]
+            return list(self._running.values()) + parked
+
+    def cancel(self, job_id):
+        """
+        Remove da fila um job ainda não iniciado ou cancela o download em andamento.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            downloader = self._running.get(job_id, (job, None))[1] or self._parked.get(job_id)
+            if downloader is None:
+                job.status = "cancelled"
+                del self._jobs[job_id]
+                self._save()
+                return
+
+        # Em andamento ou suspenso (um job suspenso volta à fila só para a limpeza)
+        downloader.cancel()
+
+    def clear(self):
+        """Descarta todos os jobs ainda não iniciados (os suspensos continuam)."""
+        with self._cond:
+            for job_id in [job.job_id for job in self._jobs.values() if job.status == "queued"]:
+                if job_id not in self._parked:
+                    del self._jobs[job_id]
+            self._heap = [entry for entry in self._heap if entry[2] in self._parked]
+            heapq.heapify(self._heap)
+            self._save()
+
+    # =========================
+    # Execução
+    # =========================
+    def start(self):
+        with self._cond:
+            if self._dispatcher and self._dispatcher.is_alive():
+                return
+            self._stopping = False
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="scheduler", daemon=True)
+            self._dispatcher.start()
+
+    def stop(self):
+        """Para de iniciar novos jobs; os que estão rodando continuam."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (
+                    not self._heap or len(self._running) >= self.max_concurrent_jobs
+                ):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+
+                job = self._pop_next()
+                if job is None:
+                    continue
+
+                downloader = self._parked.pop(job.job_id, None)
+                if downloader is None:
+                    try:
+                        downloader = self._build_downloader(job)
+                    except Exception as e:
+                        # Opção inválida (ex.: queue.json de outra versão): o job falha e a fila segue
+                        job.status = "failed"
+                        job.error = str(e)
+                        self._jobs.pop(job.job_id, None)
+                        self._save()
+
+                if downloader is not None:
+                    job.status = "running"
+                    self._running[job.job_id] = (job, downloader)
+                    self._save()
+
+            if downloader is None:
+                if self.on_job_finished:
+                    self.on_job_finished(job, None)
+                continue
+
+            threading.Thread(
+                target=self._run_job, args=(job, downloader), name=f"job-{job.job_id}", daemon=True
+            ).start()
+
+    def _build_downloader(self, job):
+        if self.downloader_factory is None:
+            from core.downloader import Downloader
+            factory = Downloader
+        else:
+            factory = self.downloader_factory
+
+        hooks = self.job_hooks(job) if self.job_hooks else {}
+        return factory(
+            url=job.url,
+            ffmpeg_slots=self.ffmpeg_slots,
+            rate_limiter=self.rate_limiter,
+            connection_budget=self.connection_budget,
+            **job.options,
+            **hooks
+        )
+
+    def _run_job(self, job, downloader):
+        if self.on_job_started:
+            self.on_job_started(job, downloader)
+
+        try:
+            downloader.start()
+        finally:
+            if downloader.suspended:
+                # Pausado: permanece na fila persistida e volta a rodar ao ser retomado
+                status = "queued"
+            else:
+                status = downloader.outcome
+
+            with self._cond:
+                self._running.pop(job.job_id, None)
+                job.status = status
+                if status == "queued":
+                    self._parked[job.job_id] = downloader
+                    downloader.restart_hook = lambda: self._unpark(job.job_id)
+                else:
+                    self._jobs.pop(job.job_id, None)
+                self._save()
+                self._cond.notify_all()
+
+            if status == "queued" and not downloader.paused:
+                # Retomado (ou cancelado) enquanto start() retornava
+                self._unpark(job.job_id)
+
+            if self.on_job_finished:
+                self.on_job_finished(job, downloader)
+
+    def _unpark(self, job_id):
+        """Devolve à fila um job suspenso; o mesmo Downloader é executado de novo."""
+        with self._cond:
+            downloader = self._parked.get(job_id)
+            job = self._jobs.get(job_id)
+            if downloader is None or job is None or job.status != "queued":
+                return
+            downloader.restart_hook = None
+            if any(queued_id == job_id for _, _, queued_id in self._heap):
+                return
+            heapq.heappush(self._heap, (-job.priority, next(self._seq), job.job_id))
+            self._cond.notify_all()
+
+    # =========================
+    # Persistência
+    # =========================
+    def _enqueue(self, job):
+        self._jobs[job.job_id] = job
+        heapq.heappush(self._heap, (-job.priority, next(self._seq), job.job_id))
+
+    def _pop_next(self):
+        while self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job and job.status == "queued":
+                return job
+        return None
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for data in sorted(saved.get("jobs", []), key=lambda item: item.get("created_at", 0)):
+            job = Job(**data)
+            # Jobs interrompidos no meio voltam para a fila
+            job.status = "queued"
+            self._enqueue(job)
+
+    def _save(self):
+        jobs = [asdict(job) for job in self._jobs.values() if job.status in ("queued", "running")]
+
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": jobs}, f, indent=2)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,254 @@
+# core/session.py
+
+import contextlib
+import os
+import sys
+import threading
+
+# Opções que definem a sessão HTTP (conexões, cookies, proxy): uma instância só
+# é reaproveitada por jobs com os mesmos valores
+SESSION_KEYS = (
+    "proxy",
+    "source_address",
+    "cookiefile",
+    "cookiesfrombrowser",
+    "nocheckcertificate",
+    "http_headers",
+    "impersonate",
+)
+
+# Instâncias ociosas mantidas por sessão; as excedentes são fechadas
+MAX_IDLE = 8
+
+# Atributos internos do YoutubeDL usados para trocar as opções entre jobs,
+# conferidos com o yt-dlp fixado em requirements.txt (2025.12.08). Se algum
+# faltar em outra versão, cada job usa uma instância nova em vez do pool.
+INTERNAL_ATTRIBUTES = (
+    "_parse_outtmpl",
+    "format_selector",
+    "build_format_selector",
+    "_pps",
+    "add_post_processor",
+    "_download_retcode",
+    "_playlist_level",
+    "_playlist_urls",
+)
+
+
+def default_cache_dir():
+    """
+    Pasta persistente do cache do yt-dlp (código do player e funções de
+    assinatura), fora da pasta do programa para sobreviver a atualizações.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "YouTube-Audio-Downloader", "yt-dlp")
+
+
+def _session_key(params):
+    return tuple((key, repr(params.get(key))) for key in SESSION_KEYS)
+
+
+def supports_pooling(ydl) -> bool:
+    """A instância tem todos os atributos internos que o pool altera."""
+    return all(hasattr(ydl, name) for name in INTERNAL_ATTRIBUTES)
+
+
+class PooledSession:
+    """
+    Um YoutubeDL do pool e os hooks do job que o está usando. A instância é criada
+    com hooks fixos que repassam os eventos para o job atual (os hooks também são
+    chamados pelas threads de fragmentos, então não podem ser por thread).
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.ydl = None
+        self.uses = 0
+        self.progress_hooks = []
+        self.postprocessor_hooks = []
+        self._saved_params = None
+
+    def _on_progress(self, d):
+        for hook in self.progress_hooks:
+            hook(d)
+
+    def _on_postprocessor(self, d):
+        for hook in self.postprocessor_hooks:
+            hook(d)
+
+
+class SessionPool:
+    """
+    Instâncias de YoutubeDL de vida longa compartilhadas pelos jobs do processo.
+    Cada instância mantém entre os jobs as conexões HTTP (keep-alive), os cookies
+    e os extratores já criados, com o código do player e as funções de assinatura
+    em memória; o cachedir persistente evita baixá-los de novo ao reiniciar.
+
+    Ao emprestar, as opções do job são aplicadas à instância (modelo de saída,
+    seletor de formato, pós-processadores e hooks) e, ao devolver, as opções
+    anteriores são restauradas. Cada instância atende um job por vez.
+    Com um yt-dlp sem os atributos internos usados nessa troca, o pool é
+    desativado e cada job recebe um YoutubeDL novo.
+    """
+
+    def __init__(self, cache_dir=None, max_idle=MAX_IDLE):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self.pooling = None  # decidido na primeira instância criada
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def session(self, params):
+        """
+        Empresta um YoutubeDL configurado com as opções do job (mesmo formato do
+        dicionário passado ao construtor do YoutubeDL).
+        """
+        session = self._acquire(params)
+        if session is None:
+            with self._fresh(params) as ydl:
+                yield ydl
+            return
+        try:
+            self._bind(session, params)
+            yield session.ydl
+        finally:
+            self._release(session)
+
+    def warm_up(self, params=None):
+        """
+        Deixa uma instância ociosa pronta (com o extrator do YouTube criado) para
+        que o primeiro job não pague a criação.
+        """
+        with self.session(params or {"quiet": True, "no_warnings": True}) as ydl:
+            ydl.get_info_extractor("Youtube")
+
+    def close(self):
+        """Fecha as instâncias ociosas (conexões e cookies)."""
+        with self._lock:
+            sessions = [session for idle in self._idle.values() for session in idle]
+            self._idle.clear()
+        for session in sessions:
+            session.ydl.close()
+
+    # =========================
+    # Empréstimo
+    # =========================
+    def _acquire(self, params):
+        if self.pooling is False:
+            return None
+
+        key = _session_key(params)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                session = idle.pop()
+                session.uses += 1
+                return session
+            self.created += 1
+
+        from core.downloader import load_yt_dlp
+
+        session = PooledSession(key)
+        options = {name: params[name] for name in SESSION_KEYS if name in params}
+        session.ydl = load_yt_dlp().YoutubeDL({
+            **options,
+            "quiet": params.get("quiet", False),
+            "no_warnings": params.get("no_warnings", False),
+            "cachedir": self.cache_dir,
+            "progress_hooks": [session._on_progress],
+            "postprocessor_hooks": [session._on_postprocessor],
+        })
+        session.uses = 1
+
+        if self.pooling is None:
+            self.pooling = supports_pooling(session.ydl)
+        if not self.pooling:
+            session.ydl.close()
+            return None
+        return session
+
+    def _fresh(self, params):
+        """YoutubeDL só para este job, criado com as opções dele (sem o pool)."""
+        from core.downloader import load_yt_dlp
+
+        return load_yt_dlp().YoutubeDL({"cachedir": self.cache_dir, **params})
+
+    def _bind(self, session, params):
+        from yt_dlp.postprocessor import get_postprocessor
+
+        ydl = session.ydl
+        session._saved_params = dict(ydl.params)
+
+        options = dict(params)
+        session.progress_hooks = list(options.pop("progress_hooks", []))
+        session.postprocessor_hooks = list(options.pop("postprocessor_hooks", []))
+        postprocessors = options.pop("postprocessors", [])
+        options.pop("cachedir", None)
+
+        ydl.params.update(options)
+        # Mesmo tratamento do construtor do YoutubeDL
+        ydl._parse_outtmpl()
+        selector = ydl.params.get("format")
+        ydl.format_selector = (
+            selector if selector in (None, "-") or callable(selector)
+            else ydl.build_format_selector(selector)
+        )
+
+        ydl._pps = {when: [] for when in ydl._pps}
+        for pp_def_raw in postprocessors:
+            pp_def = dict(pp_def_raw)
+            when = pp_def.pop("when", "post_process")
+            ydl.add_post_processor(get_postprocessor(pp_def.pop("key"))(ydl, **pp_def), when=when)
+
+    def _release(self, session):
+        ydl = session.ydl
+        session.progress_hooks = []
+        session.postprocessor_hooks = []
+
+        if session._saved_params is not None:
+            ydl.params.clear()
+            ydl.params.update(session._saved_params)
+            session._saved_params = None
+        ydl._pps = {when: [] for when in ydl._pps}
+
+        # Estado de um download que não pode passar para o próximo job
+        ydl._download_retcode = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls.clear()
+
+        with self._lock:
+            idle = self._idle.setdefault(session.key, [])
+            if len(idle) < self.max_idle:
+                idle.append(session)
+                return
+        ydl.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def session_pool() -> SessionPool:
+    """Pool do processo, criado no primeiro uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool()
+        return _pool
+
+
+def close_sessions():
+    """Fecha as sessões ociosas do pool do processo (ao encerrar o programa)."""
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.close()
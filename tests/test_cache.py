@@ -0,0 +1,56 @@
+# tests/test_cache.py
+
+import threading
+
+from core.cache import LoudnessCache
+
+MEASURED = {"input_i": -18.0, "input_tp": -1.0, "input_lra": 5.0, "input_thresh": -28.0}
+
+
+def test_measurements_are_shared_across_targets(tmp_path):
+    cache = LoudnessCache(str(tmp_path / "loudness"))
+    cache.put("abc", -14.0, dict(MEASURED, target_offset=0.4))
+
+    assert cache.get("abc", -14.0) == dict(MEASURED, target_offset=0.4)
+    # Outro alvo: mesmas medições de entrada, sem o offset do loudnorm daquele alvo
+    assert cache.get("abc", -16) == dict(MEASURED, target_offset=0.0)
+    assert cache.get("other", -14.0) is None
+
+    cache.put("abc", -16.0, dict(MEASURED, target_offset=-0.2))
+    assert cache.get("abc", -14.0)["target_offset"] == 0.4
+    assert cache.get("abc", -16.0)["target_offset"] == -0.2
+
+
+def test_concurrent_instances_do_not_lose_entries(tmp_path):
+    directory = str(tmp_path / "loudness")
+    errors = []
+
+    def writer(prefix):
+        cache = LoudnessCache(directory)
+        try:
+            for index in range(150):
+                cache.put(f"{prefix}{index % 50}", -14.0 - index % 3, dict(MEASURED, target_offset=0.0))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(prefix,)) for prefix in ("a", "b", "a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    reader = LoudnessCache(directory)
+    for prefix in ("a", "b"):
+        for index in range(50):
+            assert reader.get(f"{prefix}{index}", -14.0) is not None
+    assert not list((tmp_path / "loudness").glob("*.tmp"))
+
+
+def test_write_failure_is_ignored(tmp_path):
+    blocker = tmp_path / "loudness"
+    blocker.write_text("não é uma pasta")
+    cache = LoudnessCache(str(blocker))
+
+    cache.put("abc", -14.0, MEASURED)
+    assert cache.get("abc", -14.0) is None
@@ -0,0 +1,60 @@
+# tests/test_cancel.py
+
+import threading
+
+from core import Downloader
+
+
+def make_downloader(tmp_path, cancel_policy):
+    return Downloader(
+        url="https://example.com/playlist?list=cancel",
+        output_path=str(tmp_path),
+        audio_format="mp3",
+        quality="192",
+        allow_playlist=True,
+        keep_original_file=False,
+        normalize_enabled=False,
+        cancel_policy=cancel_policy,
+    )
+
+
+def finished_item(tmp_path, video_id):
+    path = tmp_path / f"{video_id}.mp3"
+    path.write_bytes(b"audio")
+    return {"status": "finished", "postprocessor": "ExtractAudio", "info_dict": {"id": video_id, "filepath": str(path)}}
+
+
+def test_cancel_policy_runs_outside_the_lock(tmp_path):
+    lock_free = []
+
+    def policy(file_path):
+        # Outra thread (outro item em andamento) precisa conseguir o lock enquanto a pergunta está aberta
+        def other_worker():
+            acquired = downloader._lock.acquire(timeout=1)
+            lock_free.append(acquired)
+            if acquired:
+                downloader._lock.release()
+
+        worker = threading.Thread(target=other_worker)
+        worker.start()
+        worker.join()
+        return False
+
+    downloader = make_downloader(tmp_path, policy)
+    downloader.cancel()
+    downloader._postprocessor_hook(finished_item(tmp_path, "a"))
+
+    assert lock_free == [True]
+    assert downloader.cancel_requested and not downloader.keep_after_cancel
+
+
+def test_only_first_finished_item_asks(tmp_path):
+    asked = []
+    downloader = make_downloader(tmp_path, lambda file_path: asked.append(file_path) or True)
+    downloader.cancel()
+
+    downloader._postprocessor_hook(finished_item(tmp_path, "a"))
+    downloader._postprocessor_hook(finished_item(tmp_path, "b"))
+
+    assert len(asked) == 1 and asked[0].endswith("a.mp3")
+    assert downloader.keep_after_cancel
@@ -0,0 +1,38 @@
+# tests/test_cli.py
+
+import json
+
+import cli
+from core import Downloader
+
+
+def cancel_during_normalize(self):
+    # Playlist cancelada depois do último download, durante a normalização:
+    # nenhum item termina depois do pedido e start() retorna normalmente
+    self.cancel()
+
+
+def run_cli(tmp_path, monkeypatch, start, *args):
+    monkeypatch.setattr(Downloader, "start", start)
+    # Sem trocar o tratamento de Ctrl+C do próprio pytest
+    monkeypatch.setattr(cli.signal, "signal", lambda signum, handler: None)
+    results = tmp_path / "results.jsonl"
+    code = cli.main(["-o", str(tmp_path / "out"), "--results", str(results), *args, "https://example.com/playlist?list=a"])
+    return code, [json.loads(line) for line in results.read_text(encoding="utf-8").splitlines()]
+
+
+def test_playlist_cancelled_during_normalize_reports_cancelled(tmp_path, monkeypatch):
+    code, results = run_cli(tmp_path, monkeypatch, cancel_during_normalize, "--playlist", "--normalize")
+
+    assert results[0]["status"] == "cancelled"
+    assert code == cli.EXIT_INTERRUPTED
+
+
+def test_failed_and_ok_statuses(tmp_path, monkeypatch):
+    code, results = run_cli(tmp_path, monkeypatch, lambda self: self.errors.append("falhou"))
+    assert results[0]["status"] == "failed"
+    assert code == cli.EXIT_FAILED
+
+    code, results = run_cli(tmp_path, monkeypatch, lambda self: None)
+    assert results[-1]["status"] == "ok"
+    assert code == cli.EXIT_OK
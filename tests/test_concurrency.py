@@ -0,0 +1,109 @@
+# tests/test_concurrency.py
+
+import time
+
+from core import Downloader
+from core import concurrency as concurrency_module
+from core.concurrency import AdaptiveConcurrency
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def feed_growing_throughput(concurrency, rounds):
+    # Vazão 10x maior a cada intervalo: sempre há ganho para subir o nível
+    for round_index in range(rounds):
+        time.sleep(concurrency.interval * 2)
+        concurrency.record(10 ** (round_index + 3))
+
+
+def test_level_does_not_grow_without_busy_slots():
+    concurrency = AdaptiveConcurrency(max_items=1, max_fragments=4, initial=1, interval=0.01)
+    feed_growing_throughput(concurrency, 6)
+    assert concurrency.level == 1
+
+
+def test_single_item_slot_lets_fragments_grow():
+    concurrency = AdaptiveConcurrency(max_items=1, max_fragments=4, initial=1, interval=0.01)
+    assert concurrency.acquire(timeout=1)
+    try:
+        feed_growing_throughput(concurrency, 6)
+    finally:
+        concurrency.release()
+
+    assert concurrency.item_limit == 1
+    assert concurrency.fragment_limit == 4
+
+
+def run_busy_items(concurrency, clock, rounds, capacity):
+    # Vazão proporcional às conexões reais (itens × fragmentos), até capacity
+    for _ in range(rounds):
+        clock.now += concurrency.interval
+        connections = concurrency.item_limit * concurrency.fragment_limit
+        concurrency.record(1000 * min(connections, capacity))
+
+
+def test_multi_item_level_steps_change_connections(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency_module, "time", clock)
+    changes = []
+    concurrency = AdaptiveConcurrency(
+        max_items=4, max_fragments=4, initial=4, interval=1.0, hold_intervals=2,
+        on_change=lambda previous, level, reason: changes.append((previous, level)),
+    )
+    for _ in range(4):
+        assert concurrency.acquire(timeout=0)
+
+    run_busy_items(concurrency, clock, 20, capacity=100)
+
+    assert (concurrency.item_limit, concurrency.fragment_limit) == (4, 4)
+    assert [level for _, level in changes] == [8, 12, 16]
+    # O nível anunciado é sempre o número real de conexões
+    for previous, level in changes:
+        assert previous != level
+        assert level in concurrency.levels
+
+
+def test_multi_item_level_settles_at_capacity(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency_module, "time", clock)
+    concurrency = AdaptiveConcurrency(max_items=4, max_fragments=4, initial=4, interval=1.0, hold_intervals=2)
+    for _ in range(4):
+        assert concurrency.acquire(timeout=0)
+
+    levels = []
+    for _ in range(30):
+        run_busy_items(concurrency, clock, 1, capacity=8)
+        levels.append(concurrency.level)
+
+    # Testa 12, não ganha, volta para 8 e fica entre esses dois níveis reais
+    assert (concurrency.item_limit, concurrency.fragment_limit) in ((4, 2), (4, 3))
+    assert set(levels[5:]) <= {8, 12}
+    assert levels.count(8) > levels.count(12)
+
+
+def test_single_video_takes_an_item_slot(tmp_path):
+    downloader = Downloader(
+        url="https://example.com/watch?v=single",
+        output_path=str(tmp_path),
+        audio_format="mp3",
+        quality="192",
+        allow_playlist=False,
+        keep_original_file=False,
+        normalize_enabled=False,
+        adaptive_concurrency=True,
+        max_fragment_downloads=4,
+    )
+    downloader.concurrency.interval = 0.01
+    downloader._process_entry = lambda ydl, entry: feed_growing_throughput(downloader.concurrency, 6)
+
+    downloader._process_entry_in_slot(None, {"id": "single"})
+
+    assert downloader.concurrency.fragment_limit == 4
+    # A vaga é devolvida ao fim do item
+    assert downloader.concurrency.acquire(timeout=0)
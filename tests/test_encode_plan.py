@@ -0,0 +1,67 @@
+# tests/test_encode_plan.py
+
+import json
+
+from core.ffmpeg import loudness_on_target, parse_ffmpeg_info, parse_probe, plan_encode, transcode_command
+
+
+def source(codec, bitrate=None):
+    return {"codec": codec, "bitrate": bitrate, "sample_rate": 48000, "channels": 2}
+
+
+def test_same_codec_in_bitrate_range_is_copied():
+    assert plan_encode(source("aac", 129.5), "m4a", "128").copy
+    assert plan_encode(source("opus", 140), "opus", "128").copy
+    # Dentro de ±15% da qualidade pedida
+    assert plan_encode(source("mp3", 220), "mp3", "192").copy
+
+
+def test_other_codec_is_encoded():
+    plan = plan_encode(source("opus", 128), "m4a", "128")
+    assert plan.action == "encode"
+    assert "opus" in plan.reason
+
+
+def test_bitrate_out_of_range_or_unknown_is_encoded():
+    assert plan_encode(source("aac", 256), "m4a", "128").action == "encode"
+    assert plan_encode(source("aac", 96), "m4a", "128").action == "encode"
+    assert plan_encode(source("aac"), "m4a", "128").action == "encode"
+    assert plan_encode(source("aac", 128), "m4a", "alta").action == "encode"
+
+
+def test_formats_without_bitrate_copy_on_codec_alone():
+    assert plan_encode(source("flac", 900), "FLAC", "192").copy
+    assert plan_encode(source("aac", 128), "m4a", None).copy
+    assert plan_encode(source(None), "wav").action == "encode"
+
+
+def test_parse_probe_falls_back_to_container_bitrate():
+    stdout = json.dumps({
+        "streams": [{"codec_name": "opus", "sample_rate": "48000", "channels": 2}],
+        "format": {"bit_rate": "131000"},
+    })
+    assert parse_probe(stdout) == {"codec": "opus", "bitrate": 131.0, "sample_rate": 48000, "channels": 2}
+    assert parse_probe("{}")["codec"] is None
+
+
+def test_parse_ffmpeg_info_reads_first_audio_stream():
+    stderr = (
+        "Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'song.m4a':\n"
+        "  Duration: 00:03:00.00, start: 0.000000, bitrate: 131 kb/s\n"
+        "  Stream #0:0[0x1](und): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, stereo, fltp, 128 kb/s (default)\n"
+    )
+    assert parse_ffmpeg_info(stderr) == {"codec": "aac", "bitrate": 128.0, "sample_rate": 44100, "channels": 2}
+    assert parse_ffmpeg_info("sem áudio")["codec"] is None
+
+
+def test_copy_command_has_no_filter_or_encoder():
+    cmd = transcode_command("in.webm", "out.opus", "opus", "128", audio_filter="volume=2dB", copy=True)
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+    assert "-af" not in cmd and "-b:a" not in cmd
+    assert cmd[-1] == "out.opus"
+
+
+def test_loudness_on_target_needs_level_and_peak():
+    assert loudness_on_target({"input_i": -14.3, "input_tp": -2.0}, -14.0)
+    assert not loudness_on_target({"input_i": -15.0, "input_tp": -2.0}, -14.0)
+    assert not loudness_on_target({"input_i": -14.0, "input_tp": -0.5}, -14.0)
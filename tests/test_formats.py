@@ -0,0 +1,32 @@
+# tests/test_formats.py
+
+from core.formats import select_format
+
+
+def test_keeping_original_downloads_video():
+    assert select_format("mp3", "192", keep_original_file=True) == {
+        "format": "bestvideo+bestaudio/best",
+        "merge_output_format": "mp4",
+    }
+
+
+def test_lossless_takes_best_audio():
+    assert select_format("FLAC", "192", keep_original_file=False) == {"format": "bestaudio/best"}
+    assert select_format("wav", "320", keep_original_file=False) == {"format": "bestaudio/best"}
+
+
+def test_bitrate_prefers_smallest_sufficient_stream_of_same_codec():
+    assert select_format("m4a", "128", keep_original_file=False) == {
+        "format": "worstaudio[acodec^=mp4a][abr>=128]/worstaudio[abr>=128]/bestaudio/best"
+    }
+
+
+def test_unknown_codec_keeps_only_bitrate_filter():
+    assert select_format("wma", "192", keep_original_file=False) == {
+        "format": "worstaudio[abr>=192]/bestaudio/best"
+    }
+
+
+def test_quality_without_bitrate_uses_codec_only():
+    assert select_format("opus", "best", keep_original_file=False) == {"format": "bestaudio[acodec^=opus]/bestaudio/best"}
+    assert select_format("wma", None, keep_original_file=False) == {"format": "bestaudio/best"}
@@ -0,0 +1,117 @@
+# tests/test_janitor.py
+
+import json
+import os
+import re
+
+from core import janitor as janitor_module
+from core.janitor import PENDING_FILENAME, TRASH_DIRNAME, Janitor
+
+
+def make_file(path, content=b"x"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def fail_removal(monkeypatch, target, failures):
+    # Simula um arquivo em uso: as primeiras remoções de target falham
+    real_remove = os.remove
+    attempts = []
+
+    def remove(path):
+        if os.path.abspath(path) == os.path.abspath(target):
+            attempts.append(path)
+            if failures is None or len(attempts) <= failures:
+                raise PermissionError("arquivo em uso")
+        real_remove(path)
+
+    monkeypatch.setattr(janitor_module.os, "remove", remove)
+    return attempts
+
+
+def test_delete_removes_file_and_pending_list(tmp_path):
+    target = make_file(tmp_path / "out" / "a.part")
+    janitor = Janitor(str(tmp_path / "cache"))
+    logs = []
+
+    janitor.delete(target, log_hook=logs.append)
+    assert janitor.wait(5)
+
+    assert not os.path.exists(target)
+    assert not os.path.exists(janitor.path)
+    assert logs == [f"[CLEANUP] Arquivo removido: {target}"]
+
+
+def test_file_in_use_is_retried_with_backoff(tmp_path, monkeypatch):
+    target = make_file(tmp_path / "out" / "a.mp3")
+    attempts = fail_removal(monkeypatch, target, failures=3)
+    janitor = Janitor(str(tmp_path / "cache"), base_delay=0.1)
+    logs = []
+
+    janitor.delete(target, log_hook=logs.append)
+    assert janitor.wait(5)
+
+    assert len(attempts) == 4
+    assert not os.path.exists(target)
+    # Espera dobra a cada falha
+    delays = [re.search(r"nova tentativa em ([\d.]+)s", line) for line in logs]
+    assert [match.group(1) for match in delays if match] == ["0.1", "0.2", "0.4"]
+
+
+def test_gives_up_after_max_attempts(tmp_path, monkeypatch):
+    target = make_file(tmp_path / "out" / "a.mp3")
+    attempts = fail_removal(monkeypatch, target, failures=None)
+    janitor = Janitor(str(tmp_path / "cache"), base_delay=0.001, max_attempts=3)
+    logs = []
+
+    janitor.delete(target, log_hook=logs.append)
+    assert janitor.wait(5)
+
+    assert len(attempts) == 3
+    assert os.path.exists(target)
+    assert "Não foi possível remover após 3 tentativas" in logs[-1]
+
+
+def test_pending_deletions_survive_restart(tmp_path):
+    target = make_file(tmp_path / "out" / "a.mp3")
+    cache_dir = str(tmp_path / "cache")
+
+    first = Janitor(cache_dir)
+    first.delete(target, delay=3600)
+    with open(os.path.join(cache_dir, PENDING_FILENAME), encoding="utf-8") as f:
+        assert [task["path"] for task in json.load(f)] == [os.path.abspath(target)]
+
+    # Próxima execução: a remoção pendente é retomada na hora
+    second = Janitor(cache_dir)
+    assert second.wait(5)
+    assert not os.path.exists(target)
+
+
+def test_remove_tree_frees_name_immediately_and_trash_is_resumed(tmp_path):
+    cache_dir = tmp_path / "cache"
+    folder = tmp_path / "out" / "temp_normalize" / "job"
+    make_file(folder / "a.m4a")
+    leftover = cache_dir / TRASH_DIRNAME / "interrupted"
+    make_file(leftover / "b.m4a")
+
+    janitor = Janitor(str(cache_dir))
+    janitor.remove_tree(str(folder))
+    assert not folder.exists()
+    assert janitor.wait(5)
+
+    assert not leftover.exists()
+    assert not os.listdir(cache_dir / TRASH_DIRNAME)
+
+
+def test_discard_cancels_pending_removal(tmp_path):
+    target = make_file(tmp_path / "out" / "Song.mp3")
+    sibling = make_file(tmp_path / "out" / "Song.m4a")
+    janitor = Janitor(str(tmp_path / "cache"))
+    janitor.delete([target, sibling], delay=3600)
+
+    # Mesmo nome-base: o job vai reescrever o item
+    janitor.discard(str(tmp_path / "out" / "Song.opus"))
+
+    assert janitor.pending() == []
+    assert os.path.exists(target) and os.path.exists(sibling)
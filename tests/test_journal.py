@@ -0,0 +1,82 @@
+# tests/test_journal.py
+
+import json
+
+from core.journal import COMPACT_RATIO, CheckpointJournal
+
+
+def test_last_stage_wins_after_reload(tmp_path):
+    path = str(tmp_path / "job.jsonl")
+    journal = CheckpointJournal(path)
+    journal.record("a", "resolved", entry={"id": "a", "playlist_index": 2})
+    journal.record("a", "downloading", part="/tmp/a.part", bytes=10)
+    journal.record("a", "downloaded", path="/tmp/a.m4a")
+    journal.record("b", "resolved", entry={"id": "b", "playlist_index": 1})
+    journal.record_playlist(id="pl", count=2, complete=True)
+    journal.close()
+
+    reloaded = CheckpointJournal(path)
+    assert reloaded.load() == 2
+    item = reloaded.get("a")
+    assert item["state"] == "downloaded"
+    assert item["path"] == "/tmp/a.m4a"
+    # Campos de etapas anteriores continuam combinados no item
+    assert item["part"] == "/tmp/a.part"
+    assert reloaded.playlist["complete"] is True
+    assert [entry["id"] for entry in reloaded.entries()] == ["b", "a"]
+
+
+def test_unknown_stage_and_missing_id_are_ignored(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "job.jsonl"))
+    journal.record("a", "uploaded")
+    journal.record(None, "resolved")
+    journal.close()
+
+    assert CheckpointJournal(journal.path).load() == 0
+
+
+def test_truncated_line_is_skipped(tmp_path):
+    path = tmp_path / "job.jsonl"
+    journal = CheckpointJournal(str(path))
+    journal.record("a", "moved", path="/music/a.mp3")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"id": "b", "state": "downl')
+
+    reloaded = CheckpointJournal(str(path))
+    assert reloaded.load() == 1
+    assert reloaded.get("a")["state"] == "moved"
+    assert reloaded.get("b") is None
+
+
+def test_load_compacts_long_journal(tmp_path):
+    path = tmp_path / "job.jsonl"
+    journal = CheckpointJournal(str(path))
+    journal.record_playlist(id="pl", complete=False)
+    for index in range(COMPACT_RATIO * 3):
+        journal.record("a", "downloading", bytes=index)
+    journal.record("a", "downloaded", path="/tmp/a.m4a")
+    journal.close()
+
+    reloaded = CheckpointJournal(str(path))
+    assert reloaded.load() == 1
+
+    # Uma linha para a playlist e uma por item, com o estado combinado
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["playlist"]["id"] == "pl"
+    assert lines[1]["state"] == "downloaded" and lines[1]["bytes"] == COMPACT_RATIO * 3 - 1
+
+    again = CheckpointJournal(str(path))
+    assert again.load() == 1
+    assert again.get("a") == reloaded.get("a")
+
+
+def test_discard_removes_file(tmp_path):
+    path = tmp_path / "job.jsonl"
+    journal = CheckpointJournal(str(path))
+    journal.record("a", "resolved")
+    journal.discard()
+
+    assert not path.exists()
+    assert journal.get("a") is None
@@ -0,0 +1,86 @@
+# tests/test_loudness.py
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.audio import ANALYSIS_SAMPLE_RATE, Audio, LoudnessAnalyzer
+from core.cache import LoudnessCache, file_hash
+
+RATE = ANALYSIS_SAMPLE_RATE
+
+
+def sine(seconds, amplitude, frequency=1000.0, phase=0.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return amplitude * np.sin(2 * math.pi * frequency * t + phase)
+
+
+def analyze(signal, channels):
+    samples = np.repeat(signal[:, None], channels, axis=1).astype(np.float32)
+    analyzer = LoudnessAnalyzer(channels)
+    # Blocos irregulares para exercitar as caudas entre chamadas de feed
+    start = 0
+    for size in (1000, 23456, 4800, 77777):
+        analyzer.feed(samples[start:start + size])
+        start += size
+    while start < len(samples):
+        analyzer.feed(samples[start:start + 96000])
+        start += 96000
+    return analyzer.result()
+
+
+def test_stereo_sine_reference_level():
+    # Seno de 1 kHz a -20 dBFS nos dois canais: -20 LUFS (EBU 3341)
+    measured = analyze(sine(10, 0.1), channels=2)
+    assert float(measured["input_i"]) == pytest.approx(-20.0, abs=0.1)
+    assert float(measured["input_tp"]) == pytest.approx(-20.0, abs=0.1)
+    assert float(measured["input_lra"]) == pytest.approx(0.0, abs=0.1)
+
+
+def test_mono_counts_one_channel():
+    measured = analyze(sine(10, 0.1), channels=1)
+    assert float(measured["input_i"]) == pytest.approx(-23.0, abs=0.1)
+
+
+def test_silence_is_fully_gated():
+    measured = analyze(np.zeros(5 * RATE), channels=2)
+    assert float(measured["input_i"]) == float("-inf")
+    assert float(measured["input_tp"]) == float("-inf")
+
+
+def test_quiet_passage_below_relative_gate_is_ignored():
+    signal = np.concatenate((sine(10, 0.1), sine(10, 0.001)))
+    measured = analyze(signal, channels=2)
+    assert float(measured["input_i"]) == pytest.approx(-20.0, abs=0.2)
+
+
+def test_loudness_range_of_two_levels():
+    # EBU 3342: 20 s a -20 dBFS seguidos de 20 s a -30 dBFS dão LRA de 10 LU
+    signal = np.concatenate((sine(20, 0.1), sine(20, 0.1 * 10 ** (-10 / 20))))
+    measured = analyze(signal, channels=2)
+    assert float(measured["input_lra"]) == pytest.approx(10.0, abs=1.0)
+
+
+def test_true_peak_between_samples():
+    # 12 kHz a 48 kHz com fase de 45 graus: as amostras ficam 3 dB abaixo do pico
+    signal = sine(5, 0.5, frequency=12000.0, phase=math.pi / 4)
+    assert 20 * math.log10(np.abs(signal).max()) == pytest.approx(-9.03, abs=0.05)
+    measured = analyze(signal, channels=2)
+    assert float(measured["input_tp"]) == pytest.approx(-6.02, abs=0.5)
+
+
+def test_cached_analysis_skips_decoding(tmp_path, monkeypatch):
+    audio_path = tmp_path / "song.mp3"
+    audio_path.write_bytes(b"not really audio")
+    cache = LoudnessCache(str(tmp_path / "loudness"))
+    stored = {"input_i": "-18.00", "input_tp": "-1.00", "input_lra": "5.00", "input_thresh": "-28.00", "target_offset": "0.00"}
+    cache.put(file_hash(str(audio_path)), -14.0, stored)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("o áudio não deveria ser decodificado")
+
+    monkeypatch.setattr("core.audio.subprocess.Popen", fail)
+    monkeypatch.setattr(Audio, "probe", fail)
+    assert Audio(str(audio_path)).analyze_loudness(-14.0, cache=cache) == stored
@@ -0,0 +1,73 @@
+# tests/test_progress.py
+
+from core.progress import ProgressTracker
+
+
+def hook(video_id, status="downloading", downloaded=0, total=None, speed=None, filename=None, **info):
+    return {
+        "status": status,
+        "filename": filename or f"{video_id}.m4a",
+        "downloaded_bytes": downloaded,
+        "total_bytes": total,
+        "speed": speed,
+        "info_dict": {"id": video_id, **info},
+    }
+
+
+def test_events_are_rate_limited_but_start_and_finish_always_emit():
+    tracker = ProgressTracker(rate_hz=1)
+
+    assert tracker.update(hook("a", downloaded=10, total=100)) is not None
+    # Dentro do intervalo mínimo: agregado ao próximo evento
+    assert tracker.update(hook("a", downloaded=20, total=100)) is None
+    assert tracker.update(hook("a", downloaded=30, total=100)) is None
+
+    event = tracker.update(hook("a", status="finished", downloaded=100, total=100))
+    assert event is not None
+    assert event.item.status == "finished" and event.item.percent == 100.0
+    # Primeiro evento de outro item também sai na hora
+    assert tracker.update(hook("b", downloaded=5, total=50)) is not None
+
+
+def test_playlist_totals_aggregate_items_and_estimate_not_started():
+    tracker = ProgressTracker(rate_hz=0)
+    tracker.update(hook("a", status="finished", downloaded=100, total=100, playlist_index=1, playlist_count=4))
+    tracker.mark_skipped()
+    event = tracker.update(hook("b", downloaded=50, total=300, speed=10.0, playlist_index=3, playlist_count=4))
+
+    playlist = event.playlist
+    assert playlist.items_total == 4
+    assert playlist.items_finished == 1
+    assert playlist.items_skipped == 1
+    assert playlist.items_active == 1
+    assert playlist.downloaded_bytes == 150
+    # Um item ainda não começou: estimado pela média dos conhecidos (400 / 2)
+    assert playlist.total_bytes == 600
+    assert playlist.speed == 10.0
+    assert playlist.eta == (600 - 150) / 10.0
+
+
+def test_item_sums_its_video_and_audio_files():
+    tracker = ProgressTracker(rate_hz=0)
+    tracker.update(hook("a", status="finished", downloaded=800, total=800, filename="a.f137.mp4"))
+    event = tracker.update(hook("a", downloaded=100, total=200, filename="a.f140.m4a"))
+
+    assert event.item.status == "downloading"
+    assert event.item.downloaded_bytes == 900
+    assert event.item.total_bytes == 1000
+    assert event.item.percent == 90.0
+
+
+def test_fragment_estimate_counts_in_flight_fragments_as_half_done():
+    tracker = ProgressTracker(rate_hz=0)
+    d = dict(hook("a", downloaded=3000), fragment_index=2, fragment_count=10)
+
+    # 2 concluídos + 4 em andamento (meio concluídos) = 40% do total
+    event = tracker.update(d, fragment_concurrency=4)
+    assert event.item.total_bytes == 7500
+    assert event.item.fragment_index == 2 and event.item.fragment_count == 10
+
+
+def test_other_statuses_are_ignored():
+    tracker = ProgressTracker()
+    assert tracker.update({"status": "error", "info_dict": {"id": "a"}}) is None
@@ -0,0 +1,68 @@
+# tests/test_resume.py
+
+import os
+
+import pytest
+
+pytest.importorskip("yt_dlp")
+
+from core import Downloader
+from core.ffmpeg import EncodePlan
+
+URL = "https://www.youtube.com/watch?v=resume00001"
+
+
+def make_downloader(tmp_path, downloads):
+    downloader = Downloader(
+        url=URL,
+        output_path=str(tmp_path),
+        audio_format="mp3",
+        quality="192",
+        allow_playlist=False,
+        keep_original_file=False,
+        normalize_enabled=True,
+    )
+    downloader._extract_info = lambda ydl: {"id": "resume00001", "title": "Song", "webpage_url": URL}
+
+    def fake_download(ydl, entry):
+        # Baixa a fonte na pasta temporária, como o hook "MoveFiles" do yt-dlp informaria
+        source = os.path.join(downloader.tmp_dir, "Song.m4a")
+        with open(source, "wb") as f:
+            f.write(b"source audio")
+        downloads.append(source)
+        downloader._on_file_moved({"id": "resume00001", "filepath": source})
+
+    downloader._process_entry = fake_download
+    return downloader
+
+
+def test_resume_after_normalize_failure_skips_download(tmp_path, monkeypatch):
+    attempts = []
+
+    def transcode(self, output_file, *args, **kwargs):
+        attempts.append(self.file_path)
+        if len(attempts) == 1:
+            raise RuntimeError("ffmpeg falhou")
+        with open(output_file, "wb") as f:
+            f.write(b"normalized audio")
+        return EncodePlan("encode")
+
+    monkeypatch.setattr("core.downloader.Audio.transcode", transcode)
+    downloads = []
+
+    first = make_downloader(tmp_path, downloads)
+    first.start()
+    assert first.errors
+    # Falhou na normalização: a fonte baixada e o diário ficam para a retomada
+    assert len(downloads) == 1 and os.path.exists(downloads[0])
+    assert os.path.exists(first.journal.path)
+
+    second = make_downloader(tmp_path, downloads)
+    second.start()
+    assert not second.errors
+    assert len(downloads) == 1
+    assert attempts == [downloads[0], downloads[0]]
+    assert os.path.exists(tmp_path / "Song.mp3")
+    # Concluído: diário descartado e pasta temporária fora do caminho
+    assert not os.path.exists(second.journal.path)
+    assert not os.path.exists(downloads[0])
@@ -0,0 +1,146 @@
+# tests/test_scheduler.py
+
+import threading
+
+from core.scheduler import JobScheduler
+
+
+class PausingDownloader:
+    """
+    Imita o Downloader: a primeira execução termina pausada (start() retorna
+    suspenso); resume() e cancel() chamam restart_hook como o Downloader real.
+    """
+
+    instances = []
+
+    def __init__(self, url, **options):
+        self.url = url
+        self.runs = 0
+        self.paused = False
+        self.suspended = False
+        self.cancelled = False
+        self.cancel_requested = False
+        self.errors = []
+        self.restart_hook = None
+        PausingDownloader.instances.append(self)
+
+    def start(self):
+        self.runs += 1
+        self.suspended = False
+        if self.cancel_requested:
+            self.cancelled = True
+            return
+        if self.runs == 1:
+            self.paused = True
+            self.suspended = True
+
+    @property
+    def outcome(self):
+        if self.cancelled or self.cancel_requested:
+            return "cancelled"
+        return "failed" if self.errors else "done"
+
+    def _restart(self):
+        hook, self.restart_hook = self.restart_hook, None
+        if hook:
+            hook()
+
+    def resume(self):
+        self.paused = False
+        self._restart()
+
+    def cancel(self):
+        self.cancel_requested = True
+        self.paused = False
+        self._restart()
+
+
+def make_scheduler(tmp_path):
+    finished = []
+    event = threading.Event()
+
+    def on_job_finished(job, downloader):
+        finished.append((job.status, downloader))
+        event.set()
+
+    PausingDownloader.instances = []
+    scheduler = JobScheduler(
+        str(tmp_path / "queue.json"),
+        downloader_factory=PausingDownloader,
+        on_job_finished=on_job_finished,
+    )
+    return scheduler, finished, event
+
+
+def wait_finished(event):
+    assert event.wait(5)
+    event.clear()
+
+
+def test_suspended_job_runs_again_on_resume(tmp_path):
+    scheduler, finished, event = make_scheduler(tmp_path)
+    scheduler.start()
+    job = scheduler.submit("https://example.com/a")
+
+    wait_finished(event)
+    assert finished[-1][0] == "queued"
+    assert [pending.job_id for pending in scheduler.pending()] == [job.job_id]
+
+    downloader = finished[-1][1]
+    # Suspenso, mas ainda controlável pelos botões da janela
+    assert scheduler.active() == [(job, downloader)]
+    downloader.resume()
+    wait_finished(event)
+
+    # O mesmo Downloader é executado de novo e o job sai da fila
+    assert finished[-1] == ("done", downloader)
+    assert downloader.runs == 2
+    assert len(PausingDownloader.instances) == 1
+    assert scheduler.pending() == []
+    scheduler.stop()
+
+
+def test_cancelling_suspended_job_runs_cleanup(tmp_path):
+    scheduler, finished, event = make_scheduler(tmp_path)
+    scheduler.start()
+    job = scheduler.submit("https://example.com/b")
+    wait_finished(event)
+
+    scheduler.cancel(job.job_id)
+    wait_finished(event)
+
+    downloader = finished[-1][1]
+    assert finished[-1][0] == "cancelled"
+    assert downloader.runs == 2 and downloader.cancelled
+    assert scheduler.pending() == []
+    scheduler.stop()
+    assert scheduler.active() == []
+
+
+def test_factory_error_fails_job_and_keeps_dispatching(tmp_path):
+    finished = []
+    event = threading.Event()
+
+    def factory(url, **options):
+        if "bitrate" in options:
+            raise TypeError("unexpected keyword argument 'bitrate'")
+        return PausingDownloader(url, **options)
+
+    def on_job_finished(job, downloader):
+        finished.append(job)
+        event.set()
+
+    scheduler = JobScheduler(str(tmp_path / "queue.json"), downloader_factory=factory, on_job_finished=on_job_finished)
+    bad = scheduler.submit("https://example.com/bad", priority=1, bitrate="320")
+    good = scheduler.submit("https://example.com/good")
+    scheduler.start()
+
+    wait_finished(event)
+    assert finished[0].job_id == bad.job_id
+    assert finished[0].status == "failed" and "bitrate" in finished[0].error
+
+    # O dispatcher continua vivo: o próximo job roda (e fica suspenso, como nos outros testes)
+    wait_finished(event)
+    assert finished[1].job_id == good.job_id
+    assert [job.job_id for job in JobScheduler(str(tmp_path / "queue.json")).pending()] == [good.job_id]
+    scheduler.stop()
@@ -0,0 +1,109 @@
+# tests/test_session.py
+
+import pytest
+
+pytest.importorskip("yt_dlp")
+
+from core import session as session_module
+from core.session import SessionPool
+
+PLAYLIST_URL = "https://example.com/playlist?list=pool"
+
+
+def playlist(*video_ids):
+    entries = [
+        {
+            "id": video_id,
+            "title": video_id,
+            "webpage_url": f"https://example.com/watch?v={video_id}",
+            "extractor": "generic",
+            "extractor_key": "Generic",
+            "formats": [{"format_id": "audio", "url": f"https://example.com/{video_id}.m4a", "ext": "m4a", "acodec": "aac", "vcodec": "none"}],
+        }
+        for video_id in video_ids
+    ]
+    return {
+        "_type": "playlist",
+        "id": "pool",
+        "title": "pool",
+        "webpage_url": PLAYLIST_URL,
+        "extractor": "generic",
+        "extractor_key": "Generic",
+        "entries": entries,
+    }
+
+
+def job_params(tmp_path, name, progress, postprocessor):
+    return {
+        "quiet": True,
+        "no_warnings": True,
+        "format": "bestaudio",
+        "outtmpl": str(tmp_path / name / "%(id)s.%(ext)s"),
+        "progress_hooks": [progress.append],
+        "postprocessor_hooks": [postprocessor.append],
+        "postprocessors": [{"key": "FFmpegMetadata"}],
+    }
+
+
+def fire_hooks(ydl, name):
+    for hook in ydl._progress_hooks:
+        hook({"status": "downloading", "job": name})
+    for hook in ydl._postprocessor_hooks:
+        hook({"status": "finished", "job": name})
+
+
+def test_two_jobs_share_a_session_without_leaking_state(tmp_path):
+    pool = SessionPool(cache_dir=str(tmp_path / "cache"))
+    first_progress, first_pp, second_progress, second_pp = [], [], [], []
+
+    with pool.session(job_params(tmp_path, "first", first_progress, first_pp)) as ydl:
+        first = ydl
+        result = ydl.process_ie_result(playlist("a", "b"), download=False)
+        assert [entry["id"] for entry in result["entries"]] == ["a", "b"]
+        fire_hooks(ydl, "first")
+        # Job interrompido no meio da playlist (cancelado ou com erro)
+        ydl._playlist_level = 1
+        ydl._playlist_urls.add(PLAYLIST_URL)
+        ydl._download_retcode = 1
+
+    with pool.session(job_params(tmp_path, "second", second_progress, second_pp)) as ydl:
+        assert ydl is first
+        assert ydl._download_retcode == 0
+        assert ydl._playlist_level == 0
+        assert not ydl._playlist_urls
+        assert sum(len(pps) for pps in ydl._pps.values()) == 1
+        assert ydl.params["outtmpl"]["default"].startswith(str(tmp_path / "second"))
+
+        # A mesma playlist não é tratada como "já baixada" no segundo job
+        result = ydl.process_ie_result(playlist("c"), download=False)
+        assert [entry["id"] for entry in result["entries"]] == ["c"]
+        fire_hooks(ydl, "second")
+
+    assert pool.created == 1 and pool.reused == 1
+    assert [d["job"] for d in first_progress + first_pp] == ["first", "first"]
+    assert [d["job"] for d in second_progress + second_pp] == ["second", "second"]
+
+    # Devolvida ao pool, a instância não repassa eventos a nenhum dos jobs
+    fire_hooks(first, "idle")
+    assert len(first_progress) == len(second_progress) == 1
+    pool.close()
+
+
+def test_falls_back_to_fresh_instance_without_internal_attributes(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        session_module, "INTERNAL_ATTRIBUTES", session_module.INTERNAL_ATTRIBUTES + ("_attribute_from_another_version",)
+    )
+    pool = SessionPool(cache_dir=str(tmp_path / "cache"))
+    progress, postprocessor = [], []
+
+    instances = []
+    for name in ("first", "second"):
+        with pool.session(job_params(tmp_path, name, progress, postprocessor)) as ydl:
+            instances.append(ydl)
+            assert ydl.params["outtmpl"]["default"].startswith(str(tmp_path / name))
+            fire_hooks(ydl, name)
+
+    assert pool.pooling is False
+    assert instances[0] is not instances[1]
+    assert [d["job"] for d in progress] == ["first", "second"]
+    assert not pool._idle
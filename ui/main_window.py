@@ -1,18 +1,37 @@
 # ui/main_window.py
 import datetime
 import os
+import queue
 import sys
 import re
+import threading
 import tkinter as tk
-from threading import Thread
 from tkinter import ttk, messagebox
 
 from widgets import download_dir, choose_folder, open_download_folder
-from utils import resource_path
+from utils import resource_path, LogWriter
 from core import Downloader
+from core.downloader import load_yt_dlp
+from core.janitor import janitor_for
+from core.scheduler import JobScheduler
+from core.session import close_sessions, session_pool
 
 LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "app.log")
 
+# Intervalo (ms) para descarregar o log pendente no widget e limite de linhas exibidas
+LOG_POLL_MS = 100
+LOG_MAX_LINES = 2000
+
+# Downloads (jobs) executados ao mesmo tempo; os demais aguardam na fila
+MAX_CONCURRENT_JOBS = 2
+
+# Limites do ajuste automático de concorrência de cada job (itens de playlist e fragmentos)
+MAX_ITEMS_PER_JOB = 4
+MAX_FRAGMENTS_PER_ITEM = 4
+
+# Conexões simultâneas somando todos os jobs (itens × fragmentos)
+MAX_CONNECTIONS = 12
+
 
 class AppWindow:
     def __init__(self):
@@ -23,35 +42,67 @@ class AppWindow:
         self._init_state()
         self._generate_window()
         self._build_ui()
+        self.root.after(LOG_POLL_MS, self._drain_log_queue)
 
         self.is_paused = False
+        # Janela sendo fechada (diálogos pedidos pelas threads de download são abandonados)
+        self.closing = False
 
         # =============================
         # Estado global de download
         # =============================
         self.STATE_DIR = os.path.join(os.path.dirname(__file__), "..", "download_state")
         os.makedirs(self.STATE_DIR, exist_ok=True)
-        self.STATE_FILE = os.path.join(self.STATE_DIR, "download_state.json")
+
+        # Fila de downloads persistida (sobrevive ao fechamento do app)
+        self.scheduler = JobScheduler(
+            os.path.join(self.STATE_DIR, "queue.json"),
+            max_concurrent_jobs=MAX_CONCURRENT_JOBS,
+            max_connections=MAX_CONNECTIONS,
+            downloader_factory=self.download,
+            job_hooks=self._job_hooks,
+            on_job_started=self._on_job_started,
+            on_job_finished=self._on_job_finished,
+        )
 
         # ===== Ao iniciar a aplicação =====
-        if os.path.exists(self.STATE_FILE):
-            # Se existe download pausado
-            resume = messagebox.askyesno(
-                "Download pausado encontrado",
-                "Existe um download pausado.\nDeseja retomar?"
-            )
+        # A retomada vem da fila do scheduler (queue.json): cada job encontra o próprio diário
+        pending = self.scheduler.pending()
+        if pending and not messagebox.askyesno(
+            "Fila de downloads",
+            f"Existem {len(pending)} download(s) na fila.\nDeseja retomar?"
+        ):
+            self.scheduler.clear()
+        self._remove_stale_job_states()
 
-            if resume:
-                # Marca que o app está retomando de um crash
-                self._resume_from_state(self.STATE_FILE)
-            else:
-                # Usuário escolheu não retomar → limpeza
-                self._on_no_resume()
+        self.scheduler.start()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_window_close)
 
+        # Importa o yt-dlp só depois que a janela já está desenhada
+        self.root.after_idle(self._warm_up)
+
         self.root.mainloop()
 
+    def _warm_up(self):
+        """
+        Carrega o yt-dlp e prepara uma sessão do pool em segundo plano para que o
+        primeiro download não pague o custo do import, e retoma remoções pendentes da pasta de destino.
+        """
+        cache_dir = os.path.join(self.folder_var.get(), ".cache")
+
+        def run():
+            try:
+                load_yt_dlp()
+                session_pool().warm_up()
+            except Exception as e:
+                self._log(f"[ERROR] Falha ao carregar o yt-dlp: {e}", "ERROR")
+
+            if os.path.isdir(cache_dir):
+                janitor_for(cache_dir)
+
+        threading.Thread(target=run, name="ytdlp-warmup", daemon=True).start()
+
     # =========================
     # Estado inicial
     # =========================
@@ -66,6 +117,10 @@ class AppWindow:
         self.progress_var = tk.DoubleVar()
         self.status_var = tk.StringVar(value="Aguardando")
 
+        # Log: arquivo gravado em segundo plano e fila consumida pela thread do Tk
+        self.log_writer = LogWriter(LOG_FILE)
+        self._log_queue = queue.SimpleQueue()
+
     # =========================
     # Janela
     # =========================
@@ -123,7 +178,7 @@ class AppWindow:
         ttk.Combobox(
             frame,
             textvariable=self.format_var,
-            values=["mp3", "wav", "flac"],
+            values=["mp3", "m4a", "opus", "wav", "flac"],
             width=7,
             state="readonly"
         ).grid(row=0, column=1)
@@ -202,58 +257,98 @@ class AppWindow:
             messagebox.showerror("Erro", "Informe uma URL válida do YouTube")
             return
 
-        self.download_button.config(state="disabled")
-        self.pause_resume_button.config(state="normal", text="Pausar")
-        self.cancel_button.config(state="normal")
-        self.is_paused = False
+        os.makedirs(self.folder_var.get(), exist_ok=True)
+
+        job = self.scheduler.submit(
+            url,
+            output_path=self.folder_var.get(),
+            audio_format=self.format_var.get(),
+            quality=self.quality_var.get(),
+            allow_playlist=self.playlist_var.get(),
+            keep_original_file=self.keep_original_var.get(),
+            normalize_enabled=self.normalize_var.get(),
+            max_concurrent_items=MAX_ITEMS_PER_JOB,
+            max_fragment_downloads=MAX_FRAGMENTS_PER_ITEM,
+            adaptive_concurrency=True,
+        )
 
-        self.progress_var.set(0)
-        self.status_var.set("Iniciando...")
-        self.log_text.config(state="normal")
-        self.log_text.delete("1.0", tk.END)
-        self.log_text.config(state="disabled")
+        # O botão continua habilitado: novas URLs entram na fila
+        self._log(f"[QUEUE] Adicionado à fila ({job.job_id}): {url}")
+        if not self.scheduler.running():
+            self.status_var.set("Iniciando...")
 
-        Thread(target=self.run_download, daemon=True).start()
+    def _job_hooks(self, job):
+        """
+        Argumentos de execução de cada job (hooks da interface e arquivo de estado).
+        """
+        return {
+            "progress_event_hook": self.on_progress_event,
+            "status_hook": self.set_status,
+            "file_finished_hook": self.on_file_finished,
+            "error_hook": self.on_error,
+            "log_hook": self._log,
+            "state_file": self._job_state_file(job.job_id),
+            "cancel_policy": self._ask_keep_cancelled_file,
+        }
+
+    def _job_state_file(self, job_id):
+        return os.path.join(self.STATE_DIR, f"job_{job_id}.json")
+
+    def _remove_stale_job_states(self):
+        """Remove os arquivos de estado de jobs que não estão mais na fila."""
+        queued = {job.job_id for job in self.scheduler.pending()}
+        for name in os.listdir(self.STATE_DIR):
+            match = re.fullmatch(r"job_(\w+)\.json", name)
+            if match and match.group(1) not in queued:
+                try:
+                    os.remove(os.path.join(self.STATE_DIR, name))
+                except OSError:
+                    pass
+
+    def _on_job_started(self, job, downloader):
+        def update():
+            self.pause_resume_button.config(state="normal", text="Pausar")
+            self.cancel_button.config(state="normal")
+            self.is_paused = False
+            self.progress_var.set(0)
 
-    def run_download(self):
-        try:
-            os.makedirs(self.folder_var.get(), exist_ok=True)
-
-            self.downloader = self.download(
-                url=self.url_entry.get().strip(),
-                output_path=self.folder_var.get(),
-                audio_format=self.format_var.get(),
-                quality=self.quality_var.get(),
-                allow_playlist=self.playlist_var.get(),
-                keep_original_file=self.keep_original_var.get(),
-                normalize_enabled=self.normalize_var.get(),
-                progress_hook=self.on_progress,
-                status_hook=self.set_status,
-                file_finished_hook=self.on_file_finished,
-                error_hook=self.on_error,
-                log_hook=self._log,
-                state_file=self.STATE_FILE
-            )
+        self.root.after(0, update)
+
+    def _on_job_finished(self, job, downloader):
+        if job.error:
+            self._log(f"[QUEUE] Job {job.job_id} falhou: {job.error}", "ERROR")
+        else:
+            self._log(f"[QUEUE] Job {job.job_id} finalizado: {job.status}")
+
+        if job.status != "queued":
+            # Encerrado: o arquivo de estado do job não será mais lido
+            try:
+                os.remove(self._job_state_file(job.job_id))
+            except OSError:
+                pass
+
+        if self.scheduler.active():
+            # Botões continuam controlando os jobs em andamento ou suspensos
+            return
 
-            self.downloader.start()
-
-        finally:
-            self.root.after(
-                0,
-                lambda: (
-                    self.download_button.config(state="normal"),
-                    self.cancel_button.config(
-                        text="Cancelar",
-                        state="disabled"
-                    ),
-                    self.pause_resume_button.config(
-                        state="disabled",
-                        text="Pausar"
-                    ),
-                    setattr(self, "is_paused", False),
-                    self.status_var.set("Aguardando")
-                )
+        if self.scheduler.pending():
+            return
+
+        self.root.after(
+            0,
+            lambda: (
+                self.cancel_button.config(
+                    text="Cancelar",
+                    state="disabled"
+                ),
+                self.pause_resume_button.config(
+                    state="disabled",
+                    text="Pausar"
+                ),
+                setattr(self, "is_paused", False),
+                self.status_var.set("Aguardando")
             )
+        )
 
     # =========================
     # Hooks (THREAD-SAFE)
@@ -285,6 +380,32 @@ class AppWindow:
 
         self.root.after(0, update)
 
+    def on_progress_event(self, event):
+        """
+        Recebe o ProgressEvent do Downloader (já limitado em frequência).
+        Em playlists a barra mostra o progresso total; o texto detalha o item atual.
+        """
+        item = event.item
+        playlist = event.playlist
+
+        if playlist.items_total and playlist.items_total > 1:
+            percent = playlist.percent
+            text = (
+                f"Item {item.playlist_index or '?'}/{playlist.items_total} — {item.percent:.1f}% — "
+                f"Total {percent:.1f}% — {playlist.speed / 1024:.0f} KB/s"
+            )
+            if playlist.concurrency > 1:
+                text += f" — {playlist.concurrency} simultâneos"
+            if playlist.eta is not None:
+                text += f" — ETA {int(playlist.eta)}s"
+        else:
+            percent = item.percent
+            text = f"{percent:.1f}% — {item.speed / 1024:.0f} KB/s"
+            if item.eta is not None:
+                text += f" — ETA {int(item.eta)}s"
+
+        self.on_progress(percent, status_text=text)
+
     def set_status(self, text):
         self.root.after(0, lambda: self.status_var.set(text))
 
@@ -305,40 +426,61 @@ class AppWindow:
         """
         Adiciona mensagem ao log do app e salva em arquivo.
         level: INFO / ERROR / WARN
+        Pode ser chamado de qualquer thread: não grava em disco nem acessa o Tk.
         """
 
         timestamp = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        log_text = f"[{timestamp}] {level}: {text}"
+        self._log_queue.put(f"[{timestamp}] {level}: {text}")
+        self.log_writer.write(text, level)
 
-        # Log no Text widget
-        self.log_text.config(state="normal")
-        self.log_text.insert(tk.END, log_text + "\n")
-        self.log_text.see(tk.END)
-        self.log_text.config(state="disabled")
+    def _drain_log_queue(self):
+        """
+        Insere no widget, de uma vez, as linhas acumuladas desde a última chamada.
+        """
+        lines = []
+        try:
+            while True:
+                lines.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
 
-        # Log em arquivo
-        with open (LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(log_text + "\n")
+        if lines:
+            self.log_text.config(state="normal")
+            self.log_text.insert(tk.END, "\n".join(lines[-LOG_MAX_LINES:]) + "\n")
+
+            # Mantém apenas as últimas linhas para o widget continuar leve
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - LOG_MAX_LINES - 1
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+
+            self.log_text.see(tk.END)
+            self.log_text.config(state="disabled")
+
+        self.root.after(LOG_POLL_MS, self._drain_log_queue)
 
     def on_pause_resume_clicked(self):
+        # Os botões valem para todos os jobs em andamento (e os suspensos, ao retomar)
         if not self.is_paused:
             # PAUSAR
-            self.downloader.pause()
+            for _, downloader in self.scheduler.running():
+                downloader.pause()
             self.is_paused = True
             self.pause_resume_button.config(text="Retomar")
 
         else:
             # RETOMAR
-            self.downloader.resume()
+            for _, downloader in self.scheduler.active():
+                downloader.resume()
             self.is_paused = False
             self.pause_resume_button.config(text="Pausar")
 
     def on_cancel_clicked(self):
-        if not hasattr(self, "downloader") or not self.downloader:
+        jobs = self.scheduler.active()
+        if not jobs:
             return
 
         # PLAYLIST
-        if self.downloader.allow_playlist:
+        if any(downloader.allow_playlist for _, downloader in jobs):
             if not messagebox.askyesno(
                     "Cancelar playlist",
                     "Deseja cancelar após o item atual terminar?"
@@ -354,7 +496,38 @@ class AppWindow:
             self._log("❌ Cancelamento solicitado: download será interrompido imediatamente.")
 
         self.cancel_button.config(state="disabled")
-        self.downloader.cancel()
+        for job, _ in jobs:
+            self.scheduler.cancel(job.job_id)
+
+    def _ask_keep_cancelled_file(self, file_path):
+        """
+        Chamado pela thread do download: o diálogo é aberto na thread do Tk
+        (root.after) e a resposta é aguardada num Event.
+        """
+        def ask():
+            return messagebox.askyesno(
+                "Cancelar playlist",
+                f"Deseja manter este arquivo?\n\n{os.path.basename(file_path)}"
+            )
+
+        if threading.current_thread() is threading.main_thread():
+            return ask()
+
+        answer = {}
+        answered = threading.Event()
+
+        def ask_in_tk_thread():
+            try:
+                answer["keep"] = ask()
+            finally:
+                answered.set()
+
+        self.root.after(0, ask_in_tk_thread)
+        while not answered.wait(0.5):
+            if self.closing:
+                # Janela fechada antes da resposta: mantém o arquivo
+                return True
+        return answer.get("keep", True)
 
     def on_download_finished(self):
         self.cancel_button.config(
@@ -362,41 +535,17 @@ class AppWindow:
             state="disabled"
         )
 
-    def _resume_from_state(self, path):
-        import json
-
-        with open(path, "r", encoding="utf-8") as f:
-            state = json.load(f)
-
-        self.url_entry.insert(0, state["url"])
-        self.format_var.set(state["audio_format"])
-        self.quality_var.set(state["quality"])
-        self.playlist_var.set(state["allow_playlist"])
-        self.keep_original_var.set(state["keep_original"])
-        self.normalize_var.set(state["normalize_enabled"])
-        self.folder_var.set(state.get("output_path", self.download_dir))
-
-        self.start_download()
-
     def on_window_close(self):
-        # se houver downloader ativo
-        if hasattr(self, "downloader") and self.downloader:
+        self.closing = True
+        # Jobs em andamento continuam na fila persistida do scheduler
+        self.scheduler.stop()
+        for _, downloader in self.scheduler.running():
             try:
                 # salva estado apenas se download estiver ativo ou pausado
-                self.downloader.save_state_on_close()
+                downloader.save_state_on_close()
             except Exception:
                 pass
 
+        close_sessions()
+        self.log_writer.close()
         self.root.destroy()
-
-    # ===== Novo método para lidar com 'não retomar' =====
-    def _on_no_resume(self):
-        """Ação quando o usuário decide não retomar o download pausado."""
-        # Limpa o arquivo de estado antigo
-        try:
-            os.remove(self.STATE_FILE)
-        except FileNotFoundError:
-            pass
-
-        # Opcional: log
-        self._log("Download pausado descartado pelo usuário.")
\ No newline at end of file
@@ -1,3 +1,4 @@
 # utils/__init__.py
 
-from .paths import resource_path, get_ffmpeg_path
\ No newline at end of file
+from .paths import resource_path, get_ffmpeg_path, get_ffmpeg_executable
+from .logger import LogWriter
\ No newline at end of file
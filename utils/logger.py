@@ -0,0 +1,111 @@
+# utils/logger.py
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Escrita de log em segundo plano.
+    write() apenas enfileira o registro; uma thread grava em lotes no arquivo
+    (JSON lines) e faz a rotação por tamanho (app.log, app.log.1, ...).
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024, backup_count=3, flush_interval=0.5, batch_size=500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message, level="INFO", **fields):
+        """
+        Enfileira uma linha de log. Nunca bloqueia em E/S.
+        """
+        record = {
+            "time": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "level": level,
+            "message": message,
+        }
+        record.update(fields)
+        self._queue.put(record)
+
+    def close(self, timeout=2.0):
+        """
+        Grava o que estiver pendente e encerra a thread.
+        """
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError:
+                    # Falha de disco não pode derrubar a aplicação
+                    pass
+            if stop:
+                return
+
+    def _next_batch(self):
+        # Espera o primeiro registro e junta o que chegar até o intervalo de gravação
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                record = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if record is _STOP:
+                return batch, True
+            batch.append(record)
+
+        return batch, False
+
+    def _write_batch(self, batch):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+
+        if self._should_rotate(len(data.encode("utf-8"))):
+            self._rotate()
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+    def _should_rotate(self, incoming):
+        if not self.max_bytes:
+            return False
+        try:
+            return os.path.getsize(self.path) + incoming > self.max_bytes
+        except OSError:
+            return False
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{index}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{index + 1}")
+
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -1,6 +1,7 @@
 # utils/paths.py
 
 import os
+import shutil
 import sys
 
 def resource_path(relative_path):
@@ -24,3 +25,15 @@ def get_ffmpeg_path():
         )
 
     return os.path.join(base_path, 'bin')
+
+
+def get_ffmpeg_executable(name="ffmpeg"):
+    """
+    Caminho do executável (ffmpeg ou ffprobe) empacotado em bin/; sem ele, o do PATH.
+    """
+    executable = name + ".exe" if os.name == "nt" else name
+    bundled = os.path.join(get_ffmpeg_path(), executable)
+    if os.path.isfile(bundled):
+        return bundled
+
+    return shutil.which(name) or name